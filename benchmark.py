@@ -0,0 +1,338 @@
+# benchmark.py
+"""Headless benchmarks for the todo list, password generator and calculator
+
+Runs without a display: the todo list view renders into a small in-memory
+stand-in for the Treeview unless --tk is given (use it under xvfb-run to
+include real widget costs). Results are saved as JSON and can be compared
+against a saved baseline:
+    python benchmark.py --save-baseline                # once, on a known-good commit
+    python benchmark.py --baseline benchmark_baseline.json
+exits with status 1 when any measurement (the best of five runs) got slower
+than the threshold.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from calculator_engine import compile_expression
+from password_analysis import analyze, analyze_many
+from password_engine import PasswordEngine, compile_policy
+from password_passphrase import PassphraseGenerator, Wordlist
+from password_strength import estimate
+from todo_core import CATEGORIES, PRIORITIES, open_store
+from todo_view import TodoListView
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+QUICK_SIZES = (1000, 10000)
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_THRESHOLD = 0.25
+# Every measurement is the best of this many runs; one run is too noisy
+# to hold against the threshold
+REPEAT = 5
+SEED = 20240101
+WORDS = ("buy", "milk", "report", "call", "mom", "fix", "bug", "review", "budget", "plan",
+         "meeting", "email", "gym", "doctor", "book", "flight", "clean", "kitchen", "pay",
+         "rent", "draft", "slides", "update", "website", "order", "groceries", "renew", "passport")
+
+
+class HeadlessTree:
+    """The part of the ttk.Treeview interface that TodoListView uses, kept in memory"""
+
+    def __init__(self):
+        self.rows: Dict[str, Any] = {}
+        self.order: List[str] = []
+
+    def insert(self, parent, index, iid, values):
+        self.rows[iid] = values
+        self.order.append(iid)
+
+    def item(self, iid, values):
+        self.rows[iid] = values
+
+    def delete(self, *iids):
+        for iid in iids:
+            del self.rows[iid]
+        gone = set(iids)
+        self.order = [iid for iid in self.order if iid not in gone]
+
+    def get_children(self):
+        return tuple(self.order)
+
+    def move(self, iid, parent, index):
+        self.order.remove(iid)
+        self.order.insert(index, iid)
+
+
+def make_todos(count: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    """Reproducible synthetic todos: about 40% completed, spread over a year"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    todos = []
+    for todo_id in range(1, count + 1):
+        created = start + timedelta(seconds=rng.randrange(365 * 86400))
+        completed = rng.random() < 0.4
+        todos.append({
+            'id': todo_id,
+            'task': ' '.join(rng.choices(WORDS, k=rng.randint(2, 6))),
+            'priority': rng.choice(PRIORITIES),
+            'category': rng.choice(CATEGORIES),
+            'created_at': created.isoformat(),
+            'completed': completed,
+            'completed_at': (created + timedelta(seconds=rng.randrange(30 * 86400))).isoformat()
+                            if completed else None,
+        })
+    return todos
+
+
+def measure(function: Callable[[], Any], repeat: int = REPEAT, setup: Optional[Callable[[], Any]] = None) -> float:
+    """Best wall time of ``repeat`` runs, in seconds; ``setup`` runs untimed before each"""
+    best = float('inf')
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_tree(use_tk: bool):
+    if not use_tk:
+        return HeadlessTree()
+    import tkinter as tk
+    from tkinter import ttk
+    root = tk.Tk()
+    root.withdraw()
+    return ttk.Treeview(root, columns=('ID', 'Task', 'Priority', 'Category', 'Status', 'Created'),
+                        show='headings')
+
+
+def bench_todos(size: int, workdir: str, use_tk: bool = False) -> Dict[str, float]:
+    """Save, load, filter, search, stats and list rendering for ``size`` todos"""
+    filename = os.path.join(workdir, f"todos-{size}.json")
+    todos = make_todos(size)
+    results = {}
+    store = None
+
+    def open_empty():
+        nonlocal store
+        if store is not None:
+            store.close()
+        for name in os.listdir(workdir):
+            if name.startswith(os.path.basename(filename)):
+                os.remove(os.path.join(workdir, name))
+        store = open_store(filename)
+
+    def add_all():
+        store.add_many(todos)
+        store.commit()
+    results[f'todo.add_many[{size}]'] = measure(add_all, setup=open_empty)
+
+    updates = 200
+    ids = random.Random(SEED).sample(range(1, size + 1), min(updates, size))
+    # Alternate the value so every run really changes the records
+    priorities = itertools.cycle(PRIORITIES)
+
+    def edit():
+        store.storage.wait_for_compaction()
+        priority = next(priorities)
+        for todo_id in ids:
+            store.update(todo_id, priority=priority)
+
+    def save():
+        # What closing the app or the periodic compaction does: flush the
+        # log, then fold it into a new snapshot
+        store.commit()
+        store.storage.compact()
+        store.storage.wait_for_compaction()
+    results[f'todo.save[{size}]'] = measure(save, setup=edit)
+
+    def load():
+        nonlocal store
+        store = open_store(filename)
+    results[f'todo.load[{size}]'] = measure(load, setup=lambda: store.close())
+
+    results[f'todo.filter[{size}]'] = measure(lambda: store.filter(completed=False, category='work'))
+    # Every TodoStats subscribes to the store; unsubscribe the last one
+    # before the next run so they do not pile up
+    made = []
+
+    def drop_stats():
+        while made:
+            store.remove_listener(made.pop().record_changed)
+
+    def build_stats():
+        made.append(store.stats())
+        return made[-1].average_completion_seconds
+    results[f'todo.stats[{size}]'] = measure(build_stats, setup=drop_stats)
+    drop_stats()
+
+    def build_index():
+        store.search_index.reset()
+        while not store.search_index.build_step():
+            pass
+    results[f'todo.search_index[{size}]'] = measure(build_index)
+    results[f'todo.search[{size}]'] = measure(lambda: store.filter(text='rep'))
+
+    view = TodoListView(make_tree(use_tk))
+    pending = store.filter(completed=False)
+    results[f'todo.render_first[{size}]'] = measure(
+        lambda: view.render(pending), setup=lambda: view.__init__(make_tree(use_tk)))
+    view.render(pending)
+    target = pending[0]['id']
+    results[f'todo.render_update[{size}]'] = measure(
+        lambda: view.render(store.filter(completed=False)),
+        setup=lambda: store.update(target, task=f"{store.get(target)['task']} x"))
+
+    def update_and_commit():
+        priority = next(priorities)
+        for todo_id in ids:
+            store.update(todo_id, priority=priority)
+            store.commit()
+    results[f'todo.commit_one[{size}]'] = measure(update_and_commit) / len(ids)
+    store.close()
+    return results
+
+
+def bench_passwords(count: int = 200000) -> Dict[str, float]:
+    """Per-password cost of generation, analysis and strength estimation"""
+    engine = PasswordEngine(compile_policy())
+    results = {'password.generate': measure(lambda: list(engine.generate_many(count, 16))) / count}
+    passwords = list(engine.generate_many(count, 16))
+    sample = passwords[:20000]
+    results['password.analyze'] = measure(lambda: [analyze(p) for p in sample]) / len(sample)
+    results['password.analyze_many'] = measure(lambda: analyze_many(passwords)) / count
+    estimate.cache_clear()
+    results['password.estimate'] = measure(lambda: [estimate(p) for p in sample[:5000]],
+                                           setup=estimate.cache_clear) / 5000
+
+    rng = random.Random(SEED)
+    wordlist = Wordlist.from_words(''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=7))
+                                   for _ in range(7776))
+    generator = PassphraseGenerator(wordlist)
+    results['passphrase.generate'] = measure(lambda: list(generator.generate_many(count // 4))) / (count // 4)
+    return results
+
+
+def bench_calculator(rows: int = 100000) -> Dict[str, float]:
+    """Expression compile cost and per-row evaluation cost"""
+    text = '(a+b)*c**2 % 7'
+    results = {'calculator.compile': measure(lambda: compile_expression.__wrapped__(text))}
+    expression = compile_expression(text)
+    bindings = [{'a': float(i), 'b': 2.0, 'c': 3.0} for i in range(rows)]
+    results['calculator.evaluate'] = measure(lambda: [expression.evaluate(b) for b in bindings]) / rows
+    try:
+        import numpy as np
+    except ImportError:
+        return results
+    from calculator_batch import evaluate_columns
+    columns = {'a': np.arange(rows, dtype=np.float64), 'b': np.full(rows, 2.0), 'c': np.full(rows, 3.0)}
+    results['calculator.batch'] = measure(lambda: evaluate_columns(expression, columns, rows)) / rows
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Print current against baseline times; returns the names that regressed"""
+    regressions = []
+    print(f"\n{'benchmark':32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        ratio = results[name] / baseline[name] if baseline[name] else 1.0
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:32} {format_seconds(baseline[name]):>12} {format_seconds(results[name]):>12} "
+              f"{(ratio - 1) * 100:+7.1f}% {'❌' if regressed else '✅'}")
+    return regressions
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('µs', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmarks and compare them with a baseline")
+    parser.add_argument('--sizes', help="comma-separated todo list sizes (default: 1000,10000,100000,1000000)")
+    parser.add_argument('--quick', action='store_true', help="only the 1k and 10k todo lists")
+    parser.add_argument('--only', choices=('todo', 'password', 'calculator'), action='append',
+                        help="run only these groups (repeatable)")
+    parser.add_argument('--tk', action='store_true', help="render into a real Treeview (needs a display)")
+    parser.add_argument('-o', '--output', metavar='FILE', help="write the results as JSON")
+    parser.add_argument('--baseline', metavar='FILE', help="compare with a saved baseline")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help=f"also write the results to {DEFAULT_BASELINE}")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown before a result counts as a regression (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(',')] if args.sizes else \
+            list(QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    except ValueError:
+        parser.error("--sizes must be comma-separated numbers")
+    groups = set(args.only or ('todo', 'password', 'calculator'))
+
+    results: Dict[str, float] = {}
+    if 'todo' in groups:
+        workdir = tempfile.mkdtemp(prefix='todo-bench-')
+        try:
+            for size in sizes:
+                print(f"⏱️ Todo list with {size} items...", file=sys.stderr)
+                results.update(bench_todos(size, workdir, args.tk))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    if 'password' in groups:
+        print("⏱️ Passwords...", file=sys.stderr)
+        results.update(bench_passwords())
+    if 'calculator' in groups:
+        print("⏱️ Calculator...", file=sys.stderr)
+        results.update(bench_calculator())
+
+    for name, seconds in results.items():
+        print(f"{name:32} {format_seconds(seconds):>12}")
+
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sizes': sizes,
+        },
+        'results': results,
+    }
+    for path in filter(None, (args.output, DEFAULT_BASELINE if args.save_baseline else None)):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {path}", file=sys.stderr)
+
+    if args.baseline:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)['results']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Error: could not read baseline: {e}", file=sys.stderr)
+            return 1
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} benchmark(s) regressed by more than "
+                  f"{args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+        print("✅ No regressions", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,69 +1,164 @@
 # calculator_basic.py
+import argparse
+import sys
 
-def basic_calculator():
+from calculator_engine import MODES, compile_expression, describe_error
+
+# Same as calculator_batch.FORMATS; that module pulls in NumPy, so it is
+# only imported when batch mode runs
+BATCH_FORMATS = ('csv', 'f8')
+
+
+def basic_calculator(mode='float', precision=None):
     """
-    A simple calculator that performs basic arithmetic operations
+    A simple calculator that evaluates arithmetic expressions
     """
     print("🧮 Simple Calculator")
     print("=" * 30)
     
+    print("\nAvailable operations:")
+    print("+ : Addition")
+    print("- : Subtraction")
+    print("* : Multiplication")
+    print("/ : Division")
+    print("% : Modulus (Remainder)")
+    print("** : Exponentiation")
+    print("( ) : Grouping, e.g. (2 + 3) * 4")
+    print("Names like x or rate are variables and are asked for afterwards")
+    
     try:
-        # Get user input
-        num1 = float(input("Enter the first number: "))
-        num2 = float(input("Enter the second number: "))
-        
-        print("\nAvailable operations:")
-        print("+ : Addition")
-        print("- : Subtraction")
-        print("* : Multiplication")
-        print("/ : Division")
-        print("% : Modulus (Remainder)")
-        print("** : Exponentiation")
-        
-        operation = input("\nEnter the operation symbol: ").strip()
+        text = input("\nEnter an expression: ").strip()
+        expression = compile_expression(text, mode, precision)
+        number = expression.backend.number
         
-        # Perform calculation based on operation
-        result = None
-        operation_name = ""
-        
-        if operation == '+':
-            result = num1 + num2
-            operation_name = "Addition"
-        elif operation == '-':
-            result = num1 - num2
-            operation_name = "Subtraction"
-        elif operation == '*':
-            result = num1 * num2
-            operation_name = "Multiplication"
-        elif operation == '/':
-            if num2 == 0:
-                print("❌ Error: Division by zero is not allowed!")
-                return
-            result = num1 / num2
-            operation_name = "Division"
-        elif operation == '%':
-            if num2 == 0:
-                print("❌ Error: Modulus by zero is not allowed!")
+        # Ask for every variable once, in alphabetical order
+        bindings = {}
+        for name in sorted(expression.variables):
+            try:
+                bindings[name] = number(input(f"Enter the value of {name}: ").strip())
+            except (ValueError, ArithmeticError):
+                print("❌ Error: Please enter valid numbers!")
                 return
-            result = num1 % num2
-            operation_name = "Modulus"
-        elif operation == '**':
-            result = num1 ** num2
-            operation_name = "Exponentiation"
-        else:
-            print("❌ Invalid operation! Please use one of: +, -, *, /, %, **")
-            return
+        
+        result = expression.evaluate(bindings)
         
         # Display result
         print("\n" + "=" * 30)
         print(f"📊 Calculation Result:")
-        print(f"{operation_name}: {num1} {operation} {num2} = {result}")
+        print(f"{text} = {expression.backend.format(result)}")
         
-    except ValueError:
-        print("❌ Error: Please enter valid numbers!")
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+    except ArithmeticError as e:
+        print(f"❌ Error: {describe_error(e)}")
     except Exception as e:
         print(f"❌ An error occurred: {e}")
 
+def parse_binding(text):
+    """Turn NAME=VALUE into a (name, value text) pair; the mode converts the text later"""
+    name, sep, value = text.partition('=')
+    try:
+        if not sep or not name.strip().isidentifier():
+            raise ValueError
+        float(value)
+        return name.strip(), value.strip()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME=NUMBER, got {text!r}") from None
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Calculator; starts an interactive session unless an expression is given")
+    parser.add_argument('expression', nargs='?', help="expression to evaluate, e.g. '(a+b)*c**2 % 7'")
+    parser.add_argument('-v', '--var', dest='bindings', type=parse_binding, action='append', default=[],
+                        metavar='NAME=VALUE', help="value of a variable in the expression (repeatable)")
+    parser.add_argument('-m', '--mode', choices=MODES, default='float',
+                        help="compute with floats, Decimal or exact fractions and big integers (default: float)")
+    parser.add_argument('-p', '--precision', type=int, metavar='DIGITS',
+                        help="significant digits in decimal mode (default: 28)")
+    parser.add_argument('--once', action='store_true',
+                        help="ask for a single expression and exit instead of starting a session")
+    parser.add_argument('--history', metavar='FILE',
+                        help="session history file (default: ~/.calculator_history; '' to keep none)")
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument('--batch', metavar='FILE',
+                       help="evaluate the expression for every row of FILE ('-' for stdin)")
+    batch.add_argument('--columns', help="comma-separated column names of binary input")
+    batch.add_argument('--input-format', choices=BATCH_FORMATS,
+                       help="csv with a header row, or raw float64 (default: f8 with --columns, else csv)")
+    batch.add_argument('-o', '--output', metavar='FILE', help="write results to FILE instead of stdout")
+    batch.add_argument('--output-format', choices=BATCH_FORMATS, default='csv',
+                       help="csv with a result and an error column, or raw float64 (default: csv)")
+    return parser
+
+def open_batch_file(path, mode, binary):
+    """Open a batch input or output; '-' or None means stdin or stdout"""
+    if path in (None, '-'):
+        stream = sys.stdin if 'r' in mode else sys.stdout
+        return open(stream.fileno(), mode + ('b' if binary else ''), closefd=False,
+                    **({} if binary else {'newline': ''}))
+    if binary:
+        return open(path, mode + 'b')
+    return open(path, mode, newline='')
+
+def batch_calculator(args):
+    """Run batch mode; returns the exit status"""
+    from calculator_batch import run_batch
+    
+    input_format = args.input_format or ('f8' if args.columns else 'csv')
+    names = [name.strip() for name in args.columns.split(',')] if args.columns else None
+    try:
+        expression = compile_expression(args.expression)
+        with open_batch_file(args.batch, 'r', input_format == 'f8') as source, \
+                open_batch_file(args.output, 'w', args.output_format == 'f8') as output:
+            rows, error_count, failed = run_batch(expression, source, output, input_format,
+                                                  args.output_format, names)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    except ArithmeticError as e:
+        print(f"❌ Error: {describe_error(e)}", file=sys.stderr)
+        return 1
+    print(f"✅ Evaluated {rows} rows", file=sys.stderr)
+    if error_count:
+        shown = ', '.join(map(str, failed)) + (', ...' if error_count > len(failed) else '')
+        print(f"⚠️ {error_count} rows divided by zero or had no real result (rows {shown})", file=sys.stderr)
+    return 0
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.batch:
+        if args.expression is None:
+            parser.error("--batch needs an expression")
+        if args.mode != 'float':
+            parser.error("--batch always computes with floats")
+        return batch_calculator(args)
+    if args.expression is None and args.once:
+        basic_calculator(args.mode, args.precision)
+        return 0
+    if args.expression is None:
+        from calculator_session import HISTORY_FILE, CalculatorSession
+        try:
+            session = CalculatorSession(args.mode, args.precision,
+                                        HISTORY_FILE if args.history is None else args.history or None)
+        except ValueError as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            return 1
+        session.run()
+        return 0
+    
+    try:
+        expression = compile_expression(args.expression, args.mode, args.precision)
+        backend = expression.backend
+        result = expression.evaluate({name: backend.number(value) for name, value in args.bindings})
+        print(backend.format(result))
+    except ValueError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    except ArithmeticError as e:
+        print(f"❌ Error: {describe_error(e)}", file=sys.stderr)
+        return 1
+    return 0
+
 # Run the calculator
 if __name__ == "__main__":
-    basic_calculator()
\ No newline at end of file
+    sys.exit(main())
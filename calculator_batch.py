@@ -0,0 +1,238 @@
+# calculator_batch.py
+"""Evaluate one expression over every row of a CSV or binary file of operands
+
+CSV input needs a header row naming the columns; binary input is raw
+little-endian float64 values, row after row, with the column names given
+separately. Rows are processed in chunks, so files larger than memory work:
+    python calculator.py 'a / b' --batch operands.csv -o results.csv
+    python calculator.py '(x+y)**2' --batch operands.f8 --columns x,y -o results.f8 --output-format f8
+Division or modulus by zero, or a power with no real result, marks the row
+instead of stopping the run.
+"""
+import csv
+import math
+import sys
+from array import array
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from calculator_engine import OPERATIONS, Expression, Node, NoRealResult
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHUNK_ROWS = 1 << 16
+FORMATS = ('csv', 'f8')
+# Per-row error codes; a row with both is reported as a division by zero
+ZERO_DIVISION = 1
+NO_REAL_RESULT = 2
+ERROR_LABELS = {ZERO_DIVISION: "division by zero", NO_REAL_RESULT: "no real result",
+                ZERO_DIVISION | NO_REAL_RESULT: "division by zero"}
+# Rows listed in the summary when some of them failed
+MAX_REPORTED_ROWS = 10
+
+
+def compile_vectorized(node: Node) -> Callable[[Dict[str, Any]], Tuple[Any, Any]]:
+    """Compile an AST into closures over NumPy columns
+
+    Each closure returns the values and the per-row error codes: rows where
+    a division, modulus or negative power hit a zero, or a negative number
+    was raised to a fractional power, come out as NaN and the codes are
+    None while no row failed.
+    """
+    kind = node[0]
+    if kind == 'number':
+        value = float(node[1])
+        return lambda columns: (value, None)
+    if kind == 'name':
+        name = node[1]
+        return lambda columns: (columns[name], None)
+    if kind == 'unary':
+        operand = compile_vectorized(node[2])
+        if node[1] == '+':
+            return operand
+
+        def negate(columns):
+            values, errors = operand(columns)
+            return -values, errors
+        return negate
+
+    symbol, left, right = node[1], compile_vectorized(node[2]), compile_vectorized(node[3])
+    op = OPERATIONS[symbol]
+
+    def binary(columns):
+        a, a_errors = left(columns)
+        b, b_errors = right(columns)
+        with np.errstate(all='ignore'):
+            values = op(a, b)
+            if symbol in ('/', '%'):
+                failed = np.equal(b, 0) * np.uint8(ZERO_DIVISION)
+            elif symbol == '**':
+                # NaN from two numbers means a negative base and a fractional exponent
+                failed = ((np.equal(a, 0) & np.less(b, 0)) * np.uint8(ZERO_DIVISION)
+                          | (np.isnan(values) & ~np.isnan(a) & ~np.isnan(b)) * np.uint8(NO_REAL_RESULT))
+            else:
+                failed = None
+        errors = _merge(_merge(a_errors, b_errors), failed if np.any(failed) else None)
+        if errors is not None:
+            values = np.where(errors, np.nan, values)
+        return values, errors
+    return binary
+
+
+def _merge(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a | b
+
+
+def evaluate_columns(expression: Expression, columns: Dict[str, Sequence[float]], rows: int,
+                     vectorized: Optional[Callable] = None):
+    """Values and per-row error codes (0 where the row worked) for one chunk of columns
+
+    Pass the result of ``compile_vectorized`` to skip compiling per chunk.
+    """
+    if np is not None:
+        vectorized = vectorized or compile_vectorized(expression.ast)
+        values, errors = vectorized(columns)
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), (rows,))
+        if errors is None:
+            errors = np.zeros(rows, dtype=np.uint8)
+        return values, np.broadcast_to(errors, (rows,))
+
+    # Without NumPy every row goes through the scalar closures
+    values, errors = array('d', bytes(8 * rows)), bytearray(rows)
+    evaluate_row = expression.evaluate
+    names = list(columns)
+    for i, row in enumerate(zip(*(columns[name] for name in names)) if names else [()] * rows):
+        try:
+            result = evaluate_row(dict(zip(names, row)))
+        except ZeroDivisionError:
+            values[i], errors[i] = math.nan, ZERO_DIVISION
+        except NoRealResult:
+            values[i], errors[i] = math.nan, NO_REAL_RESULT
+        except OverflowError:
+            values[i] = math.inf
+        else:
+            values[i] = result
+    return values, errors
+
+
+def read_csv_chunks(f: TextIO, chunk_rows: int = CHUNK_ROWS) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """Yield ({column: values}, number of rows) for every chunk of a CSV file"""
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    names = [name.strip() for name in header]
+    while True:
+        rows = list(islice(reader, chunk_rows))
+        if not rows:
+            return
+        for line, row in enumerate(rows, start=reader.line_num - len(rows) + 1):
+            if len(row) != len(names):
+                raise ValueError(f"Line {line}: expected {len(names)} values, got {len(row)}")
+        cells = list(zip(*rows))
+        if np is not None:
+            columns = {name: np.array(cells[i], dtype=np.float64) for i, name in enumerate(names)}
+        else:
+            columns = {name: array('d', map(float, cells[i])) for i, name in enumerate(names)}
+        yield columns, len(rows)
+
+
+def read_binary_chunks(f, names: List[str], chunk_rows: int = CHUNK_ROWS) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """Yield ({column: values}, number of rows) for every chunk of a float64 file
+
+    The file holds ``len(names)`` little-endian doubles per row. With NumPy
+    every chunk is read into one reused buffer and the columns are strided
+    views into it, so nothing is copied on the way in.
+    """
+    width = len(names)
+    row_size = 8 * width
+    if np is not None:
+        buffer = np.empty(chunk_rows * width, dtype='<f8')
+        view = memoryview(buffer).cast('B')
+    while True:
+        if np is not None:
+            size = f.readinto(view)
+            data = buffer[:size // 8]
+        else:
+            raw = f.read(chunk_rows * row_size)
+            size = len(raw)
+            data = array('d', raw[:size - size % 8])
+            if sys.byteorder != 'little':
+                data.byteswap()
+        if size % row_size:
+            raise ValueError(f"Binary input ends in the middle of a row of {width} values")
+        rows = size // row_size
+        if not rows:
+            return
+        yield {name: data[i::width] for i, name in enumerate(names)}, rows
+        if rows < chunk_rows:
+            return
+
+
+def write_csv_chunk(f: TextIO, values, errors):
+    if np is not None:
+        values, errors = values.tolist(), errors.tolist()
+    f.write(''.join(f"{value!r},\n" if not error else f",{ERROR_LABELS[error]}\n"
+                    for value, error in zip(values, errors)))
+
+
+def write_binary_chunk(f, values, errors):
+    if np is not None:
+        f.write(np.ascontiguousarray(values, dtype='<f8').tobytes())
+        return
+    if sys.byteorder != 'little':
+        values = array('d', values)
+        values.byteswap()
+    f.write(values.tobytes())
+
+
+def run_batch(expression: Expression, source, output, input_format: str = 'csv',
+              output_format: str = 'csv', names: Optional[List[str]] = None,
+              chunk_rows: int = CHUNK_ROWS) -> Tuple[int, int, List[int]]:
+    """Evaluate ``expression`` for every row of ``source`` and stream the results to ``output``
+
+    ``source`` and ``output`` are open files: text for CSV, binary for f8.
+    CSV output has a ``result,error`` header and one line per row; f8
+    output has one double per row, NaN where the row failed. Returns the
+    number of rows, the number of rows that failed and the (1-based)
+    numbers of the first ``MAX_REPORTED_ROWS`` of them.
+    """
+    if input_format == 'csv':
+        chunks = read_csv_chunks(source, chunk_rows)
+    else:
+        if not names:
+            raise ValueError("Binary input needs the column names")
+        chunks = read_binary_chunks(source, names, chunk_rows)
+    if output_format == 'csv':
+        output.write("result,error\n")
+        write_chunk = write_csv_chunk
+    else:
+        write_chunk = write_binary_chunk
+
+    vectorized = compile_vectorized(expression.ast) if np is not None else None
+    total, error_count, failed = 0, 0, []
+    for columns, rows in chunks:
+        missing = expression.variables - set(columns)
+        if missing:
+            raise ValueError(f"No column for variable(s): {', '.join(sorted(missing))}")
+        values, errors = evaluate_columns(expression, columns, rows, vectorized)
+        write_chunk(output, values, errors)
+        if np is not None:
+            chunk_errors = int(np.count_nonzero(errors))
+            if chunk_errors and len(failed) < MAX_REPORTED_ROWS:
+                failed.extend(total + int(i) + 1 for i in np.flatnonzero(errors)[:MAX_REPORTED_ROWS])
+        else:
+            chunk_errors = len(errors) - errors.count(0)
+            if chunk_errors and len(failed) < MAX_REPORTED_ROWS:
+                failed.extend(total + i + 1 for i, error in enumerate(errors) if error)
+        del failed[MAX_REPORTED_ROWS:]
+        error_count += chunk_errors
+        total += rows
+    return total, error_count, failed
@@ -0,0 +1,412 @@
+# calculator_engine.py
+"""Arithmetic expressions compiled once and evaluated many times
+
+    expression = compile_expression('(a+b)*c**2 % 7')
+    expression(a=1, b=2, c=3)      # 6.0
+    expression(a=4, b=0, c=10)     # 1.0
+
+Supports numbers, variable names, parentheses, unary + and - and the
+operators + - * / % ** with Python's precedence (** is right-associative
+and binds tighter than a unary minus on its left).
+
+Numbers are floats by default. ``compile_expression(text, 'decimal', 50)``
+computes with 50-digit ``Decimal`` values and ``'exact'`` with integers
+and ``Fraction``. In every mode ``a ** b % m`` with whole numbers is
+computed as ``pow(a, b, m)``, so huge exponents take milliseconds.
+"""
+import math
+import operator
+import re
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple
+
+OPERATIONS: Dict[str, Callable[[Any, Any], Any]] = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+    '%': operator.mod,
+    '**': operator.pow,
+    'neg': operator.neg,
+}
+MODES = ('float', 'decimal', 'exact')
+DEFAULT_PRECISION = 28
+# Exact powers are refused beyond this many bits (about 315,000 digits)
+MAX_RESULT_BITS = 1 << 20
+# Whole numbers with more digits than this are shown in scientific notation
+MAX_SHOWN_DIGITS = 4000
+# Binding power of every infix operator: higher binds tighter
+BINDING_POWER = {'+': 10, '-': 10, '*': 20, '/': 20, '%': 20, '**': 30}
+UNARY_POWER = 25
+RIGHT_ASSOCIATIVE = {'**'}
+
+TOKEN_RE = re.compile(r'''
+    (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<op>\*\*|[-+*/%()])
+''', re.VERBOSE)
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    position: int
+
+
+# AST nodes are plain tuples: ('number', value), ('name', name),
+# ('unary', op, operand) and ('binary', op, left, right)
+Node = Tuple
+
+
+class NoRealResult(ArithmeticError):
+    """A negative number raised to a fractional power"""
+
+
+class Backend(NamedTuple):
+    """How one numeric mode parses literals, computes and shows results"""
+    name: str
+    number: Callable[[str], Any]
+    operations: Dict[str, Callable]
+    from_int: Callable[[int], Any]
+    format: Callable[[Any], str]
+
+
+def _as_int(value) -> Optional[int]:
+    """``value`` as an int if it is a whole number of any numeric type, else None"""
+    if isinstance(value, int):
+        return value
+    try:
+        if value == int(value):
+            return int(value)
+    except (ValueError, OverflowError, ArithmeticError):
+        pass
+    return None
+
+
+def modular_power(backend: Backend, a, b, m):
+    """``a ** b % m`` by square-and-multiply when all three are whole numbers
+
+    Returns None when the fast path does not apply (fractional operands or
+    a negative exponent); the caller then computes the power first.
+    """
+    a, b, m = _as_int(a), _as_int(b), _as_int(m)
+    if a is None or b is None or m is None or b < 0:
+        return None
+    if m == 0:
+        raise ZeroDivisionError("modulo by zero")
+    return backend.from_int(pow(a, b, m))
+
+
+def _float_backend() -> Backend:
+    def power(a, b):
+        result = a ** b
+        # Python floats raise negative numbers to fractional powers as complex
+        if isinstance(result, complex):
+            raise NoRealResult("No real result: negative number to a fractional power")
+        return result
+
+    return Backend('float', float, dict(OPERATIONS, **{'**': power}), float, str)
+
+
+def _decimal_backend(precision: int) -> Backend:
+    import decimal
+
+    context = decimal.Context(prec=precision)
+
+    def modulo(a, b):
+        # remainder signals InvalidOperation for a zero divisor; report it
+        # like the other modes do
+        if not b:
+            raise ZeroDivisionError("modulo by zero")
+        # Floor modulo like the other modes; Decimal's % keeps the sign of a
+        result = context.remainder(a, b)
+        if result and (result < 0) != (b < 0):
+            result = context.add(result, b)
+        return result
+
+    def power(a, b):
+        # Decimal gives Infinity for 0 ** -1 where the other modes raise
+        if not a and b < 0:
+            raise ZeroDivisionError("0 cannot be raised to a negative power")
+        if a < 0 and b != b.to_integral_value():
+            raise NoRealResult("No real result: negative number to a fractional power")
+        return context.power(a, b)
+
+    def number(text):
+        return context.create_decimal(text)
+
+    operations = {
+        '+': context.add, '-': context.subtract, '*': context.multiply,
+        '/': context.divide, '%': modulo, '**': power, 'neg': context.minus,
+    }
+    return Backend('decimal', number, operations, decimal.Decimal, str)
+
+
+def _scientific(value: int) -> str:
+    """Leading digits and size of a huge integer without converting all of it
+
+    Decimal conversion of a million-digit number takes seconds; the top 64
+    bits and the bit length give the leading digits just as well.
+    """
+    shift = max(abs(value).bit_length() - 64, 0)
+    log10 = math.log10(abs(value) >> shift) + shift * math.log10(2)
+    exponent = math.floor(log10)
+    sign = '-' if value < 0 else ''
+    return f"{sign}{10 ** (log10 - exponent):.7f}e+{exponent} ({exponent + 1} digits)"
+
+
+def _exact_backend() -> Backend:
+    from fractions import Fraction
+
+    def normalize(value):
+        if isinstance(value, Fraction) and value.denominator == 1:
+            return value.numerator
+        return value
+
+    def number(text):
+        if text.isdigit():
+            return int(text)
+        return normalize(Fraction(text))
+
+    def power(a, b):
+        exponent = _as_int(b)
+        if exponent is None:
+            raise ValueError("Exact mode only supports whole-number exponents")
+        if a not in (0, 1, -1):
+            size = max(math.log2(abs(a).numerator), math.log2(abs(a).denominator))
+            if abs(exponent) * size > MAX_RESULT_BITS:
+                digits = int(abs(exponent) * size * math.log10(2))
+                raise ValueError(f"Result would have about {digits} digits; "
+                                 f"for modular powers write a ** b % m")
+        if exponent < 0:
+            return normalize(Fraction(a) ** exponent)
+        return normalize(a ** exponent)
+
+    def divide(a, b):
+        return normalize(Fraction(a) / b)
+
+    def show(value):
+        if isinstance(value, int):
+            if value.bit_length() > MAX_SHOWN_DIGITS * 3.32:
+                return _scientific(value)
+            return str(value)
+        try:
+            return f"{value} (≈ {float(value):.15g})"
+        except OverflowError:
+            return str(value)
+
+    operations = {
+        '+': lambda a, b: normalize(a + b), '-': lambda a, b: normalize(a - b),
+        '*': lambda a, b: normalize(a * b), '/': divide,
+        '%': lambda a, b: normalize(a % b), '**': power, 'neg': operator.neg,
+    }
+    return Backend('exact', number, operations, int, show)
+
+
+@lru_cache(maxsize=16)
+def get_backend(mode: str = 'float', precision: Optional[int] = None) -> Backend:
+    """The backend for a mode; ``precision`` is the number of digits for 'decimal'
+
+    Only the chosen mode's module is imported.
+    """
+    if mode == 'float':
+        return _float_backend()
+    if mode == 'decimal':
+        if precision is None:
+            precision = DEFAULT_PRECISION
+        elif precision < 1:
+            raise ValueError("Precision must be at least 1 digit")
+        return _decimal_backend(precision)
+    if mode == 'exact':
+        return _exact_backend()
+    raise ValueError(f"Mode must be one of {', '.join(MODES)}")
+
+
+def convert(value, backend: Backend):
+    """A result of any mode as a number of ``backend``'s type"""
+    if not hasattr(value, 'as_integer_ratio'):
+        raise ValueError(f"{value!r} is not a real number")
+    numerator, denominator = value.as_integer_ratio()
+    result = backend.from_int(numerator)
+    if denominator != 1:
+        result = backend.operations['/'](result, backend.from_int(denominator))
+    return result
+
+
+def tokenize(text: str) -> Iterator[Token]:
+    """Split an expression into number, name and operator tokens"""
+    position = 0
+    while True:
+        while position < len(text) and text[position].isspace():
+            position += 1
+        if position == len(text):
+            break
+        match = TOKEN_RE.match(text, position)
+        if match is None:
+            raise ValueError(f"Unexpected character {text[position]!r} at position {position + 1}")
+        yield Token(match.lastgroup, match.group(), position)
+        position = match.end()
+    yield Token('end', '', len(text))
+
+
+class Parser:
+    """Pratt parser from tokens to a tuple AST"""
+
+    def __init__(self, text: str):
+        self.tokens = list(tokenize(text))
+        self.index = 0
+
+    def next(self) -> Token:
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def peek(self) -> Token:
+        return self.tokens[self.index]
+
+    def parse(self) -> Node:
+        node = self.expression(0)
+        token = self.peek()
+        if token.kind != 'end':
+            raise ValueError(f"Unexpected {token.text!r} at position {token.position + 1}")
+        return node
+
+    def expression(self, min_power: int) -> Node:
+        left = self.prefix(self.next())
+        while True:
+            token = self.peek()
+            power = BINDING_POWER.get(token.text) if token.kind == 'op' else None
+            if power is None or power <= min_power:
+                return left
+            self.next()
+            right = self.expression(power - 1 if token.text in RIGHT_ASSOCIATIVE else power)
+            left = ('binary', token.text, left, right)
+
+    def prefix(self, token: Token) -> Node:
+        if token.kind == 'number':
+            return ('number', token.text)
+        if token.kind == 'name':
+            return ('name', token.text)
+        if token.text in ('+', '-'):
+            return ('unary', token.text, self.expression(UNARY_POWER))
+        if token.text == '(':
+            node = self.expression(0)
+            closing = self.next()
+            if closing.text != ')':
+                raise ValueError(f"Missing ')' at position {closing.position + 1}")
+            return node
+        if token.kind == 'end':
+            raise ValueError("Unexpected end of expression")
+        raise ValueError(f"Unexpected {token.text!r} at position {token.position + 1}")
+
+
+def parse(text: str) -> Node:
+    return Parser(text).parse()
+
+
+def variables(node: Node) -> FrozenSet[str]:
+    """Names used by an AST"""
+    if node[0] == 'name':
+        return frozenset([node[1]])
+    if node[0] == 'number':
+        return frozenset()
+    return frozenset().union(*(variables(child) for child in node[2:]))
+
+
+def compile_node(node: Node, backend: Backend) -> Callable[[Dict[str, Any]], Any]:
+    """Turn an AST into nested closures that take the variable bindings
+
+    Constant subtrees are folded at compile time, so evaluating only does
+    the work that depends on the variables. ``a ** b % m`` compiles to
+    ``modular_power``.
+    """
+    kind = node[0]
+    if kind == 'number':
+        value = backend.number(node[1])
+        return lambda bindings: value
+    if kind == 'name':
+        name = node[1]
+
+        def lookup(bindings):
+            try:
+                return bindings[name]
+            except KeyError:
+                raise ValueError(f"Variable '{name}' has no value") from None
+        return lookup
+
+    operations = backend.operations
+    if kind == 'unary':
+        operand = compile_node(node[2], backend)
+        if node[1] == '+':
+            return operand
+        negate = operations['neg']
+        function = lambda bindings: negate(operand(bindings))
+    elif node[1] == '%' and node[2][0] == 'binary' and node[2][1] == '**':
+        base, exponent = compile_node(node[2][2], backend), compile_node(node[2][3], backend)
+        modulus = compile_node(node[3], backend)
+        power, modulo = operations['**'], operations['%']
+
+        def function(bindings):
+            a, b, m = base(bindings), exponent(bindings), modulus(bindings)
+            result = modular_power(backend, a, b, m)
+            return modulo(power(a, b), m) if result is None else result
+    else:
+        op = operations[node[1]]
+        left, right = compile_node(node[2], backend), compile_node(node[3], backend)
+        function = lambda bindings: op(left(bindings), right(bindings))
+
+    if not variables(node):
+        value = function({})
+        return lambda bindings: value
+    return function
+
+
+class Expression:
+    """A compiled expression; call it with variable values as keywords
+
+    Variable values must already be numbers of the backend's type; turn
+    text into one with ``expression.backend.number``.
+    """
+
+    def __init__(self, text: str, backend: Optional[Backend] = None):
+        self.text = text
+        self.backend = backend or get_backend()
+        self.ast = parse(text)
+        self.variables = variables(self.ast)
+        self._evaluate = compile_node(self.ast, self.backend)
+
+    def evaluate(self, bindings: Dict[str, Any]) -> Any:
+        return self._evaluate(bindings)
+
+    def __call__(self, **bindings) -> Any:
+        return self._evaluate(bindings)
+
+    def __repr__(self) -> str:
+        return f"Expression({self.text!r})"
+
+
+@lru_cache(maxsize=256)
+def compile_expression(text: str, mode: str = 'float', precision: Optional[int] = None) -> Expression:
+    """Parse and compile ``text``, or return the cached result for it"""
+    return Expression(text, get_backend(mode, precision))
+
+
+def evaluate(text: str, **bindings) -> Any:
+    return compile_expression(text).evaluate(bindings)
+
+
+def describe_error(error: ArithmeticError) -> str:
+    """Readable message for an arithmetic error of any backend"""
+    if isinstance(error, ZeroDivisionError):
+        return "Division by zero is not allowed!"
+    if isinstance(error, OverflowError):
+        return "Result is too large for a float; try the decimal or exact mode"
+    # decimal signals carry a list of condition classes instead of a message
+    names = {'Overflow': "Result is too large", 'InvalidOperation': "Invalid operation"}
+    return names.get(type(error).__name__, str(error) or type(error).__name__)
+
+
+def evaluate_many(text: str, rows: List[Dict[str, Any]]) -> List[Any]:
+    """Evaluate one expression for many sets of variable values"""
+    evaluate_row = compile_expression(text).evaluate
+    return [evaluate_row(row) for row in rows]
@@ -0,0 +1,224 @@
+# calculator_session.py
+"""Interactive calculator session
+
+    calc> rate = 0.07
+    calc> 1000 * (1 + rate) ** 10
+    = 1967.1513572895665
+    calc> ans / 2
+
+Results can be named with ``name = expression``; the last one is always
+``ans``. Lines starting with ':' are commands (:help lists them). Input is
+kept in a history file so it can be recalled in the next session.
+"""
+import os
+import sys
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from calculator_engine import MODES, compile_expression, convert, describe_error, get_backend
+
+HISTORY_FILE = os.path.join(os.path.expanduser('~'), '.calculator_history')
+HISTORY_LINES = 1000
+# The history file is cut back to its last HISTORY_LINES lines beyond this size
+HISTORY_MAX_BYTES = 1 << 20
+MEMO_SIZE = 1024
+PROMPT = "calc> "
+HELP = """Enter an expression, or name its result with  name = expression
+The last result is available as  ans
+:vars              show named results
+:history [N]       show the last N inputs (default 20)
+:mode MODE [DIGITS] switch to float, decimal or exact (DIGITS for decimal)
+:clear             forget memoized results
+:quit              leave (or press Ctrl-D)"""
+
+
+def read_history(path: str, limit: int = HISTORY_LINES) -> List[str]:
+    """Last ``limit`` lines of a history file
+
+    Reads backwards from the end in blocks, so startup time does not grow
+    with the size of the file.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        data = b''
+        position = end
+        while position > 0 and data.count(b'\n') <= limit:
+            step = min(1 << 16, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    if position > 0:
+        # The first line may be cut in half
+        lines = lines[1:]
+    return lines[-limit:]
+
+
+class CalculatorSession:
+    """State of one interactive session: mode, named results, memo and history
+
+    Results are memoized per (expression, mode, values of the variables it
+    uses) in a bounded LRU, so repeating an expensive calculation is free.
+    """
+
+    def __init__(self, mode: str = 'float', precision: Optional[int] = None,
+                 history_path: Optional[str] = HISTORY_FILE, memo_size: int = MEMO_SIZE):
+        self.mode = mode
+        self.precision = precision
+        self.backend = get_backend(mode, precision)
+        self.variables: Dict[str, Any] = {}
+        self.memo: 'OrderedDict[tuple, Any]' = OrderedDict()
+        self.memo_size = memo_size
+        self.history_path = history_path
+        self.history = read_history(history_path) if history_path else []
+        self._history_file = None
+
+    def evaluate(self, text: str) -> Any:
+        expression = compile_expression(text, self.mode, self.precision)
+        missing = expression.variables - set(self.variables)
+        if missing:
+            raise ValueError(f"Unknown name(s): {', '.join(sorted(missing))}")
+        key = (text, self.mode, self.precision,
+               tuple((name, self.variables[name]) for name in sorted(expression.variables)))
+        if key in self.memo:
+            self.memo.move_to_end(key)
+            return self.memo[key]
+        result = expression.evaluate(self.variables)
+        self.memo[key] = result
+        if len(self.memo) > self.memo_size:
+            self.memo.popitem(last=False)
+        return result
+
+    def set_mode(self, mode: str, precision: Optional[int] = None) -> List[str]:
+        """Switch backend and convert the named results; returns names that could not be kept"""
+        backend = get_backend(mode, precision)
+        dropped = []
+        for name, value in list(self.variables.items()):
+            try:
+                self.variables[name] = convert(value, backend)
+            except (ValueError, ArithmeticError):
+                del self.variables[name]
+                dropped.append(name)
+        self.mode, self.precision, self.backend = mode, precision, backend
+        return dropped
+
+    def execute(self, line: str) -> Optional[str]:
+        """Run one input line and return the text to show; raises on errors"""
+        line = line.strip()
+        if not line:
+            return None
+        self.remember(line)
+        if line.startswith(':'):
+            return self.command(line[1:].split())
+
+        name, sep, text = line.partition('=')
+        if sep and name.strip().isidentifier() and not text.startswith('='):
+            name = name.strip()
+        else:
+            name, text = None, line
+        result = self.evaluate(text)
+        self.variables['ans'] = result
+        shown = self.backend.format(result)
+        if name:
+            self.variables[name] = result
+            return f"{name} = {shown}"
+        return f"= {shown}"
+
+    def command(self, words: List[str]) -> str:
+        command, args = (words[0].lower(), words[1:]) if words else ('help', [])
+        if command in ('q', 'quit', 'exit'):
+            raise EOFError
+        if command == 'vars':
+            if not self.variables:
+                return "No named results yet"
+            return '\n'.join(f"{name} = {self.backend.format(value)}" for name, value in sorted(self.variables.items()))
+        if command == 'history':
+            count = int(args[0]) if args else 20
+            entries = self.history[-count:] if count > 0 else []
+            start = len(self.history) - len(entries) + 1
+            return '\n'.join(f"{number:4d}  {entry}" for number, entry in enumerate(entries, start))
+        if command == 'mode':
+            if not args or args[0] not in MODES:
+                return f"Current mode: {self.mode}. Choose one of: {', '.join(MODES)}"
+            dropped = self.set_mode(args[0], int(args[1]) if len(args) > 1 else None)
+            message = f"✅ Mode: {self.mode}"
+            if dropped:
+                message += f"\n⚠️ Could not convert: {', '.join(dropped)}"
+            return message
+        if command == 'clear':
+            self.memo.clear()
+            return "✅ Memoized results cleared"
+        if command == 'help':
+            return HELP
+        raise ValueError(f"Unknown command ':{command}' (:help lists the commands)")
+
+    def remember(self, line: str):
+        """Add a line to the in-memory history and append it to the history file"""
+        if self.history and self.history[-1] == line:
+            return
+        self.history.append(line)
+        del self.history[:-HISTORY_LINES]
+        if not self.history_path:
+            return
+        try:
+            if self._history_file is None:
+                self._trim_history_file()
+                self._history_file = open(self.history_path, 'a', encoding='utf-8')
+            self._history_file.write(line + '\n')
+            self._history_file.flush()
+        except OSError:
+            # History is a convenience; never stop the session over it
+            self.history_path = None
+
+    def _trim_history_file(self):
+        try:
+            if os.path.getsize(self.history_path) <= HISTORY_MAX_BYTES:
+                return
+        except FileNotFoundError:
+            return
+        tmp_path = self.history_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(line + '\n' for line in read_history(self.history_path)))
+        os.replace(tmp_path, self.history_path)
+
+    def close(self):
+        if self._history_file is not None:
+            self._history_file.close()
+            self._history_file = None
+
+    def run(self, read_line: Callable[[str], str] = input):
+        """Read, evaluate and print until :quit or end of input"""
+        print("🧮 Calculator session (:help for commands, :quit to leave)")
+        if read_line is input and sys.stdin.isatty():
+            self._enable_line_editing()
+        try:
+            while True:
+                try:
+                    output = self.execute(read_line(PROMPT))
+                except (EOFError, KeyboardInterrupt):
+                    print()
+                    break
+                except ValueError as e:
+                    output = f"❌ Error: {e}"
+                except ArithmeticError as e:
+                    output = f"❌ Error: {describe_error(e)}"
+                except Exception as e:
+                    # A bug hit by one line must not end the session
+                    output = f"❌ Error: {type(e).__name__}: {e}"
+                if output:
+                    print(output)
+        finally:
+            self.close()
+
+    def _enable_line_editing(self):
+        """Arrow-key editing and recall of earlier sessions, where readline exists"""
+        try:
+            import readline
+        except ImportError:
+            return
+        for line in self.history:
+            readline.add_history(line)
@@ -0,0 +1,177 @@
+# password_analysis.py
+"""Password statistics, strength and entropy in a single pass
+
+Usage as a script scores an audit dump with one password per line:
+    python password_analysis.py passwords.txt --csv scores.csv
+"""
+import argparse
+import csv
+import math
+import string
+import sys
+from collections import Counter
+from typing import Dict, List, NamedTuple, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LOWER, UPPER, DIGIT, SPECIAL, OTHER = '01234'
+CLASS_POOLS = {LOWER: 26, UPPER: 26, DIGIT: 10, SPECIAL: len(string.punctuation)}
+CLASS_COLUMNS = (('lower', LOWER), ('upper', UPPER), ('digits', DIGIT), ('special', SPECIAL))
+STRENGTH_LABELS = ["Weak 🔴"] * 3 + ["Moderate 🟡"] * 2 + ["Strong 🟢"] * 2 + ["Very Strong 💪"]
+PUNCTUATION = frozenset(string.punctuation)
+
+
+def classify(char: str) -> str:
+    if char.isupper():
+        return UPPER
+    if char.islower():
+        return LOWER
+    if char.isdigit():
+        return DIGIT
+    if char in PUNCTUATION:
+        return SPECIAL
+    return OTHER
+
+
+class CharClassTable(dict):
+    """``str.translate`` table from any code point to its class label
+
+    Classifies a character on first sight and remembers it.
+    """
+
+    def __missing__(self, code: int) -> str:
+        label = self[code] = classify(chr(code))
+        return label
+
+
+# Precomputed labels for the 256 Latin-1 code points; characters past the
+# end of the table are left alone by str.translate
+CLASS_TABLE = ''.join(classify(chr(code)) for code in range(256))
+WIDE_CLASS_TABLE = CharClassTable()
+
+
+def class_labels(text: str) -> str:
+    """Replace every character of ``text`` by its class label"""
+    labels = text.translate(CLASS_TABLE)
+    if not labels.isascii():
+        labels = text.translate(WIDE_CLASS_TABLE)
+    return labels
+
+
+class PasswordAnalysis(NamedTuple):
+    length: int
+    lower: int
+    upper: int
+    digits: int
+    special: int
+    pool_size: int
+    entropy: float
+    score: int
+    strength: str
+
+
+def score_password(length: int, lower: int, upper: int, digits: int, special: int) -> int:
+    """Strength score from 0 to 7: four length steps plus character variety"""
+    return ((length >= 8) + (length >= 12) + (length >= 16) + (length >= 20)
+            + (upper > 0 and lower > 0) + (digits > 0) + (special > 0))
+
+
+def analyze(password: str) -> PasswordAnalysis:
+    """Classify every character through the lookup table, then count the labels"""
+    labels = class_labels(password)
+    length = len(password)
+    lower, upper, digits, special = (labels.count(LOWER), labels.count(UPPER),
+                                     labels.count(DIGIT), labels.count(SPECIAL))
+    pool_size = ((26 if lower else 0) + (26 if upper else 0) + (10 if digits else 0)
+                 + (CLASS_POOLS[SPECIAL] if special else 0))
+    entropy = length * math.log2(pool_size) if pool_size else 0
+    score = score_password(length, lower, upper, digits, special)
+    return PasswordAnalysis(length, lower, upper, digits, special,
+                            pool_size, entropy, score, STRENGTH_LABELS[score])
+
+
+def analyze_many(passwords: Sequence[str]) -> Dict[str, Sequence]:
+    """Score many passwords at once
+
+    Returns columns named like the ``PasswordAnalysis`` fields (without
+    ``strength``; index ``STRENGTH_LABELS`` with the score). With NumPy the
+    whole batch is classified by one translate of the joined text and the
+    per-password counts come from cumulative sums at the password
+    boundaries; without it every password goes through ``analyze``.
+    """
+    if np is None:
+        rows = [analyze(password) for password in passwords]
+        return {field: [row[i] for row in rows] for i, field in enumerate(PasswordAnalysis._fields[:-1])}
+
+    labels = class_labels(''.join(passwords)).encode('ascii')
+    codes = np.frombuffer(labels, dtype=np.uint8) - ord(LOWER)
+    lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=len(passwords))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+
+    columns = {'length': lengths}
+    for name, label in CLASS_COLUMNS:
+        totals = np.concatenate(([0], np.cumsum(codes == int(label))))
+        columns[name] = totals[ends] - totals[starts]
+
+    pool_size = np.zeros(len(passwords), dtype=np.int64)
+    for name, label in CLASS_COLUMNS:
+        pool_size += np.where(columns[name] > 0, CLASS_POOLS[label], 0)
+    columns['pool_size'] = pool_size
+    with np.errstate(divide='ignore'):
+        columns['entropy'] = np.where(pool_size > 0, lengths * np.log2(np.maximum(pool_size, 1)), 0.0)
+    columns['score'] = ((lengths >= 8).astype(np.int64) + (lengths >= 12) + (lengths >= 16) + (lengths >= 20)
+                        + ((columns['upper'] > 0) & (columns['lower'] > 0))
+                        + (columns['digits'] > 0) + (columns['special'] > 0))
+    return columns
+
+
+def summarize(columns: Dict[str, Sequence]) -> Dict[str, int]:
+    """Number of passwords per strength label"""
+    summary = Counter()
+    for score, count in Counter(int(score) for score in columns['score']).items():
+        summary[STRENGTH_LABELS[score]] += count
+    return summary
+
+
+def read_passwords(f) -> List[str]:
+    return f.read().splitlines()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score a file of passwords, one per line")
+    parser.add_argument('file', help="password file ('-' for stdin)")
+    parser.add_argument('--csv', metavar='FILE', help="also write per-password scores to FILE")
+    args = parser.parse_args(argv)
+
+    if args.file == '-':
+        passwords = read_passwords(sys.stdin)
+    else:
+        with open(args.file, encoding='utf-8', errors='replace') as f:
+            passwords = read_passwords(f)
+    columns = analyze_many(passwords)
+
+    if args.csv:
+        fields = list(columns)
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['password'] + fields + ['strength'])
+            for i, password in enumerate(passwords):
+                row = [columns[field][i] for field in fields]
+                writer.writerow([password] + [round(float(v), 2) if field == 'entropy' else int(v)
+                                              for field, v in zip(fields, row)]
+                                + [STRENGTH_LABELS[int(columns['score'][i])]])
+
+    print(f"Passwords: {len(passwords)}")
+    for label, count in sorted(summarize(columns).items(), key=lambda item: STRENGTH_LABELS.index(item[0])):
+        print(f"  {label}: {count}")
+    if passwords:
+        print(f"Average entropy: {sum(columns['entropy']) / len(passwords):.1f} bits")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
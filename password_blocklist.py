@@ -0,0 +1,164 @@
+# password_blocklist.py
+"""Reject known-weak passwords with a memory-mapped Bloom filter
+
+Build the filter once from a plain wordlist (one password per line):
+    python password_blocklist.py build rockyou.txt blocklist.bloom
+then pass it to the generator:
+    python pg.py --count 1000 --blocklist blocklist.bloom
+"""
+import argparse
+import math
+import mmap
+import os
+import struct
+import sys
+from hashlib import blake2b
+from typing import Iterable, Iterator
+
+MAGIC = b'PWBLOOM1'
+# magic, number of bits, number of entries, number of hash functions, padding
+HEADER = struct.Struct('<8sQQI4x')
+
+
+def hash_pair(data: bytes):
+    """Two 64-bit hashes for double hashing; the second one is made odd so
+    the probe sequence never collapses onto a single bit"""
+    digest = blake2b(data, digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+def filter_size(count: int, false_positive_rate: float):
+    """Number of bits and hash functions for ``count`` entries at the given rate"""
+    count = max(count, 1)
+    num_bits = max(8, math.ceil(-count * math.log(false_positive_rate) / math.log(2) ** 2))
+    num_hashes = max(1, round(num_bits / count * math.log(2)))
+    return num_bits, num_hashes
+
+
+class Blocklist:
+    """Read-only Bloom filter opened with ``mmap``
+
+    Opening costs nothing but the header read: the bit array is paged in by
+    the OS on demand and shared between processes. A lookup hashes the
+    password once with BLAKE2b and probes ``num_hashes`` bits, so it takes
+    a few microseconds. A hit may be a false positive (at the rate the
+    filter was built for) but a miss is certain. Pickles by path, so it can
+    be handed to process pool workers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise ValueError(f"{path} is not a password blocklist")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.num_bits, self.count, self.num_hashes = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f"{path} is not a password blocklist")
+        # A zero-sized filter would divide by zero and zero hashes would
+        # block everything; the bit array must fill the rest of the file
+        if (self.num_bits == 0 or self.num_hashes == 0
+                or len(self._mmap) != HEADER.size + (self.num_bits + 7) // 8):
+            self._mmap.close()
+            raise ValueError(f"{path} is a damaged password blocklist")
+
+    def __contains__(self, password: str) -> bool:
+        h1, h2 = hash_pair(password.encode('utf-8'))
+        bits, offset, data = self.num_bits, HEADER.size, self._mmap
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % bits
+            if not data[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __reduce__(self):
+        return Blocklist, (self.path,)
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_words(path: str) -> Iterator[bytes]:
+    """Yield the raw bytes of every non-empty line, without decoding"""
+    with open(path, 'rb') as f:
+        for line in f:
+            word = line.rstrip(b'\r\n')
+            if word:
+                yield word
+
+
+def build_blocklist(words: Iterable[bytes], count: int, path: str,
+                    false_positive_rate: float = 0.001) -> int:
+    """Write a Bloom filter sized for ``count`` entries; returns the entries added
+
+    The output file is created at full size and filled through ``mmap``, so
+    filters larger than memory can be built.
+    """
+    num_bits, num_hashes = filter_size(count, false_positive_rate)
+    tmp_path = path + '.tmp'
+    added = 0
+    with open(tmp_path, 'w+b') as f:
+        f.truncate(HEADER.size + (num_bits + 7) // 8)
+        with mmap.mmap(f.fileno(), 0) as data:
+            offset = HEADER.size
+            for word in words:
+                h1, h2 = hash_pair(word)
+                for i in range(num_hashes):
+                    position = (h1 + i * h2) % num_bits
+                    data[offset + (position >> 3)] |= 1 << (position & 7)
+                added += 1
+            HEADER.pack_into(data, 0, MAGIC, num_bits, added, num_hashes)
+            data.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return added
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build or query a password blocklist")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="convert a wordlist into a blocklist file")
+    build.add_argument('wordlist', help="text file with one password per line")
+    build.add_argument('output', help="blocklist file to write")
+    build.add_argument('--fp-rate', type=float, default=0.001,
+                       help="false positive rate (default: 0.001)")
+    build.add_argument('--expected', type=int,
+                       help="number of entries, to skip the counting pass")
+
+    check = commands.add_parser('check', help="look passwords up in a blocklist")
+    check.add_argument('blocklist')
+    check.add_argument('passwords', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if not 0 < args.fp_rate < 1:
+            parser.error("--fp-rate must be between 0 and 1")
+        count = args.expected or sum(1 for _ in read_words(args.wordlist))
+        added = build_blocklist(read_words(args.wordlist), count, args.output, args.fp_rate)
+        print(f"✅ Added {added} passwords to {args.output}")
+        return 0
+
+    try:
+        blocklist = Blocklist(args.blocklist)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    with blocklist:
+        found = 0
+        for password in args.passwords:
+            listed = password in blocklist
+            found += listed
+            print(f"{'❌ listed' if listed else '✅ not listed'}: {password}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
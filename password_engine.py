@@ -0,0 +1,288 @@
+# password_engine.py
+import math
+import multiprocessing
+import os
+import secrets
+import string
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import filterfalse, islice, repeat
+from typing import Callable, Dict, Iterable, Iterator, Optional, TextIO
+
+SIMILAR_CHARS = 'Il1O0'
+CLASS_NAMES = ('lowercase', 'uppercase', 'digits', 'special')
+# Below this share of random candidates meeting the minimums, passwords are
+# built from their required characters instead of drawn and filtered
+MIN_ACCEPTANCE = 0.01
+EXACT_ACCEPTANCE_LENGTH = 1024
+
+
+class PasswordPolicy:
+    """Character-set rules compiled once for one combination of options
+
+    Holds the per-class alphabets with similar characters already removed,
+    the combined alphabet with its entropy per symbol, and the byte
+    translation table the engine maps random bytes through, so generating
+    passwords involves no string building. Build policies with
+    ``compile_policy``, which caches them.
+    """
+
+    def __init__(self, classes: Dict[str, str], min_counts: Dict[str, int]):
+        if not all(classes.values()):
+            raise ValueError("Every selected character type needs at least one character")
+        self.classes = classes
+        self.min_counts = min_counts
+        self.alphabet = ''.join(classes.values())
+        if len(set(self.alphabet)) != len(self.alphabet) or not self.alphabet.isascii():
+            raise ValueError("Character types must be distinct ASCII characters")
+        self.bits_per_symbol = math.log2(len(self.alphabet))
+        self.min_length = sum(min_counts.values())
+
+        size = len(self.alphabet)
+        limit = 256 - 256 % size
+        self.table = bytes(ord(self.alphabet[b % size]) if b < limit else 0 for b in range(256))
+        self.rejected = bytes(range(limit, 256))
+
+        # Every character maps to the digit of its class, so one translate
+        # and a few counts check all minimums at once
+        self._class_sets = [frozenset(chars) for chars in classes.values()]
+        self._labels = str.maketrans({c: str(i) for i, chars in enumerate(classes.values()) for c in chars})
+        self._minimums = [(str(i), min_counts[name]) for i, name in enumerate(classes) if min_counts[name]]
+        self._one_each = all(min_counts[name] == 1 for name in classes)
+        self._acceptance: Dict[int, float] = {}
+
+    def accepts(self, password: str) -> bool:
+        """True if ``password`` has the minimum number of every character type"""
+        if self._one_each:
+            return all(not chars.isdisjoint(password) for chars in self._class_sets)
+        labels = password.translate(self._labels)
+        return all(labels.count(label) >= count for label, count in self._minimums)
+
+    def acceptance(self, length: int) -> float:
+        """Share of random ``length`` character candidates that ``accepts``
+
+        Exact up to ``EXACT_ACCEPTANCE_LENGTH``: the classes are dealt
+        their counts one after another as binomials of what is left.
+        Beyond that it is a lower bound, the chance of no class falling
+        short of its minimum by the union bound.
+        """
+        if length not in self._acceptance:
+            if length <= EXACT_ACCEPTANCE_LENGTH:
+                self._acceptance[length] = self._exact_acceptance(length)
+            else:
+                size = len(self.alphabet)
+                missed = sum(_binomial(length, k, len(chars) / size)
+                             for name, chars in self.classes.items() if len(chars) < size
+                             for k in range(min(self.min_counts[name], length + 1)))
+                self._acceptance[length] = max(0.0, 1.0 - missed)
+        return self._acceptance[length]
+
+    def _exact_acceptance(self, length: int) -> float:
+        # characters not dealt yet -> probability
+        left = {length: 1.0}
+        size = len(self.alphabet)
+        *first, last = self.classes.items()
+        for name, chars in first:
+            p = len(chars) / size
+            size -= len(chars)
+            dealt: Dict[int, float] = {}
+            for n, chance in left.items():
+                # Counts more than 8 deviations from the mean are negligible
+                spread = 8 * math.sqrt(n * p * (1 - p)) + 1
+                for k in range(max(self.min_counts[name], int(n * p - spread)), min(n, int(n * p + spread)) + 1):
+                    dealt[n - k] = dealt.get(n - k, 0.0) + chance * _binomial(n, k, p)
+            left = dealt
+        return min(1.0, sum((chance for n, chance in left.items() if n >= self.min_counts[last[0]]), 0.0))
+
+    def entropy(self, length: int) -> float:
+        """Bits of entropy of a ``length`` character password, ignoring the minimums"""
+        return length * self.bits_per_symbol
+
+
+def _binomial(n: int, k: int, p: float) -> float:
+    """Chance of exactly ``k`` successes in ``n`` trials of chance ``p``"""
+    if p >= 1:
+        return float(k == n)
+    return math.exp(math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+                    + k * math.log(p) + (n - k) * math.log1p(-p))
+
+
+@lru_cache(maxsize=64)
+def compile_policy(use_uppercase: bool = True, use_digits: bool = True,
+                   use_special: bool = True, exclude_similar: bool = True,
+                   symbols: Optional[str] = None, min_lower: int = 1, min_upper: int = 1,
+                   min_digits: int = 1, min_special: int = 1) -> PasswordPolicy:
+    """Return the policy for these options; lowercase is always on
+
+    ``symbols`` replaces the default special characters with a subset of
+    ASCII punctuation. The ``min_*`` counts only apply to selected types.
+    """
+    if symbols is None:
+        symbols = string.punctuation
+    elif not set(symbols) <= set(string.punctuation):
+        raise ValueError("Custom symbols must be ASCII punctuation")
+    candidates = [('lowercase', string.ascii_lowercase, True, min_lower),
+                  ('uppercase', string.ascii_uppercase, use_uppercase, min_upper),
+                  ('digits', string.digits, use_digits, min_digits),
+                  ('special', ''.join(dict.fromkeys(symbols)), use_special, min_special)]
+    classes, min_counts = {}, {}
+    for name, chars, selected, minimum in candidates:
+        if not selected:
+            continue
+        if minimum < 0:
+            raise ValueError(f"Minimum count for {name} cannot be negative")
+        if exclude_similar:
+            chars = ''.join(c for c in chars if c not in SIMILAR_CHARS)
+        classes[name] = chars
+        min_counts[name] = minimum
+    return PasswordPolicy(classes, min_counts)
+
+
+class PasswordEngine:
+    """Generate passwords from large blocks of OS randomness
+
+    Each block from ``os.urandom`` is mapped to the alphabet in one C call
+    with ``bytes.translate``: byte values at or above the largest multiple of
+    the alphabet size are deleted and the rest are taken modulo the size, so
+    every character is equally likely. Candidates that miss a minimum of the
+    policy, or that are found in the optional ``blocklist`` (anything
+    supporting ``in``, such as ``password_blocklist.Blocklist``), are thrown
+    away whole, which keeps the result uniform over all valid passwords.
+
+    When the minimums are so high that hardly any candidate meets them
+    (see ``MIN_ACCEPTANCE``), each password is instead built from its
+    required characters plus random fill and shuffled with ``secrets``.
+    That always finishes, at the cost of a slight bias towards passwords
+    with more characters of the required types.
+    """
+
+    def __init__(self, policy: PasswordPolicy, block_size: int = 1 << 16, blocklist=None):
+        self.policy = policy
+        self.block_size = block_size
+        self.blocklist = blocklist
+
+    def random_chars(self) -> Iterator[str]:
+        """Yield blocks of uniformly distributed alphabet characters"""
+        table, rejected = self.policy.table, self.policy.rejected
+        while True:
+            yield os.urandom(self.block_size).translate(table, rejected).decode('ascii')
+
+    def generate_many(self, count: Optional[int], length: int) -> Iterator[str]:
+        """Yield ``count`` passwords (endlessly with None) of ``length`` characters"""
+        if length < max(self.policy.min_length, 1):
+            raise ValueError(f"Length must be at least {self.policy.min_length} "
+                             f"to fit the required characters")
+        if self.policy.acceptance(length) >= MIN_ACCEPTANCE:
+            passwords = filter(self.policy.accepts, self._candidates(length))
+        else:
+            passwords = self._constructed(length)
+        if self.blocklist is not None:
+            passwords = filterfalse(self.blocklist.__contains__, passwords)
+        return passwords if count is None else islice(passwords, count)
+
+    def _candidates(self, length: int) -> Iterator[str]:
+        carry = ''
+        for block in self.random_chars():
+            block = carry + block
+            end = len(block) - len(block) % length
+            for start in range(0, end, length):
+                yield block[start:start + length]
+            carry = block[end:]
+
+    def _constructed(self, length: int) -> Iterator[str]:
+        rng = secrets.SystemRandom()
+        required = [(chars, self.policy.min_counts[name]) for name, chars in self.policy.classes.items()]
+        extra = length - self.policy.min_length
+        for fill in (self._candidates(extra) if extra else repeat('')):
+            chars = [rng.choice(chars) for chars, count in required for _ in range(count)]
+            chars.extend(fill)
+            rng.shuffle(chars)
+            yield ''.join(chars)
+
+    def generate(self, length: int) -> str:
+        return next(self.generate_many(1, length))
+
+
+def write_passwords(passwords: Iterable[str], f: TextIO, chunk_size: int = 10000) -> int:
+    """Write one password per line in chunks; returns the number written"""
+    passwords = iter(passwords)
+    written = 0
+    while True:
+        chunk = list(islice(passwords, chunk_size))
+        if not chunk:
+            return written
+        f.write('\n'.join(chunk) + '\n')
+        written += len(chunk)
+
+
+def _generate_shard(policy: PasswordPolicy, count: int, length: int, path: Optional[str], blocklist):
+    """Process pool task: return a block of passwords, or write it to ``path``"""
+    passwords = PasswordEngine(policy, blocklist=blocklist).generate_many(count, length)
+    if path is None:
+        return '\n'.join(passwords) + '\n'
+    with open(path, 'w') as f:
+        return write_passwords(passwords, f)
+
+
+def shard_path(prefix: str, index: int) -> str:
+    return f"{prefix}-{index:05d}.txt"
+
+
+def generate_parallel(policy: PasswordPolicy, count: int, length: int,
+                      f: Optional[TextIO] = None, shard_prefix: Optional[str] = None,
+                      workers: Optional[int] = None, shard_size: int = 100000,
+                      progress: Optional[Callable[[int, int], None]] = None,
+                      cancel: Optional[threading.Event] = None, blocklist=None) -> int:
+    """Generate ``count`` passwords on a process pool
+
+    The request is cut into shards of ``shard_size`` passwords. Every
+    worker draws from ``os.urandom`` itself, so no generator state is
+    shared or copied between processes. Shards are written to ``f`` in
+    order, or each worker writes its shard to its own file named by
+    ``shard_path(shard_prefix, i)``. Only a few shards per worker are in
+    flight at once, which bounds memory however large ``count`` is.
+
+    A ``blocklist`` is pickled to every worker; a ``Blocklist`` pickles by
+    path, so each worker maps the same file.
+
+    ``progress(done, count)`` is called on the calling thread after every
+    shard. Setting ``cancel`` stops handing out shards; ones already running
+    are still finished. Returns the number of passwords in the shards
+    collected in order.
+    """
+    if (f is None) == (shard_prefix is None):
+        raise ValueError("Give exactly one of an output file or a shard prefix")
+    # Fail fast here rather than in every worker
+    PasswordEngine(policy).generate_many(0, length)
+
+    sizes = [min(shard_size, count - start) for start in range(0, count, shard_size)]
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    # spawn keeps workers independent of threads running in the parent (such
+    # as the Tk event loop), which fork would copy in an unknown state
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        running = deque()
+        shards = iter(enumerate(sizes))
+
+        def submit(limit: int):
+            for index, size in islice(shards, limit):
+                path = None if shard_prefix is None else shard_path(shard_prefix, index)
+                running.append((size, pool.submit(_generate_shard, policy, size, length, path, blocklist)))
+
+        submit(workers * 2)
+        while running:
+            size, future = running.popleft()
+            result = future.result()
+            if f is not None:
+                f.write(result)
+            done += size
+            if progress is not None:
+                progress(done, count)
+            if cancel is not None and cancel.is_set():
+                for _, future in running:
+                    future.cancel()
+                break
+            submit(1)
+    return done
@@ -0,0 +1,244 @@
+# password_passphrase.py
+"""Diceware-style passphrases drawn from a compact wordlist index
+
+Compile a wordlist (one word per line; EFF dice lists with their leading
+numbers work too) once:
+    python password_passphrase.py build eff_large_wordlist.txt words.idx
+then generate passphrases with the generator:
+    python pg.py --wordlist words.idx --words 6 --count 10
+"""
+import argparse
+import math
+import mmap
+import os
+import secrets
+import struct
+import sys
+from array import array
+from itertools import filterfalse, islice
+from typing import Iterable, Iterator, List, Optional
+
+MAGIC = b'PWWORDS1'
+# magic, number of words; followed by count + 1 little-endian uint64 offsets
+# into the UTF-8 word buffer that comes last
+HEADER = struct.Struct('<8sQ')
+CAPITALIZE_MODES = ('none', 'title', 'random')
+
+
+def read_wordlist(path: str) -> Iterator[str]:
+    """Yield the words of a text wordlist, skipping dice numbers and blank lines"""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 2 and fields[0].isdigit():
+                fields = fields[1:]
+            if len(fields) == 1:
+                yield fields[0]
+
+
+class Wordlist:
+    """Words in one contiguous UTF-8 buffer, addressed through an offset array
+
+    Word ``k`` is ``data[offsets[k]:offsets[k + 1]]``. A compiled index file
+    (see ``build_wordlist``) is opened with ``mmap``, so opening costs one
+    header read however many words it holds, and the pages are shared
+    between processes. Text wordlists are packed into the same layout in
+    memory. Pickles by path.
+    """
+
+    def __init__(self, data, offsets, path: Optional[str] = None, mapped=None):
+        self._data = data
+        self._offsets = offsets
+        self._mmap = mapped
+        self.path = path
+
+    @classmethod
+    def from_words(cls, words: Iterable[str], path: Optional[str] = None) -> 'Wordlist':
+        """Pack words into a buffer, dropping duplicates so every pick is distinct"""
+        words = list(dict.fromkeys(words))
+        data = ''.join(words).encode('utf-8')
+        offsets = array('Q', [0])
+        for word in words:
+            offsets.append(offsets[-1] + len(word.encode('utf-8')))
+        return cls(data, offsets, path)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, k: int) -> str:
+        return str(self._data[self._offsets[k]:self._offsets[k + 1]], 'utf-8')
+
+    def __reduce__(self):
+        if self.path is None:
+            return Wordlist.from_words, (list(self),)
+        return open_wordlist, (self.path,)
+
+    def close(self):
+        if self._mmap is not None:
+            # The views have to go before the map can be closed
+            self._data.release()
+            if isinstance(self._offsets, memoryview):
+                self._offsets.release()
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_wordlist(path: str) -> Wordlist:
+    """Open a compiled index with ``mmap``, or read a text wordlist into memory"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return Wordlist.from_words(read_wordlist(path), path)
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # Checked before any view into the map exists, since those keep it from closing
+    valid = len(mapped) >= HEADER.size
+    if valid:
+        _, count = HEADER.unpack_from(mapped)
+        words_start = HEADER.size + 8 * (count + 1)
+        valid = (count >= 1 and len(mapped) >= words_start
+                 and struct.unpack_from('<Q', mapped, words_start - 8)[0] == len(mapped) - words_start)
+    if not valid:
+        mapped.close()
+        raise ValueError(f"{path} is not a valid wordlist index")
+    view = memoryview(mapped)
+    offsets = view[HEADER.size:words_start].cast('Q')
+    if sys.byteorder != 'little':
+        offsets = array('Q', offsets)
+        offsets.byteswap()
+    return Wordlist(view[words_start:], offsets, path, mapped)
+
+
+def build_wordlist(words: Iterable[str], path: str) -> int:
+    """Write a compiled wordlist index; returns the number of distinct words"""
+    wordlist = Wordlist.from_words(words)
+    offsets = array('Q', wordlist._offsets)
+    if sys.byteorder != 'little':
+        offsets.byteswap()
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(wordlist)))
+        f.write(offsets.tobytes())
+        f.write(wordlist._data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(wordlist)
+
+
+class PassphraseGenerator:
+    """Passphrases of ``words`` uniformly chosen words
+
+    Word indexes come from blocks of ``os.urandom`` read as 32-bit numbers;
+    numbers at or above the largest multiple of the wordlist size are
+    thrown away, so every word is equally likely. ``capitalize`` is 'none',
+    'title' (every word capitalized) or 'random' (each word capitalized
+    with probability one half). ``digits`` random digits are inserted as an
+    extra group at a random position between the words.
+    """
+
+    def __init__(self, wordlist: Wordlist, words: int = 6, separator: str = '-',
+                 capitalize: str = 'none', digits: int = 0, block_size: int = 4096, blocklist=None):
+        if len(wordlist) < 2:
+            raise ValueError("The wordlist needs at least two distinct words")
+        if words < 1:
+            raise ValueError("A passphrase needs at least one word")
+        if capitalize not in CAPITALIZE_MODES:
+            raise ValueError(f"Capitalization must be one of {', '.join(CAPITALIZE_MODES)}")
+        if digits < 0:
+            raise ValueError("Number of digits cannot be negative")
+        self.wordlist = wordlist
+        self.words = words
+        self.separator = separator
+        self.capitalize = capitalize
+        self.digits = digits
+        self.block_size = block_size
+        self.blocklist = blocklist
+
+    @property
+    def entropy(self) -> float:
+        """Bits of entropy of one passphrase
+
+        Exact for a list of distinct lowercase, digit-free words joined by a
+        non-empty separator; otherwise some passphrases can come out the
+        same in more than one way and this is an upper bound.
+        """
+        bits = self.words * math.log2(len(self.wordlist))
+        if self.capitalize == 'random':
+            bits += self.words
+        if self.digits:
+            bits += self.digits * math.log2(10) + math.log2(self.words + 1)
+        return bits
+
+    def random_words(self) -> Iterator[List[str]]:
+        """Yield blocks of uniformly chosen words"""
+        wordlist = self.wordlist
+        size = len(wordlist)
+        limit = (1 << 32) - (1 << 32) % size
+        while True:
+            # 'I' is 32 bits on every platform CPython supports
+            values = array('I')
+            values.frombytes(os.urandom(4 * self.block_size))
+            yield [wordlist[v % size] for v in values if v < limit]
+
+    def generate_many(self, count: Optional[int]) -> Iterator[str]:
+        """Yield ``count`` passphrases (endlessly with None)"""
+        passphrases = self._passphrases()
+        if self.blocklist is not None:
+            passphrases = filterfalse(self.blocklist.__contains__, passphrases)
+        return passphrases if count is None else islice(passphrases, count)
+
+    def _passphrases(self) -> Iterator[str]:
+        n, join = self.words, self.separator.join
+        carry: List[str] = []
+        for block in self.random_words():
+            block = carry + block
+            end = len(block) - len(block) % n
+            for start in range(0, end, n):
+                chosen = block[start:start + n]
+                if self.capitalize == 'title':
+                    chosen = [word.capitalize() for word in chosen]
+                elif self.capitalize == 'random':
+                    bits = secrets.randbits(n)
+                    chosen = [word.capitalize() if bits >> i & 1 else word for i, word in enumerate(chosen)]
+                if self.digits:
+                    chosen.insert(secrets.randbelow(n + 1),
+                                  str(secrets.randbelow(10 ** self.digits)).zfill(self.digits))
+                yield join(chosen)
+            carry = block[end:]
+
+    def generate(self) -> str:
+        return next(self.generate_many(1))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compile or inspect a passphrase wordlist")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help="convert a text wordlist into an index file")
+    build.add_argument('wordlist', help="text file with one word per line")
+    build.add_argument('output', help="index file to write")
+
+    info = commands.add_parser('info', help="show the size and entropy of a wordlist")
+    info.add_argument('wordlist')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'build':
+            count = build_wordlist(read_wordlist(args.wordlist), args.output)
+            print(f"✅ Wrote {count} words to {args.output}")
+            return 0
+        with open_wordlist(args.wordlist) as wordlist:
+            print(f"Words: {len(wordlist)}")
+            print(f"Entropy per word: {math.log2(len(wordlist)):.2f} bits")
+    except (OSError, ValueError, UnicodeDecodeError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+# password_service.py
+"""Headless password service on a Unix socket or a localhost TCP port
+
+Clients send one JSON request per line, for example
+    {"count": 5, "length": 16, "special": false}
+and get back a JSON header line, {"count": 5} or {"error": "..."}, followed
+by that many passwords, one per line. A connection can send any number of
+requests. Start it with
+    python password_service.py --socket /tmp/passwords.sock
+    python password_service.py --port 8765
+"""
+import argparse
+import asyncio
+import json
+import socket
+import sys
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+
+from password_blocklist import Blocklist
+from password_engine import PasswordEngine, PasswordPolicy, compile_policy
+
+POLICY_OPTIONS = {
+    'upper': 'use_uppercase', 'digits': 'use_digits', 'special': 'use_special',
+    'exclude_similar': 'exclude_similar', 'symbols': 'symbols', 'min_lower': 'min_lower',
+    'min_upper': 'min_upper', 'min_digits': 'min_digits', 'min_special': 'min_special',
+}
+# JSON type every request option must have; true/false are not numbers here
+OPTION_TYPES = {
+    'count': int, 'length': int, 'upper': bool, 'digits': bool, 'special': bool,
+    'exclude_similar': bool, 'symbols': str, 'min_lower': int, 'min_upper': int,
+    'min_digits': int, 'min_special': int,
+}
+TYPE_NAMES = {bool: 'true or false', int: 'a whole number', str: 'a string'}
+DEFAULT_LENGTH = 12
+MAX_LENGTH = 1024
+CHUNK_SIZE = 10000
+# Longest generating one chunk of a request may take before the request fails
+GENERATION_TIMEOUT = 5.0
+
+
+class PasswordPool:
+    """Passwords pre-generated for one policy and length
+
+    ``take`` answers from the pool without leaving the event loop when it
+    holds enough passwords, and otherwise generates the shortfall on the
+    default executor. Whenever the pool drops below half of ``size`` a
+    refill is started on the executor. Every password is handed out once.
+
+    Generation stops at a deadline, so a policy or blocklist that makes
+    passwords very slow to find cannot hold an executor thread for good.
+    """
+
+    def __init__(self, policy: PasswordPolicy, length: int, size: int = 1000, blocklist=None):
+        self.engine = PasswordEngine(policy, block_size=4096)
+        self.blocklist = blocklist
+        self.length = length
+        self.size = size
+        self._passwords: deque = deque()
+        self._refill: Optional[asyncio.Future] = None
+
+    def _generate(self, count: int, deadline: float) -> List[str]:
+        """Up to ``count`` passwords, fewer if ``deadline`` (``time.monotonic``) passes"""
+        passwords = self.engine.generate_many(None, self.length)
+        generated: List[str] = []
+        while len(generated) < count and time.monotonic() < deadline:
+            if self.blocklist is None:
+                generated.extend(islice(passwords, min(1000, count - len(generated))))
+                continue
+            # Checked per password, since a blocklist can reject nearly everything
+            password = next(passwords)
+            if password not in self.blocklist:
+                generated.append(password)
+        return generated
+
+    async def take(self, count: int, timeout: float = GENERATION_TIMEOUT) -> List[str]:
+        """Hand out ``count`` passwords; raises TimeoutError if generating them takes over ``timeout``"""
+        deadline = time.monotonic() + timeout
+        passwords: List[str] = []
+        while len(passwords) < count:
+            missing = count - len(passwords) - len(self._passwords)
+            if missing > 0:
+                if time.monotonic() >= deadline:
+                    # Nobody has seen these yet, so they can go back
+                    self._passwords.extendleft(reversed(passwords))
+                    raise TimeoutError(f"Generating {count} passwords took longer than {timeout:g} seconds")
+                loop = asyncio.get_running_loop()
+                generated = await loop.run_in_executor(None, self._generate, missing, deadline)
+                # Other clients may have emptied the pool while we waited
+                self._passwords.extend(generated)
+            while self._passwords and len(passwords) < count:
+                passwords.append(self._passwords.popleft())
+        self._schedule_refill()
+        return passwords
+
+    def _schedule_refill(self):
+        if self._refill is not None or len(self._passwords) >= self.size // 2:
+            return
+        loop = asyncio.get_running_loop()
+        self._refill = loop.run_in_executor(None, self._generate, self.size - len(self._passwords),
+                                            time.monotonic() + GENERATION_TIMEOUT)
+        self._refill.add_done_callback(self._refilled)
+
+    def _refilled(self, future: asyncio.Future):
+        self._refill = None
+        if not future.cancelled() and future.exception() is None:
+            self._passwords.extend(future.result())
+
+
+class PasswordService:
+    """Serve passwords from one pool per (policy, length), for many clients at once"""
+
+    def __init__(self, pool_size: int = 1000, max_count: int = 10000000, max_pools: int = 64,
+                 blocklist=None):
+        self.pool_size = pool_size
+        self.blocklist = blocklist
+        self.max_count = max_count
+        self.max_pools = max_pools
+        self._pools: 'OrderedDict[Tuple[PasswordPolicy, int], PasswordPool]' = OrderedDict()
+
+    def pool_for(self, request: Dict[str, Any]) -> PasswordPool:
+        """Find or create the pool for a request; raises ValueError for bad options"""
+        unknown = set(request) - set(OPTION_TYPES)
+        if unknown:
+            raise ValueError(f"Unknown option(s): {', '.join(sorted(unknown))}")
+        for name, value in request.items():
+            if type(value) is not OPTION_TYPES[name]:
+                raise ValueError(f"{name} must be {TYPE_NAMES[OPTION_TYPES[name]]}")
+        options = {POLICY_OPTIONS[name]: value for name, value in request.items() if name in POLICY_OPTIONS}
+        policy = compile_policy(**options)
+        length = request.get('length', DEFAULT_LENGTH)
+        if length > MAX_LENGTH:
+            raise ValueError(f"length must be at most {MAX_LENGTH}")
+        # Fail on a bad length here rather than inside the executor
+        PasswordEngine(policy).generate_many(0, length)
+
+        key = (policy, length)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = PasswordPool(policy, length, self.pool_size, self.blocklist)
+            if len(self._pools) > self.max_pools:
+                self._pools.popitem(last=False)
+        else:
+            self._pools.move_to_end(key)
+        return pool
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Answer the requests of one connection until the client hangs up"""
+        try:
+            while True:
+                line = await self._read_line(reader)
+                if line is None:
+                    writer.write((json.dumps({'error': "Request line is too long"}) + '\n').encode())
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request must be a JSON object")
+                    pool = self.pool_for(request)
+                    count = request.get('count', 1)
+                    if not 1 <= count <= self.max_count:
+                        raise ValueError(f"count must be between 1 and {self.max_count}")
+                    # The first chunk comes before the header, so a timeout can still be reported
+                    passwords = await pool.take(min(CHUNK_SIZE, count))
+                except (ValueError, TypeError, TimeoutError) as e:
+                    writer.write((json.dumps({'error': str(e)}) + '\n').encode())
+                    await writer.drain()
+                    continue
+
+                writer.write((json.dumps({'count': count}) + '\n').encode())
+                sent = 0
+                while True:
+                    writer.write(('\n'.join(passwords) + '\n').encode())
+                    # Waits for slow clients instead of buffering everything
+                    await writer.drain()
+                    sent += len(passwords)
+                    if sent >= count:
+                        break
+                    passwords = await pool.take(min(CHUNK_SIZE, count - sent))
+        except (ConnectionError, asyncio.IncompleteReadError, TimeoutError):
+            # A timeout after the header can only be signalled by hanging up
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+        """Like ``readline``, but a line over the reader's limit is skipped whole and gives None"""
+        try:
+            return await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as e:
+            return e.partial
+        except asyncio.LimitOverrunError as e:
+            consumed = e.consumed
+        while True:
+            try:
+                # Up to the newline, or as far as was searched without finding one
+                await reader.readexactly(consumed)
+                await reader.readuntil(b'\n')
+                return None
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+            except asyncio.IncompleteReadError:
+                return None
+
+    async def serve(self, path: Optional[str] = None, host: str = '127.0.0.1', port: int = 8765):
+        if path:
+            server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            server = await asyncio.start_server(self.handle, host=host, port=port)
+        async with server:
+            await server.serve_forever()
+
+
+def fetch_passwords(count: int = 1, path: Optional[str] = None, host: str = '127.0.0.1',
+                    port: int = 8765, **options) -> List[str]:
+    """Blocking client: request ``count`` passwords from a running service"""
+    if path:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(path)
+    else:
+        sock = socket.create_connection((host, port))
+    with sock, sock.makefile('rw', encoding='utf-8', newline='\n') as f:
+        f.write(json.dumps(dict(options, count=count)) + '\n')
+        f.flush()
+        header = json.loads(f.readline())
+        if 'error' in header:
+            raise ValueError(header['error'])
+        passwords = [f.readline() for _ in range(header['count'])]
+        if passwords and not passwords[-1]:
+            raise ConnectionError("The service hung up before sending every password")
+        return [password.rstrip('\n') for password in passwords]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve generated passwords to local clients")
+    parser.add_argument('--socket', metavar='PATH', help="listen on a Unix socket")
+    parser.add_argument('--host', default='127.0.0.1', help="TCP address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument('--pool-size', type=int, default=1000,
+                        help="passwords kept ready per policy (default: 1000)")
+    parser.add_argument('--blocklist', metavar='FILE',
+                        help="never hand out passwords found in this blocklist")
+    args = parser.parse_args(argv)
+
+    try:
+        blocklist = Blocklist(args.blocklist) if args.blocklist else None
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    service = PasswordService(pool_size=args.pool_size, blocklist=blocklist)
+    where = args.socket or f"{args.host}:{args.port}"
+    print(f"✅ Serving passwords on {where}", file=sys.stderr)
+    try:
+        asyncio.run(service.serve(args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+# password_strength.py
+"""Pattern-aware password strength estimation in the style of zxcvbn
+
+The estimator looks for dictionary words (also in l33t spelling), keyboard
+walks, repeats, sequences and dates, and finds the cheapest way for an
+attacker to guess the password as a chain of those patterns with brute
+force filling the gaps. Check passwords from the command line with
+    python password_strength.py 'Password123!' --dictionary words.txt
+"""
+import argparse
+import math
+import re
+import sys
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+# Most common passwords and words, most frequent first
+COMMON_WORDS = """
+password 123456 12345678 qwerty abc123 monkey letmein dragon 111111 baseball
+iloveyou trustno1 1234567 sunshine master 123123 welcome shadow ashley football
+jesus michael ninja mustang admin login princess solo starwars superman batman
+hello freedom whatever qazwsx charlie donald secret summer winter spring autumn
+love flower hunter killer soccer hockey george jordan harley ranger thomas
+robert access buster tigger pepper daniel andrew joshua jennifer hannah jessica
+maggie computer internet service server default guest test user root changeme
+pass system office work money family friend cookie chocolate pokemon matrix
+orange banana apple cheese coffee purple silver golden diamond angel baby blue
+red green black white happy lucky magic music pizza google facebook yankees
+cowboys eagles lakers chelsea arsenal liverpool london paris berlin america
+canada mexico india china samsung nokia microsoft windows linux sexy lovely
+babygirl sweet cute star moon sun sky rain snow fire water earth tiger lion
+eagle wolf bear shark horse dog cat fish bird house car phone game gamer player
+super power private public secure security protect open sesame boss king queen
+prince knight wizard soldier captain doctor teacher student school college
+monday friday sunday january february march april may june july august
+september october november december zaq12wsx 1q2w3e4r asdfgh zxcvbn qwertyuiop
+654321 666666 7777777 987654321 000000 112233 121212 159753
+""".split()
+
+KEYBOARD_ROWS = [("`1234567890-=", "~!@#$%^&*()_+"),
+                 ("qwertyuiop[]\\", "QWERTYUIOP{}|"),
+                 ("asdfghjkl;'", 'ASDFGHJKL:"'),
+                 ("zxcvbnm,./", "ZXCVBNM<>?")]
+LEET = str.maketrans('4@8(361!|0$57+2', 'aabcegiiiossttz')
+MIN_WORD_LENGTH = 3
+REFERENCE_YEAR = 2026
+MIN_YEAR_SPACE = 20
+BRUTEFORCE_CARDINALITY = 10
+MIN_GUESSES_SINGLE_CHAR = 10
+MIN_GUESSES_MULTI_CHAR = 50
+SCORE_THRESHOLDS = [1e3, 1e6, 1e8, 1e10]
+STRENGTH_LABELS = ["Weak 🔴", "Weak 🔴", "Moderate 🟡", "Strong 🟢", "Very Strong 💪"]
+
+SEQUENCE_STARTS = frozenset('aAzZ019')
+YEAR_RE = re.compile(r'19\d\d|20\d\d')
+DATE_RE = re.compile(r'(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})')
+DIGITS_RE = re.compile(r'\d{4,8}')
+REPEAT_RE = re.compile(r'(.+?)\1+')
+
+
+class WordIndex:
+    """Sorted words in one string buffer, found by bisecting an offset array
+
+    ``offsets`` holds the start of every word plus a final sentinel, so word
+    ``k`` is ``buffer[offsets[k]:offsets[k + 1] - 1]``; ``ranks`` holds its
+    frequency rank. The whole dictionary costs two small arrays and one
+    string instead of a Python object per word. Words shorter than
+    ``MIN_WORD_LENGTH`` are dropped, and ``prefixes`` maps every prefix of
+    that length to its range of words, so most positions of a password are
+    ruled out by one dict lookup.
+    """
+
+    def __init__(self, ranked_words: Iterable[Tuple[str, int]]):
+        ranked_words = sorted((word, rank) for word, rank in ranked_words if len(word) >= MIN_WORD_LENGTH)
+        self.buffer = ''.join(word + '\n' for word, _ in ranked_words)
+        self.offsets = array('I', [0])
+        self.ranks = array('I', (rank for _, rank in ranked_words))
+        self.prefixes = {}
+        for k, (word, _) in enumerate(ranked_words):
+            self.offsets.append(self.offsets[-1] + len(word) + 1)
+            prefix = word[:MIN_WORD_LENGTH]
+            self.prefixes[prefix] = (self.prefixes.get(prefix, (k,))[0], k + 1)
+
+    def __len__(self) -> int:
+        return len(self.ranks)
+
+    def __getitem__(self, k: int) -> str:
+        return self.buffer[self.offsets[k]:self.offsets[k + 1] - 1]
+
+    def matches_at(self, text: str, start: int) -> List[Tuple[int, int]]:
+        """(end, rank) of every word that ``text`` has at ``start``
+
+        The search range shrinks with every extra character, so it stops as
+        soon as no word has the prefix any more.
+        """
+        found = []
+        span = self.prefixes.get(text[start:start + MIN_WORD_LENGTH])
+        if span is None:
+            return found
+        lo, hi = span
+        for end in range(start + MIN_WORD_LENGTH, len(text) + 1):
+            prefix = text[start:end]
+            lo = bisect_left(self, prefix, lo, hi)
+            hi = bisect_left(self, prefix + '\U0010ffff', lo, hi)
+            if lo >= hi:
+                break
+            if self[lo] == prefix:
+                found.append((end, self.ranks[lo]))
+        return found
+
+
+_dictionary: Optional[WordIndex] = None
+_dictionary_path: Optional[str] = None
+
+
+def load_dictionary(path: Optional[str] = None):
+    """Use a frequency-ordered wordlist (one word per line) instead of the built-in one
+
+    The file is read on the first estimate, not here.
+    """
+    global _dictionary, _dictionary_path
+    _dictionary, _dictionary_path = None, path
+    estimate.cache_clear()
+
+
+def dictionary() -> WordIndex:
+    global _dictionary
+    if _dictionary is None:
+        words = COMMON_WORDS
+        if _dictionary_path:
+            with open(_dictionary_path, encoding='utf-8', errors='replace') as f:
+                words = [line.strip().lower() for line in f]
+        ranks = {}
+        for word in words:
+            if word and word not in ranks:
+                ranks[word] = len(ranks) + 1
+        _dictionary = WordIndex(ranks.items())
+    return _dictionary
+
+
+def _keyboard_positions():
+    positions = {}
+    for row, keys in enumerate(KEYBOARD_ROWS):
+        for column in range(len(keys[0])):
+            for shifted, chars in enumerate(keys):
+                positions[chars[column]] = (row, column, shifted)
+    return positions
+
+
+KEYBOARD = _keyboard_positions()
+# Rows are staggered: key (r, c) touches (r - 1, c) and (r - 1, c + 1) above it
+KEYBOARD_NEIGHBOURS = [(0, -1), (0, 1), (-1, 0), (-1, 1), (1, -1), (1, 0)]
+KEYBOARD_STARTS = len(KEYBOARD) // 2
+KEYBOARD_DEGREE = 4.6
+
+
+class Match(NamedTuple):
+    pattern: str
+    start: int
+    end: int
+    token: str
+    guesses: float
+
+
+class StrengthEstimate(NamedTuple):
+    guesses: float
+    entropy: float
+    score: int
+    strength: str
+    matches: Tuple[Match, ...]
+    warning: str
+
+
+def uppercase_variations(word: str) -> float:
+    """Extra guesses for the capitalization of a dictionary word"""
+    if word.islower() or not any(c.isalpha() for c in word):
+        return 1
+    if word.isupper() or (word[0].isupper() and word[1:].islower()) or (word[-1].isupper() and word[:-1].islower()):
+        return 2
+    upper = sum(c.isupper() for c in word)
+    lower = sum(c.islower() for c in word)
+    return sum(math.comb(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+
+def dictionary_matches(password: str) -> List[Match]:
+    index = dictionary()
+    lower = password.lower()
+    unleeted = lower.translate(LEET)
+    matches = {}
+    for text, leet in ((lower, False), (unleeted, True)):
+        if leet and text == lower:
+            break
+        for start in range(len(password)):
+            for end, rank in index.matches_at(text, start):
+                token = password[start:end]
+                guesses = rank * uppercase_variations(token)
+                if leet:
+                    substitutions = sum(a != b for a, b in zip(lower[start:end], text[start:end]))
+                    if not substitutions:
+                        continue
+                    guesses *= 2 ** substitutions
+                key = (start, end)
+                if key not in matches or guesses < matches[key].guesses:
+                    matches[key] = Match('dictionary', start, end, token, guesses)
+    return list(matches.values())
+
+
+def keyboard_matches(password: str) -> List[Match]:
+    matches = []
+    start = 0
+    while start < len(password) - 2:
+        end, turns, direction, shifted = start + 1, 0, None, 0
+        while end < len(password):
+            a, b = KEYBOARD.get(password[end - 1]), KEYBOARD.get(password[end])
+            if a is None or b is None:
+                break
+            step = (b[0] - a[0], b[1] - a[1])
+            if step not in KEYBOARD_NEIGHBOURS:
+                break
+            if step != direction:
+                turns += 1
+                direction = step
+            shifted += b[2]
+            end += 1
+        if end - start >= 3:
+            length = end - start
+            guesses = sum(math.comb(i - 1, j - 1) * KEYBOARD_STARTS * KEYBOARD_DEGREE ** j
+                          for i in range(2, length + 1) for j in range(1, min(turns, i - 1) + 1))
+            if shifted and shifted < length:
+                guesses *= 2
+            matches.append(Match('keyboard', start, end, password[start:end], guesses))
+            start = end - 1
+        else:
+            start += 1
+    return matches
+
+
+def sequence_matches(password: str) -> List[Match]:
+    matches = []
+    start = 0
+    while start < len(password) - 2:
+        delta = ord(password[start + 1]) - ord(password[start])
+        end = start + 1
+        if delta and abs(delta) <= 5:
+            while end < len(password) and ord(password[end]) - ord(password[end - 1]) == delta:
+                end += 1
+        if end - start >= 3:
+            token = password[start:end]
+            base = 4 if token[0] in SEQUENCE_STARTS else (10 if token[0].isdigit() else 26)
+            if delta < 0:
+                base *= 2
+            matches.append(Match('sequence', start, end, token, base * len(token)))
+            start = end - 1
+        else:
+            start += 1
+    return matches
+
+
+def repeat_matches(password: str) -> List[Match]:
+    matches = []
+    for m in REPEAT_RE.finditer(password):
+        base = m.group(1)
+        repeats = len(m.group(0)) // len(base)
+        matches.append(Match('repeat', m.start(), m.end(), m.group(0), estimate(base).guesses * repeats))
+    return matches
+
+
+def _year_space(year: int) -> int:
+    return max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE)
+
+
+def _valid_date(parts: Tuple[int, int, int]) -> Optional[int]:
+    """Year of a (day or month, month or day, year) triple, or None if it is no date"""
+    a, b, year = parts
+    if year < 100:
+        year += 1900 if year > 50 else 2000
+    if not 1900 <= year <= 2100:
+        return None
+    if (1 <= a <= 31 and 1 <= b <= 12) or (1 <= a <= 12 and 1 <= b <= 31):
+        return year
+    return None
+
+
+def date_matches(password: str) -> List[Match]:
+    matches = []
+    for m in YEAR_RE.finditer(password):
+        matches.append(Match('date', m.start(), m.end(), m.group(), _year_space(int(m.group()))))
+    for m in DATE_RE.finditer(password):
+        first, last = int(m.group(1)), int(m.group(4))
+        middle = int(m.group(3))
+        year = _valid_date((first, middle, last)) or _valid_date((middle, last, first))
+        if year is not None:
+            matches.append(Match('date', m.start(), m.end(), m.group(), 365 * _year_space(year) * 4))
+    for m in DIGITS_RE.finditer(password):
+        digits = m.group()
+        splits = {6: [(2, 4), (4, 6)], 8: [(2, 4), (4, 6)], 4: [(1, 2), (2, 3)], 5: [(1, 3), (2, 3)]}
+        for first, second in splits.get(len(digits), []):
+            parts = (int(digits[:first]), int(digits[first:second]), int(digits[second:]))
+            year = _valid_date(parts) or _valid_date((parts[1], parts[2], parts[0]))
+            if year is not None:
+                matches.append(Match('date', m.start(), m.end(), digits, 365 * _year_space(year)))
+                break
+    return matches
+
+
+def _minimum_guesses(match: Match) -> float:
+    minimum = MIN_GUESSES_SINGLE_CHAR if match.end - match.start == 1 else MIN_GUESSES_MULTI_CHAR
+    return max(match.guesses, minimum)
+
+
+@lru_cache(maxsize=4096)
+def estimate(password: str) -> StrengthEstimate:
+    """Estimate how many guesses an attacker who knows common patterns needs
+
+    Every match is a guess count for a slice of the password; a dynamic
+    program picks the chain of matches and brute-forced characters with the
+    fewest total guesses. Results are cached, so re-scoring while the user
+    types only pays for new strings.
+    """
+    n = len(password)
+    if not n:
+        return StrengthEstimate(1, 0.0, 0, STRENGTH_LABELS[0], (), "Enter a password")
+
+    ending: List[List[Match]] = [[] for _ in range(n + 1)]
+    for finder in (dictionary_matches, keyboard_matches, sequence_matches, date_matches):
+        for match in finder(password):
+            ending[match.end].append(match)
+    if n > 1:
+        for match in repeat_matches(password):
+            if match.end - match.start < n or len(match.token) > 1:
+                ending[match.end].append(match)
+
+    # best[j]: fewest guesses for password[:j]; the extra factor per match
+    # makes chains of many tiny matches cost more than one long one
+    best = [1.0] + [math.inf] * n
+    chosen: List[Optional[Match]] = [None] * (n + 1)
+    for j in range(1, n + 1):
+        best[j] = best[j - 1] * BRUTEFORCE_CARDINALITY
+        for match in ending[j]:
+            guesses = best[match.start] * _minimum_guesses(match) * (2 if match.start else 1)
+            if guesses < best[j]:
+                best[j], chosen[j] = guesses, match
+
+    matches = []
+    j = n
+    while j > 0:
+        match = chosen[j]
+        if match is None:
+            j -= 1
+            continue
+        matches.append(match)
+        j = match.start
+    matches.reverse()
+
+    guesses = best[n]
+    score = sum(guesses >= threshold for threshold in SCORE_THRESHOLDS)
+    return StrengthEstimate(guesses, math.log2(guesses), score, STRENGTH_LABELS[score],
+                            tuple(matches), _warning(matches, score))
+
+
+def _warning(matches: List[Match], score: int) -> str:
+    if score >= 3 or not matches:
+        return ""
+    worst = max(matches, key=lambda m: m.end - m.start)
+    return {
+        'dictionary': f"Contains the common word or password '{worst.token}'",
+        'keyboard': f"'{worst.token}' is a keyboard pattern",
+        'sequence': f"'{worst.token}' is an easy sequence",
+        'repeat': f"Repeats like '{worst.token}' are easy to guess",
+        'date': f"Dates and years like '{worst.token}' are easy to guess",
+    }[worst.pattern]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Estimate password strength from common patterns")
+    parser.add_argument('passwords', nargs='+')
+    parser.add_argument('--dictionary', metavar='FILE',
+                        help="frequency-ordered wordlist, one word per line")
+    args = parser.parse_args(argv)
+    if args.dictionary:
+        load_dictionary(args.dictionary)
+    for password in args.passwords:
+        result = estimate(password)
+        print(f"{password}: {result.strength} (~10^{math.log10(result.guesses):.1f} guesses)")
+        for match in result.matches:
+            print(f"  {match.pattern}: {match.token!r} ({match.guesses:.0f} guesses)")
+        if result.warning:
+            print(f"  ⚠️ {result.warning}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,44 @@
 # password_generator_gui.py
+import argparse
+import math
+import os
+import sys
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import random
+from tkinter import ttk, messagebox, scrolledtext, simpledialog, filedialog
 import string
-import secrets
-import pyperclip  # For clipboard functionality
+import threading
+from password_engine import PasswordEngine, compile_policy, generate_parallel, write_passwords
+from password_analysis import analyze
+from password_blocklist import Blocklist
+from password_passphrase import CAPITALIZE_MODES, PassphraseGenerator, open_wordlist
+from password_strength import estimate
+from tk_profiler import TkProfiler
+try:
+    import pyperclip  # For clipboard functionality
+except ImportError:
+    pyperclip = None
+
+MAX_DISPLAYED = 100000
+MAX_EXPORTED = 100000000
+
+# label, length, uppercase, digits, special
+QUICK_PRESETS = [
+    ("Simple (8 chars)", 8, False, True, False),
+    ("Medium (12 chars)", 12, True, True, False),
+    ("Strong (16 chars)", 16, True, True, True),
+    ("Very Strong (20 chars)", 20, True, True, True),
+]
+
+# Helpers timed with --profile on top of the Tk callbacks themselves
+PROFILED_METHODS = ('display_password_info', 'calculate_strength', '_generate_secure_password')
 
 class PasswordGeneratorGUI:
-    def __init__(self, root):
+    def __init__(self, root, blocklist=None, wordlist=None):
         self.root = root
+        self.blocklist = blocklist
+        self.wordlist = wordlist
         self.root.title("🔐 Password Generator")
-        self.root.geometry("600x700")
+        self.root.geometry("600x960")
         self.root.resizable(False, False)
         
         self.setup_ui()
@@ -57,6 +85,18 @@ class PasswordGeneratorGUI:
         ttk.Checkbutton(chars_frame, text="Exclude similar characters (I, l, 1, O, 0)", 
                        variable=self.exclude_similar_var).pack(anchor=tk.W)
         
+        # Custom policy: symbol set and minimum count per selected type
+        policy_frame = ttk.Frame(chars_frame)
+        policy_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        ttk.Label(policy_frame, text="Symbols:").pack(side=tk.LEFT)
+        self.symbols_var = tk.StringVar(value=string.punctuation)
+        ttk.Entry(policy_frame, textvariable=self.symbols_var, width=34).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(policy_frame, text="At least").pack(side=tk.LEFT)
+        self.min_count_var = tk.IntVar(value=1)
+        ttk.Spinbox(policy_frame, from_=0, to=8, textvariable=self.min_count_var, width=3).pack(side=tk.LEFT, padx=5)
+        ttk.Label(policy_frame, text="of each type").pack(side=tk.LEFT)
+        
         # Quick generate frame
         quick_frame = ttk.LabelFrame(main_frame, text="Quick Generate", padding="10")
         quick_frame.pack(fill=tk.X, pady=(0, 10))
@@ -64,14 +104,39 @@ class PasswordGeneratorGUI:
         quick_buttons_frame = ttk.Frame(quick_frame)
         quick_buttons_frame.pack()
         
-        ttk.Button(quick_buttons_frame, text="Simple (8 chars)", 
-                  command=lambda: self.quick_generate(8, False, True, False)).grid(row=0, column=0, padx=5)
-        ttk.Button(quick_buttons_frame, text="Medium (12 chars)", 
-                  command=lambda: self.quick_generate(12, True, True, False)).grid(row=0, column=1, padx=5)
-        ttk.Button(quick_buttons_frame, text="Strong (16 chars)", 
-                  command=lambda: self.quick_generate(16, True, True, True)).grid(row=0, column=2, padx=5)
-        ttk.Button(quick_buttons_frame, text="Very Strong (20 chars)", 
-                  command=lambda: self.quick_generate(20, True, True, True)).grid(row=0, column=3, padx=5)
+        for column, (label, length, upper, digits, special) in enumerate(QUICK_PRESETS):
+            ttk.Button(quick_buttons_frame, text=label, 
+                      command=lambda preset=(length, upper, digits, special): self.quick_generate(*preset)
+                      ).grid(row=0, column=column, padx=5)
+        
+        # Passphrase frame: words from a wordlist instead of random characters
+        phrase_frame = ttk.LabelFrame(main_frame, text="Passphrase", padding="10")
+        phrase_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        phrase_options = ttk.Frame(phrase_frame)
+        phrase_options.pack(fill=tk.X)
+        self.words_var = tk.IntVar(value=6)
+        self.separator_var = tk.StringVar(value="-")
+        self.capitalize_var = tk.StringVar(value=CAPITALIZE_MODES[0])
+        self.phrase_digits_var = tk.IntVar(value=0)
+        ttk.Label(phrase_options, text="Words:").pack(side=tk.LEFT)
+        ttk.Spinbox(phrase_options, from_=3, to=20, textvariable=self.words_var, width=3).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(phrase_options, text="Separator:").pack(side=tk.LEFT)
+        ttk.Entry(phrase_options, textvariable=self.separator_var, width=4).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(phrase_options, text="Capitalize:").pack(side=tk.LEFT)
+        ttk.Combobox(phrase_options, textvariable=self.capitalize_var, values=CAPITALIZE_MODES,
+                     state='readonly', width=7).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(phrase_options, text="Digits:").pack(side=tk.LEFT)
+        ttk.Spinbox(phrase_options, from_=0, to=6, textvariable=self.phrase_digits_var, width=3).pack(side=tk.LEFT, padx=5)
+        
+        phrase_buttons = ttk.Frame(phrase_frame)
+        phrase_buttons.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(phrase_buttons, text="Wordlist...", 
+                  command=self.choose_wordlist).pack(side=tk.LEFT)
+        ttk.Button(phrase_buttons, text="Generate Passphrase", 
+                  command=self.generate_passphrase).pack(side=tk.LEFT, padx=10)
+        self.wordlist_label = ttk.Label(phrase_buttons, text=self._wordlist_description())
+        self.wordlist_label.pack(side=tk.LEFT)
         
         # Generate button
         generate_frame = ttk.Frame(main_frame)
@@ -96,6 +161,18 @@ class PasswordGeneratorGUI:
         self.info_text.pack(fill=tk.BOTH, expand=True)
         self.info_text.config(state=tk.DISABLED)
         
+        # Live strength check for a password typed by the user
+        check_frame = ttk.LabelFrame(main_frame, text="Check Your Password", padding="10")
+        check_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        self.check_var = tk.StringVar()
+        ttk.Entry(check_frame, textvariable=self.check_var, show="•",
+                  font=('Courier', 12)).pack(fill=tk.X, pady=(0, 5))
+        self.check_label = ttk.Label(check_frame, text="Type a password to see how guessable it is",
+                                     wraplength=540)
+        self.check_label.pack(anchor=tk.W)
+        self.check_var.trace_add('write', self.update_live_strength)
+        
         # Action buttons
         action_frame = ttk.Frame(main_frame)
         action_frame.pack(fill=tk.X)
@@ -104,6 +181,8 @@ class PasswordGeneratorGUI:
                   command=self.copy_to_clipboard).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(action_frame, text="Generate Multiple", 
                   command=self.generate_multiple).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(action_frame, text="Export...", 
+                  command=self.export_passwords).pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(action_frame, text="Clear", 
                   command=self.clear_all).pack(side=tk.LEFT)
     
@@ -135,7 +214,9 @@ class PasswordGeneratorGUI:
                 use_uppercase=self.upper_var.get(),
                 use_digits=self.digits_var.get(),
                 use_special=self.special_var.get(),
-                exclude_similar=self.exclude_similar_var.get()
+                exclude_similar=self.exclude_similar_var.get(),
+                symbols=self.symbols_var.get(),
+                min_count=self.min_count_var.get()
             )
             
             self.password_var.set(password)
@@ -144,111 +225,109 @@ class PasswordGeneratorGUI:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate password: {e}")
     
-    def _generate_secure_password(self, length, use_uppercase, use_digits, use_special, exclude_similar):
+    def _generate_secure_password(self, length, use_uppercase, use_digits, use_special, exclude_similar,
+                                  symbols=None, min_count=1):
         """Generate a secure password"""
-        lowercase = string.ascii_lowercase
-        uppercase = string.ascii_uppercase if use_uppercase else ''
-        digits = string.digits if use_digits else ''
-        special = string.punctuation if use_special else ''
-        
-        # Exclude similar characters
-        similar_chars = 'Il1O0' if exclude_similar else ''
-        all_chars = lowercase + uppercase + digits + special
-        
-        if exclude_similar:
-            all_chars = ''.join(c for c in all_chars if c not in similar_chars)
-        
-        # Ensure we have characters from each selected category
-        password_chars = []
-        
-        password_chars.append(secrets.choice(lowercase))
-        if uppercase:
-            password_chars.append(secrets.choice(uppercase))
-        if digits:
-            password_chars.append(secrets.choice(digits))
-        if special:
-            password_chars.append(secrets.choice(special))
-        
-        # Fill remaining length
-        remaining = length - len(password_chars)
-        if remaining > 0:
-            password_chars.extend(secrets.choice(all_chars) for _ in range(remaining))
-        
-        # Shuffle
-        secrets.SystemRandom().shuffle(password_chars)
-        
-        return ''.join(password_chars)
+        policy = compile_policy(use_uppercase, use_digits, use_special, exclude_similar,
+                                symbols or None, min_count, min_count, min_count, min_count)
+        return PasswordEngine(policy, blocklist=self.blocklist).generate(length)
+    
+    def _current_policy(self):
+        """Compile (or fetch from cache) the policy for the current settings"""
+        min_count = self.min_count_var.get()
+        return compile_policy(self.upper_var.get(), self.digits_var.get(),
+                              self.special_var.get(), self.exclude_similar_var.get(),
+                              self.symbols_var.get() or None, min_count, min_count, min_count, min_count)
+    
+    def _wordlist_description(self):
+        if self.wordlist is None:
+            return "No wordlist loaded"
+        return f"{os.path.basename(self.wordlist.path or 'wordlist')}: {len(self.wordlist)} words"
+    
+    def choose_wordlist(self):
+        """Load a wordlist or compiled index (see password_passphrase.py)"""
+        path = filedialog.askopenfilename(title="Choose a wordlist")
+        if not path:
+            return False
+        try:
+            wordlist = open_wordlist(path)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            messagebox.showerror("Error", f"Could not load wordlist: {e}")
+            return False
+        if self.wordlist is not None:
+            self.wordlist.close()
+        self.wordlist = wordlist
+        self.wordlist_label.config(text=self._wordlist_description())
+        return True
+    
+    def generate_passphrase(self):
+        """Generate a passphrase from the loaded wordlist"""
+        if self.wordlist is None and not self.choose_wordlist():
+            return
+        try:
+            generator = PassphraseGenerator(self.wordlist, words=self.words_var.get(),
+                                            separator=self.separator_var.get(),
+                                            capitalize=self.capitalize_var.get(),
+                                            digits=self.phrase_digits_var.get(),
+                                            blocklist=self.blocklist)
+            passphrase = generator.generate()
+        except (ValueError, tk.TclError) as e:
+            messagebox.showerror("Error", f"Failed to generate passphrase: {e}")
+            return
+        self.password_var.set(passphrase)
+        self.display_password_info(passphrase, generator)
     
-    def display_password_info(self, password):
-        """Display detailed password information"""
+    def display_password_info(self, password, passphrase=None):
+        """Display detailed password information; pass the generator for passphrases"""
         self.info_text.config(state=tk.NORMAL)
         self.info_text.delete(1.0, tk.END)
         
-        # Calculate statistics
-        length = len(password)
-        upper_count = sum(1 for c in password if c.isupper())
-        lower_count = sum(1 for c in password if c.islower())
-        digit_count = sum(1 for c in password if c.isdigit())
-        special_count = sum(1 for c in password if c in string.punctuation)
-        
-        # Calculate strength
-        strength = self.calculate_strength(password)
+        # One pass over the password gives every statistic below
+        analysis = analyze(password)
+        result = estimate(password)
+        if passphrase is None:
+            entropy = f"Approximately {analysis.entropy:.1f} bits"
+        else:
+            entropy = f"Exactly {passphrase.entropy:.1f} bits ({passphrase.words} words from {len(passphrase.wordlist)})"
         
         info = f"""🔐 PASSWORD ANALYSIS:
 ────────────────────────────────
-Length: {length} characters
-Strength: {strength}
+Length: {analysis.length} characters
+Strength: {result.strength}
 
 CHARACTER BREAKDOWN:
-• Uppercase letters: {upper_count}
-• Lowercase letters: {lower_count}
-• Digits: {digit_count}
-• Special characters: {special_count}
+• Uppercase letters: {analysis.upper}
+• Lowercase letters: {analysis.lower}
+• Digits: {analysis.digits}
+• Special characters: {analysis.special}
 
-ENTROPY: Approximately {self.calculate_entropy(password):.1f} bits
+ENTROPY: {entropy}
+GUESSES: About 10^{math.log10(result.guesses):.0f} for an attacker who knows common patterns
 """
+        if result.warning:
+            info += f"\n⚠️ {result.warning}\n"
         self.info_text.insert(1.0, info)
         self.info_text.config(state=tk.DISABLED)
     
     def calculate_strength(self, password):
-        """Calculate password strength"""
-        score = 0
-        length = len(password)
-        
-        # Length scoring
-        if length >= 8: score += 1
-        if length >= 12: score += 1
-        if length >= 16: score += 1
-        if length >= 20: score += 1
-        
-        # Character variety
-        has_upper = any(c.isupper() for c in password)
-        has_lower = any(c.islower() for c in password)
-        has_digit = any(c.isdigit() for c in password)
-        has_special = any(c in string.punctuation for c in password)
-        
-        if has_upper and has_lower: score += 1
-        if has_digit: score += 1
-        if has_special: score += 1
-        
-        if score <= 2: return "Weak 🔴"
-        elif score <= 4: return "Moderate 🟡"
-        elif score <= 6: return "Strong 🟢"
-        else: return "Very Strong 💪"
+        """Calculate password strength from the patterns an attacker would try"""
+        return estimate(password).strength
+    
+    def update_live_strength(self, *args):
+        """Re-score the typed password on every keystroke"""
+        password = self.check_var.get()
+        if not password:
+            self.check_label.config(text="Type a password to see how guessable it is")
+            return
+        result = estimate(password)
+        text = f"{result.strength}  (about 10^{math.log10(result.guesses):.0f} guesses)"
+        if result.warning:
+            text += f"\n⚠️ {result.warning}"
+        self.check_label.config(text=text)
     
     def calculate_entropy(self, password):
         """Calculate password entropy in bits"""
-        char_pool = 0
-        if any(c.islower() for c in password): char_pool += 26
-        if any(c.isupper() for c in password): char_pool += 26
-        if any(c.isdigit() for c in password): char_pool += 10
-        if any(c in string.punctuation for c in password): char_pool += 32
-        
-        if char_pool == 0:
-            return 0
-        
-        import math
-        return len(password) * math.log2(char_pool)
+        return analyze(password).entropy
     
     def copy_to_clipboard(self):
         """Copy password to clipboard"""
@@ -265,20 +344,12 @@ ENTROPY: Approximately {self.calculate_entropy(password):.1f} bits
     def generate_multiple(self):
         """Generate multiple passwords"""
         try:
-            count = tk.simpledialog.askinteger("Multiple Passwords", 
-                                             "How many passwords to generate? (1-10)", 
-                                             minvalue=1, maxvalue=10)
+            count = simpledialog.askinteger("Multiple Passwords", 
+                                            f"How many passwords to generate? (1-{MAX_DISPLAYED})", 
+                                            minvalue=1, maxvalue=MAX_DISPLAYED)
             if count:
-                passwords = []
-                for _ in range(count):
-                    pwd = self._generate_secure_password(
-                        length=self.length_var.get(),
-                        use_uppercase=self.upper_var.get(),
-                        use_digits=self.digits_var.get(),
-                        use_special=self.special_var.get(),
-                        exclude_similar=self.exclude_similar_var.get()
-                    )
-                    passwords.append(pwd)
+                passwords = PasswordEngine(self._current_policy(), blocklist=self.blocklist).generate_many(
+                    count, self.length_var.get())
                 
                 # Display multiple passwords
                 multiple_window = tk.Toplevel(self.root)
@@ -288,14 +359,81 @@ ENTROPY: Approximately {self.calculate_entropy(password):.1f} bits
                 text_area = scrolledtext.ScrolledText(multiple_window, font=('Courier', 10))
                 text_area.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
                 
-                for i, pwd in enumerate(passwords, 1):
-                    text_area.insert(tk.END, f"{i:2d}. {pwd}\n")
+                width = len(str(count))
+                text_area.insert(tk.END, ''.join(f"{i:{width}d}. {pwd}\n" for i, pwd in enumerate(passwords, 1)))
                 
                 text_area.config(state=tk.DISABLED)
                 
         except Exception as e:
             messagebox.showerror("Error", f"Failed to generate multiple passwords: {e}")
     
+    def export_passwords(self):
+        """Write many passwords to a text file on all CPU cores, one per line"""
+        try:
+            count = simpledialog.askinteger("Export Passwords", 
+                                            f"How many passwords to export? (1-{MAX_EXPORTED})", 
+                                            minvalue=1, maxvalue=MAX_EXPORTED)
+            if not count:
+                return
+            filename = filedialog.asksaveasfilename(title="Export Passwords", defaultextension=".txt",
+                                                    filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+            if not filename:
+                return
+            policy = self._current_policy()
+            length = self.length_var.get()
+            # Report a bad length now instead of from the worker thread
+            PasswordEngine(policy).generate_many(0, length)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export passwords: {e}")
+            return
+        
+        # The pool runs on a worker thread; it only updates ``state`` and the
+        # Tk thread polls it, since Tk must not be called from other threads
+        state = {'done': 0, 'error': None, 'finished': False}
+        cancel = threading.Event()
+        
+        def progress(done, total):
+            state['done'] = done
+        
+        def run():
+            try:
+                with open(filename, 'w') as f:
+                    generate_parallel(policy, count, length, f=f, progress=progress, cancel=cancel,
+                                      blocklist=self.blocklist)
+            except Exception as e:
+                state['error'] = e
+            finally:
+                state['finished'] = True
+        
+        progress_window = tk.Toplevel(self.root)
+        progress_window.title("Exporting Passwords")
+        progress_window.geometry("400x130")
+        progress_window.transient(self.root)
+        progress_window.protocol("WM_DELETE_WINDOW", cancel.set)
+        
+        progress_label = ttk.Label(progress_window, text=f"0 / {count}")
+        progress_label.pack(pady=(15, 5))
+        progress_bar = ttk.Progressbar(progress_window, maximum=count, length=350)
+        progress_bar.pack(padx=20)
+        ttk.Button(progress_window, text="Cancel", command=cancel.set).pack(pady=10)
+        
+        def poll():
+            progress_bar['value'] = state['done']
+            progress_label.config(text=f"{state['done']} / {count}")
+            if not state['finished']:
+                self.root.after(100, poll)
+                return
+            progress_window.destroy()
+            if state['error'] is not None:
+                messagebox.showerror("Error", f"Failed to export passwords: {state['error']}")
+            elif cancel.is_set():
+                messagebox.showinfo("Cancelled", f"Export cancelled after {state['done']} passwords")
+            else:
+                messagebox.showinfo("Success", f"Exported {count} passwords to {filename}")
+        
+        threading.Thread(target=run, name='password-export', daemon=True).start()
+        self.root.after(100, poll)
+    
     def clear_all(self):
         """Clear all fields"""
         self.password_var.set("")
@@ -303,10 +441,116 @@ ENTROPY: Approximately {self.calculate_entropy(password):.1f} bits
         self.info_text.delete(1.0, tk.END)
         self.info_text.config(state=tk.DISABLED)
 
-def main():
-    root = tk.Tk()
-    app = PasswordGeneratorGUI(root)
-    root.mainloop()
+def instrument(app, profiler):
+    """Time the strength and display helpers and the export's file writing"""
+    profiler.wrap(app, *PROFILED_METHODS)
+    profiler.wrap(sys.modules[__name__], 'generate_parallel', prefix='disk: ')
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Password generator; opens the GUI unless --count is given")
+    parser.add_argument('-n', '--count', type=int, help="print COUNT passwords instead of opening the GUI")
+    parser.add_argument('-l', '--length', type=int, default=12, help="password length (default: 12)")
+    parser.add_argument('--no-upper', dest='upper', action='store_false', help="no uppercase letters")
+    parser.add_argument('--no-digits', dest='digits', action='store_false', help="no digits")
+    parser.add_argument('--no-special', dest='special', action='store_false', help="no special characters")
+    parser.add_argument('--allow-similar', dest='exclude_similar', action='store_false',
+                        help="allow the similar characters I, l, 1, O and 0")
+    parser.add_argument('--symbols', help="special characters to use (default: all ASCII punctuation)")
+    for name in ('lower', 'upper', 'digits', 'special'):
+        parser.add_argument(f'--min-{name}', type=int, default=1, metavar='N',
+                            help=f"at least N {name} characters (default: 1)")
+    parser.add_argument('-o', '--output', metavar='FILE', help="write to FILE instead of stdout")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="generate on JOBS processes (0: one per CPU)")
+    parser.add_argument('--split', metavar='PREFIX',
+                        help="let every worker process write its own PREFIX-NNNNN.txt file")
+    parser.add_argument('--blocklist', metavar='FILE',
+                        help="regenerate passwords found in this blocklist (see password_blocklist.py)")
+    phrases = parser.add_argument_group("passphrases")
+    phrases.add_argument('--wordlist', metavar='FILE',
+                         help="generate passphrases from this wordlist or index (see password_passphrase.py)")
+    phrases.add_argument('--words', type=int, default=6, help="words per passphrase (default: 6)")
+    phrases.add_argument('--separator', default='-', help="text between words (default: -)")
+    phrases.add_argument('--capitalize', choices=CAPITALIZE_MODES, default='none',
+                         help="capitalize no words, every word or random words (default: none)")
+    phrases.add_argument('--phrase-digits', type=int, default=0, metavar='N',
+                         help="insert a group of N random digits between the words (default: 0)")
+    debug = parser.add_argument_group("profiling (GUI only)")
+    debug.add_argument('--profile', metavar='FILE',
+                       help="time every handler and main-loop stall and save the results to FILE on exit")
+    debug.add_argument('--debug-panel', action='store_true',
+                       help="show handler timings in a live window (F12 reopens it)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    blocklist = None
+    if args.blocklist:
+        try:
+            blocklist = Blocklist(args.blocklist)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            return 1
+    wordlist = None
+    if args.wordlist:
+        try:
+            wordlist = open_wordlist(args.wordlist)
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            return 1
+    
+    if args.count is None:
+        root = tk.Tk()
+        profiler = TkProfiler(root) if args.profile or args.debug_panel else None
+        app = PasswordGeneratorGUI(root, blocklist=blocklist, wordlist=wordlist)
+        if profiler is not None:
+            instrument(app, profiler)
+            if args.debug_panel:
+                profiler.show_panel()
+        root.mainloop()
+        if args.profile:
+            profiler.dump(args.profile)
+            print(f"Handler timings saved to {args.profile}")
+        return 0
+    
+    try:
+        if wordlist is not None:
+            if args.jobs != 1 or args.split:
+                raise ValueError("--jobs and --split only apply to character passwords")
+            passphrases = PassphraseGenerator(wordlist, args.words, args.separator, args.capitalize,
+                                              args.phrase_digits, blocklist=blocklist)
+        else:
+            policy = compile_policy(args.upper, args.digits, args.special, args.exclude_similar, args.symbols,
+                                    args.min_lower, args.min_upper, args.min_digits, args.min_special)
+    except ValueError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    
+    def generate(f):
+        if wordlist is not None:
+            write_passwords(passphrases.generate_many(args.count), f)
+        elif args.jobs == 1:
+            write_passwords(PasswordEngine(policy, blocklist=blocklist).generate_many(args.count, args.length), f)
+        else:
+            generate_parallel(policy, args.count, args.length, f=f, workers=args.jobs, blocklist=blocklist)
+    
+    try:
+        if args.split:
+            generate_parallel(policy, args.count, args.length, shard_prefix=args.split, workers=args.jobs,
+                              blocklist=blocklist)
+        elif args.output and args.output != '-':
+            with open(args.output, 'w') as f:
+                generate(f)
+        else:
+            generate(sys.stdout)
+            sys.stdout.flush()
+    except ValueError as e:
+        print(f"❌ Error: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # Output was piped into something like `head` that stopped reading
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
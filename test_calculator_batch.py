@@ -0,0 +1,32 @@
+# test_calculator_batch.py
+import io
+
+import pytest
+
+import calculator_batch
+from calculator_batch import run_batch
+from calculator_engine import compile_expression
+
+CSV = "a,b\n4,2\n-1,2\n0,0\n9,-3\n10,400\n-8,0.5\n"
+
+
+def run(text, monkeypatch, numpy):
+    if not numpy:
+        monkeypatch.setattr(calculator_batch, 'np', None)
+    output = io.StringIO()
+    summary = run_batch(compile_expression(text), io.StringIO(CSV), output, chunk_rows=4)
+    return output.getvalue(), summary
+
+
+@pytest.mark.parametrize('text', ['(a ** 0.5) % 2', 'a / b + 1', 'b % a', 'a ** b'])
+def test_numpy_and_pure_python_agree(text, monkeypatch):
+    if calculator_batch.np is None:
+        pytest.skip("NumPy is not installed")
+    assert run(text, monkeypatch, numpy=True) == run(text, monkeypatch, numpy=False)
+
+
+def test_failed_rows_are_marked_not_fatal(monkeypatch):
+    output, summary = run('(a ** 0.5) % 2', monkeypatch, numpy=False)
+    assert output.splitlines() == ['result,error', '0.0,', ',no real result', '0.0,', '1.0,',
+                                   '1.1622776601683795,', ',no real result']
+    assert summary == (6, 2, [2, 6])
@@ -0,0 +1,49 @@
+# test_calculator_engine.py
+import pytest
+
+from calculator_engine import DEFAULT_PRECISION, NoRealResult, compile_expression, describe_error, get_backend
+
+
+@pytest.mark.parametrize('text, bindings, expected', [
+    ('(a+b)*c**2 % 7', {'a': 1.0, 'b': 2.0, 'c': 3.0}, 6.0),
+    ('-2**2', {}, -4.0),
+    ('2**3**2', {}, 512.0),
+    ('-7 % 3', {}, 2.0),
+])
+def test_float_results(text, bindings, expected):
+    assert compile_expression(text).evaluate(bindings) == expected
+
+
+def test_modular_power_is_exact_in_every_mode():
+    for mode in ('float', 'decimal', 'exact'):
+        assert int(compile_expression('7 ** 10000000 % 13', mode)()) == pow(7, 10000000, 13)
+
+
+@pytest.mark.parametrize('text', ['(-8)**(1/3)', '(-8)**(1/3) % 2', '(-8)**0.5 * 2'])
+def test_constant_with_no_real_result_is_an_arithmetic_error(text):
+    with pytest.raises(NoRealResult) as info:
+        compile_expression(text)
+    assert describe_error(info.value).startswith("No real result")
+
+
+def test_variable_with_no_real_result_is_an_arithmetic_error():
+    expression = compile_expression('(a ** 0.5) % 2')
+    assert expression(a=4.0) == 0.0
+    with pytest.raises(NoRealResult):
+        expression(a=-1.0)
+
+
+def test_decimal_zero_to_a_negative_power_is_a_division_by_zero():
+    with pytest.raises(ZeroDivisionError):
+        compile_expression('0 ** -1', 'decimal')
+    assert str(compile_expression('2 ** -1', 'decimal')()) == '0.5'
+    with pytest.raises(NoRealResult):
+        compile_expression('(-8) ** 0.5', 'decimal')
+
+
+def test_decimal_precision():
+    assert str(compile_expression('1/3', 'decimal', 5)()) == '0.33333'
+    assert len(str(compile_expression('1/3', 'decimal')())) == 2 + DEFAULT_PRECISION
+    for precision in (0, -1):
+        with pytest.raises(ValueError, match="at least 1"):
+            get_backend('decimal', precision)
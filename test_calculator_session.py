@@ -0,0 +1,52 @@
+# test_calculator_session.py
+from calculator_session import CalculatorSession, read_history
+
+
+def run_lines(session, lines):
+    """Feed lines to ``session.run`` as if typed; ends with Ctrl-D"""
+    lines = iter(lines)
+
+    def read_line(prompt):
+        try:
+            return next(lines)
+        except StopIteration:
+            raise EOFError from None
+    session.run(read_line)
+
+
+def test_named_results_and_ans():
+    session = CalculatorSession(history_path=None)
+    assert session.execute('rate = 0.5') == 'rate = 0.5'
+    assert session.execute('rate * 4') == '= 2.0'
+    assert session.execute('ans + rate') == '= 2.5'
+
+
+def test_switching_mode_converts_or_drops_results():
+    session = CalculatorSession(history_path=None)
+    session.execute('huge = 1e308 * 10')
+    session.execute('half = 1 / 2')
+    # What a negative number to a fractional power used to leave behind
+    session.variables['ans'] = 1j
+    message = session.execute(':mode exact')
+    assert message.splitlines() == ["✅ Mode: exact", "⚠️ Could not convert: ans, huge"]
+    assert session.execute('half * 3') == '= 3/2 (≈ 1.5)'
+
+
+def test_bad_lines_do_not_end_the_session(capsys):
+    session = CalculatorSession(history_path=None)
+    run_lines(session, ['1 / 0', '(-8) ** 0.5', ':mode decimal 0', '(' * 5000 + '1' + ')' * 5000,
+                        ':nonsense', '6 * 7'])
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.startswith("❌ Error") for line in lines[1:6]] == [True] * 5
+    assert lines[6] == '= 42.0'
+    assert session.mode == 'float'
+
+
+def test_history_is_kept_between_sessions(tmp_path):
+    path = str(tmp_path / 'history')
+    session = CalculatorSession(history_path=path)
+    for line in ('1 + 1', '1 + 1', '2 * 3'):
+        session.execute(line)
+    session.close()
+    assert read_history(path) == ['1 + 1', '2 * 3']
+    assert CalculatorSession(history_path=path).history == ['1 + 1', '2 * 3']
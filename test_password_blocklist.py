@@ -0,0 +1,45 @@
+# test_password_blocklist.py
+import pytest
+
+from password_blocklist import HEADER, MAGIC, Blocklist, build_blocklist
+
+WORDS = [b'password', b'123456', b'qwerty', b'letmein']
+
+
+@pytest.fixture
+def blocklist_path(tmp_path):
+    path = str(tmp_path / 'blocklist.bloom')
+    build_blocklist(WORDS, len(WORDS), path)
+    return path
+
+
+def write_header(path, num_bits, num_hashes, data_size):
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, num_bits, 1, num_hashes) + bytes(data_size))
+
+
+def test_blocks_the_words_it_was_built_from(blocklist_path):
+    with Blocklist(blocklist_path) as blocklist:
+        assert all(word.decode() in blocklist for word in WORDS)
+        assert blocklist.count == len(WORDS)
+
+
+@pytest.mark.parametrize('num_bits, num_hashes, data_size', [
+    (0, 3, 0),
+    (64, 0, 8),
+    (64, 3, 4),
+    (64, 3, 16),
+])
+def test_rejects_a_damaged_header(tmp_path, num_bits, num_hashes, data_size):
+    path = str(tmp_path / 'bad.bloom')
+    write_header(path, num_bits, num_hashes, data_size)
+    with pytest.raises(ValueError, match="damaged"):
+        Blocklist(path)
+
+
+@pytest.mark.parametrize('content', [b'', b'PWBLOOM1', b'x' * 64])
+def test_rejects_other_files(tmp_path, content):
+    path = tmp_path / 'other.bloom'
+    path.write_bytes(content)
+    with pytest.raises(ValueError, match="not a password blocklist"):
+        Blocklist(str(path))
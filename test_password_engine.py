@@ -0,0 +1,25 @@
+# test_password_engine.py
+from collections import Counter
+
+from password_engine import MIN_ACCEPTANCE, PasswordEngine, compile_policy
+
+
+def test_strict_policy_finishes_and_meets_minimums():
+    policy = compile_policy(use_special=False, min_digits=12)
+    assert policy.acceptance(16) < MIN_ACCEPTANCE
+    passwords = list(PasswordEngine(policy).generate_many(500, 16))
+    assert len(passwords) == 500
+    assert all(len(password) == 16 and policy.accepts(password) for password in passwords)
+
+
+def test_minimums_filling_the_whole_length():
+    policy = compile_policy(use_uppercase=False, use_special=False, min_lower=4, min_digits=4)
+    for password in PasswordEngine(policy).generate_many(200, 8):
+        counts = Counter('digit' if c.isdigit() else 'lower' for c in password)
+        assert counts == {'digit': 4, 'lower': 4}
+
+
+def test_default_policy_keeps_filtering_random_candidates():
+    policy = compile_policy()
+    assert policy.acceptance(12) >= MIN_ACCEPTANCE
+    assert all(policy.accepts(password) for password in PasswordEngine(policy).generate_many(500, 12))
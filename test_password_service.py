@@ -0,0 +1,57 @@
+# test_password_service.py
+import asyncio
+import json
+
+import pytest
+
+from password_service import PasswordService
+
+
+def exchange(lines, limit=2 ** 16):
+    """Send request lines to a fresh service; returns the header and passwords of each answer"""
+    async def run():
+        service = PasswordService(pool_size=10)
+        server = await asyncio.start_server(service.handle, '127.0.0.1', 0, limit=limit)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        answers = []
+        for line in lines:
+            writer.write(line.encode() + b'\n')
+            await writer.drain()
+            header = json.loads(await reader.readline())
+            passwords = [(await reader.readline()).decode().rstrip('\n') for _ in range(header.get('count', 0))]
+            answers.append((header, passwords))
+        writer.close()
+        await writer.wait_closed()
+        # Let the handler see the hang-up before the loop goes away
+        await asyncio.sleep(0.01)
+        server.close()
+        await server.wait_closed()
+        return answers
+    return asyncio.run(run())
+
+
+def test_serves_passwords_for_a_policy():
+    [(header, passwords)] = exchange(['{"count": 3, "length": 10, "special": false, "min_digits": 2}'])
+    assert header == {'count': 3}
+    assert all(len(p) == 10 and p.isalnum() and sum(c.isdigit() for c in p) >= 2 for p in passwords)
+
+
+@pytest.mark.parametrize('request_line, message', [
+    ('{"special": "no"}', "special must be true or false"),
+    ('{"min_digits": "3"}', "min_digits must be a whole number"),
+    ('{"min_digits": true}', "min_digits must be a whole number"),
+    ('{"count": 2.5}', "count must be a whole number"),
+    ('{"colour": 1}', "Unknown option(s): colour"),
+    ('[1]', "Request must be a JSON object"),
+])
+def test_rejects_badly_typed_options(request_line, message):
+    [(header, _)] = exchange([request_line])
+    assert header == {'error': message}
+
+
+def test_overlong_line_is_answered_and_skipped():
+    long_request = json.dumps({'count': 1, 'symbols': '!' * 5000})
+    answers = exchange([long_request, '{"count": 2}'], limit=1024)
+    assert answers[0][0] == {'error': "Request line is too long"}
+    assert answers[1][0] == {'count': 2}
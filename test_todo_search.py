@@ -0,0 +1,73 @@
+# test_todo_search.py
+import pytest
+
+from todo_search import task_matches, tokenize
+from todo_storage import JsonStorage
+from todo_store import TodoStore
+
+TASKS = ['Buy milk', 'Write the quarterly report', 'Call mom about the report', 'Book flight']
+
+
+def make_todo(todo_id, task):
+    return {'id': todo_id, 'task': task, 'priority': 'medium', 'category': 'general',
+            'created_at': '2024-01-01T00:00:00', 'completed': False, 'completed_at': None}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TodoStore(JsonStorage(str(tmp_path / 'todos.json'), source=lambda: store.records()))
+    store.add_many([make_todo(i, task) for i, task in enumerate(TASKS, 1)])
+    return store
+
+
+def build(index):
+    while not index.build_step(limit=2):
+        pass
+
+
+def test_tokens_and_prefix_matching():
+    assert tokenize("Call Mom, re: report_v2") == ['call', 'mom', 're', 'report_v2']
+    assert task_matches('Write the quarterly report', ['rep', 'quart'])
+    assert not task_matches('Write the quarterly report', ['rep', 'mom'])
+
+
+def test_search_matches_every_word_prefix(store):
+    build(store.search_index)
+    assert store.search_index.search('rep') == {2, 3}
+    assert store.search_index.search('REP mo') == {3}
+    assert store.search_index.search('xyz') == set()
+    assert store.search_index.search('  ') is None
+
+
+def test_search_waits_for_nothing_while_the_index_builds(store):
+    store.search_index.reset()
+    store.search_index.build_step(limit=1)
+    assert store.search_index.search('rep') is None
+    assert [todo['id'] for todo in store.filter(text='rep')] == [2, 3]
+
+
+def test_changes_during_and_after_the_build_are_indexed(store):
+    index = store.search_index
+    index.reset()
+    index.build_step(limit=1)
+    store.update(1, task='Buy oat milk')
+    store.add(make_todo(5, 'Zebra crossing'))
+    store.delete(4)
+    build(index)
+    assert index._vocabulary == sorted(index._vocabulary)
+    assert index.search('oat') == {1}
+    assert index.search('zeb') == {5}
+    assert index.search('flight') == set()
+
+    store.update(5, task='Apple pie')
+    store.add(make_todo(6, 'Aardvark'))
+    assert index._vocabulary == sorted(index._vocabulary)
+    assert index.search('zeb') == set()
+    assert index.search('a') == {3, 5, 6}
+    assert [todo['id'] for todo in store.filter(text='a')] == [3, 5, 6]
+
+
+def test_clear_empties_the_index(store):
+    build(store.search_index)
+    store.clear()
+    assert store.search_index.search('rep') == set()
@@ -0,0 +1,93 @@
+# test_todo_sqlite.py
+import json
+import os
+
+import pytest
+
+import todo_sqlite
+from todo_core import add_task
+from todo_sqlite import SqliteTodoStore, import_json
+
+
+def make_todo(todo_id, task='task', **fields):
+    todo = {'id': todo_id, 'task': task, 'priority': 'medium', 'category': 'general',
+            'created_at': '2024-01-01T00:00:00', 'completed': False, 'completed_at': None}
+    todo.update(fields)
+    return todo
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteTodoStore(str(tmp_path / 'todos.db'))
+    store.load()
+    yield store
+    store.close()
+
+
+def test_filters_and_counts(store):
+    add_task(store, 'buy milk', category='shopping')
+    add_task(store, 'write report', category='work')
+    store.update(2, completed=True)
+    store.commit()
+    assert [todo['task'] for todo in store.filter(completed=False)] == ['buy milk']
+    assert [todo['task'] for todo in store.filter(category='work')] == ['write report']
+    assert [todo['task'] for todo in store.filter(text='rep')] == ['write report']
+    assert store.counts('completed') == {False: 1, True: 1}
+    assert store.stats().completion_rate == 50
+
+
+def test_like_fallback_matches_underscore_literally(store):
+    store.has_fts = False
+    add_task(store, 'a_b task')
+    add_task(store, 'axb task')
+    assert [todo['task'] for todo in store.filter(text='a_b')] == ['a_b task']
+
+
+def test_only_id_conflicts_are_reported_as_duplicates(store):
+    store.add(make_todo(1))
+    with pytest.raises(ValueError, match="Duplicate todo id: 1"):
+        store.add(make_todo(1))
+    with pytest.raises(ValueError, match="Invalid todo"):
+        store.add(make_todo(2, task=None))
+
+
+def test_connections_never_share_an_id(tmp_path):
+    path = str(tmp_path / 'todos.db')
+    first, second = SqliteTodoStore(path), SqliteTodoStore(path)
+    first.load()
+    second.load()
+    add_task(first, 'one')
+    first.commit()
+    add_task(second, 'two')
+    second.commit()
+    assert sorted(todo['id'] for todo in first) == [1, 2]
+    first.close()
+    second.close()
+
+
+def test_locked_database_gives_a_readable_error(tmp_path, monkeypatch):
+    path = str(tmp_path / 'todos.db')
+    first = SqliteTodoStore(path)
+    first.load()
+    monkeypatch.setattr(todo_sqlite, 'BUSY_TIMEOUT', 0.05)
+    second = SqliteTodoStore(path)
+    second.load()
+    first.allocate_id()
+    with pytest.raises(ValueError, match="busy"):
+        second.allocate_id()
+    first.rollback()
+    assert second.allocate_id() == 1
+    first.close()
+    second.close()
+
+
+def test_import_repairs_duplicates_without_touching_the_source(tmp_path, store):
+    source = tmp_path / 'legacy.json'
+    source.write_text(json.dumps([make_todo(1, 'a'), make_todo(1, 'b')]))
+    with open(str(source) + '.log', 'w') as f:
+        f.write(json.dumps({'op': 'add', 'todo': make_todo(4, 'd')}) + '\n')
+    before = sorted(os.listdir(tmp_path)), source.read_bytes()
+
+    assert import_json(store, str(source)) == 3
+    assert sorted((todo['id'], todo['task']) for todo in store) == [(1, 'a'), (4, 'd'), (5, 'b')]
+    assert (sorted(os.listdir(tmp_path)), source.read_bytes()) == before
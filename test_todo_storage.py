@@ -0,0 +1,202 @@
+# test_todo_storage.py
+import json
+import threading
+
+from todo_storage import JournalStorage, LogReplay, read_journal, updated_record
+from todo_store import TodoStore
+
+
+def make_todo(todo_id, task='task', **fields):
+    todo = {'id': todo_id, 'task': task, 'priority': 'medium', 'category': 'general',
+            'created_at': '2024-01-01T00:00:00', 'completed': False, 'completed_at': None}
+    todo.update(fields)
+    return todo
+
+
+def open_journal(path, **kwargs):
+    store = TodoStore(JournalStorage(str(path), source=lambda: store.records(), **kwargs))
+    store.load()
+    return store
+
+
+def test_changes_survive_reopening(tmp_path):
+    path = tmp_path / 'todos.json'
+    store = open_journal(path)
+    for task in ('a', 'b', 'c'):
+        store.add(make_todo(store.allocate_id(), task))
+    store.update(2, task='b2', completed=True)
+    store.delete(3)
+    store.close()
+
+    store = open_journal(path)
+    assert [(todo['id'], todo['task'], todo['completed']) for todo in store] == [(1, 'a', False), (2, 'b2', True)]
+    assert store.allocate_id() == 4
+    store.close()
+
+
+def test_update_with_fields_only_replaces_those():
+    old = make_todo(1, 'old', priority='low')
+    entry = {'op': 'update', 'todo': make_todo(1, 'new', priority='high'), 'fields': ['priority']}
+    assert updated_record(old, entry) == make_todo(1, 'old', priority='high')
+    assert updated_record(old, {'op': 'update', 'todo': make_todo(1, 'new')}) == make_todo(1, 'new')
+
+
+def test_replay_applies_log_to_snapshot_records():
+    replay = LogReplay()
+    replay.add([
+        {'op': 'update', 'todo': make_todo(1, 'x', priority='high'), 'fields': ['priority']},
+        {'op': 'delete', 'id': 2},
+        {'op': 'add', 'todo': make_todo(5, 'e')},
+    ])
+    records = list(replay.records([make_todo(1, 'a'), make_todo(2, 'b'), make_todo(3, 'c')]))
+    assert records == [make_todo(1, 'a', priority='high'), make_todo(3, 'c'), make_todo(5, 'e')]
+    assert replay.next_id == 6
+
+
+def test_concurrent_edits_of_different_fields_are_merged(tmp_path):
+    path = tmp_path / 'todos.json'
+    first = open_journal(path)
+    first.add(make_todo(first.allocate_id(), 'shared'))
+    first.commit()
+    second = open_journal(path)
+
+    first.update(1, task='renamed')
+    first.commit()
+    second.update(1, priority='high')
+    second.commit()
+    assert second.sync() == 1
+    assert first.sync() == 1
+    for store in (first, second):
+        assert store.get(1)['task'] == 'renamed'
+        assert store.get(1)['priority'] == 'high'
+    first.close()
+    second.close()
+
+
+def test_uncommitted_local_edit_stays_on_top(tmp_path):
+    path = tmp_path / 'todos.json'
+    first = open_journal(path)
+    first.add(make_todo(first.allocate_id(), 'a'))
+    first.commit()
+    second = open_journal(path)
+
+    second.update(1, task='mine')
+    first.update(1, task='theirs')
+    first.commit()
+    second.sync()
+    assert second.get(1)['task'] == 'mine'
+    second.commit()
+    first.sync()
+    assert first.get(1)['task'] == 'mine'
+    first.close()
+    second.close()
+
+
+def test_ids_are_unique_across_instances(tmp_path):
+    path = tmp_path / 'todos.json'
+    first, second = open_journal(path), open_journal(path)
+    ids = [store.allocate_id() for store in (first, second, first, second)]
+    assert len(set(ids)) == 4
+    first.close()
+    second.close()
+
+
+def test_compaction_keeps_edits_not_read_yet(tmp_path):
+    path = tmp_path / 'todos.json'
+    first = open_journal(path)
+    first.add(make_todo(first.allocate_id(), 'a'))
+    first.commit()
+    second = open_journal(path)
+    second.add(make_todo(second.allocate_id(), 'from second'))
+    second.commit()
+
+    # first has not synced, so its memory lacks the second record
+    first.storage.compact()
+    first.close()
+    second.close()
+    todos, _ = read_journal(str(path))
+    assert sorted(todo['task'] for todo in todos) == ['a', 'from second']
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    path = tmp_path / 'todos.json'
+    with open(str(path) + '.log', 'w') as f:
+        f.write(json.dumps({'op': 'add', 'todo': make_todo(1, 'kept')}) + '\n')
+        f.write('{"op": "add", "todo": {"id": 2, "ta')
+    store = open_journal(path)
+    assert [todo['task'] for todo in store] == ['kept']
+    store.add(make_todo(store.allocate_id(), 'next'))
+    store.close()
+    store = open_journal(path)
+    assert [todo['task'] for todo in store] == ['kept', 'next']
+    store.close()
+
+
+def test_legacy_duplicate_ids_are_rekeyed(tmp_path):
+    path = tmp_path / 'todos.json'
+    path.write_text(json.dumps([make_todo(1, 'a'), make_todo(1, 'b'), make_todo(2, 'c')]))
+    store = open_journal(path)
+    assert sorted((todo['id'], todo['task']) for todo in store) == [(1, 'a'), (2, 'c'), (3, 'b')]
+    store.close()
+
+
+def test_operations_logged_during_a_commit_are_kept(tmp_path):
+    path = tmp_path / 'todos.json'
+    store = open_journal(path, compact_every=10 ** 9)
+    storage = store.storage
+    count = 20000
+    writer = threading.Thread(target=lambda: [storage.log_delete(i) for i in range(count)])
+    writer.start()
+    while writer.is_alive():
+        storage.commit()
+    storage.commit()
+    with open(storage.log_filename) as f:
+        assert sum(1 for _ in f) == count
+    store.close()
+
+
+def test_short_runs_do_not_skip_ids(tmp_path):
+    path = tmp_path / 'todos.json'
+    for tasks in (('a', 'b'), ('c', 'd')):
+        store = open_journal(path)
+        store.add_many([make_todo(store.allocate_id(), task) for task in tasks])
+        store.close()
+    store = open_journal(path)
+    assert [todo['id'] for todo in store] == [1, 2, 3, 4]
+    store.close()
+
+
+def test_unused_ids_stay_reserved_once_another_instance_reserved_after_them(tmp_path):
+    path = tmp_path / 'todos.json'
+    first, second = open_journal(path), open_journal(path)
+    taken = [first.allocate_id() for _ in range(3)]
+    other = second.allocate_id()
+    first.close()
+    assert second.allocate_id() not in taken + [other]
+    second.close()
+
+
+def test_edits_during_a_bulk_commit_on_another_thread_are_kept(tmp_path):
+    path = tmp_path / 'todos.json'
+    store = open_journal(path, compact_every=100)
+    store.add_many([make_todo(store.allocate_id(), f"task {i}") for i in range(500)])
+    done = threading.Event()
+
+    def flush():
+        while not done.is_set():
+            store.storage.commit()
+    flusher = threading.Thread(target=flush)
+    flusher.start()
+    for round in range(3):
+        for todo_id in range(1, 501):
+            store.update(todo_id, task=f"task {todo_id} edit {round}")
+        if round == 1:
+            store.add_many([make_todo(store.allocate_id(), 'late bulk') for _ in range(200)])
+    done.set()
+    flusher.join()
+    expected = sorted((todo['id'], todo['task']) for todo in store)
+    store.close()
+
+    store = open_journal(path)
+    assert sorted((todo['id'], todo['task']) for todo in store) == expected
+    store.close()
@@ -0,0 +1,261 @@
+# tk_profiler.py
+"""Opt-in latency profiling for the Tkinter apps
+
+Times every Tk callback (button commands, key bindings, variable traces and
+``after`` jobs) plus any extra functions handed to ``wrap``, and watches the
+main loop with a heartbeat: when a beat arrives late, the loop was blocked
+and the slowest handler since the previous beat is blamed for the stall.
+    python to_do_list.py --profile todo_profile.json
+    python pg.py --debug-panel
+Nothing is patched unless a profiler is created, so the apps pay nothing
+when profiling is off.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+import tkinter as tk
+from collections import deque
+from tkinter import scrolledtext
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Upper bucket edges in milliseconds; the last bucket catches everything slower
+BUCKET_EDGES = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+HEARTBEAT_MS = 50
+# A heartbeat this much later than scheduled counts as a main-loop stall
+STALL_MS = 100
+MAX_STALLS = 200
+PANEL_REFRESH_MS = 1000
+
+
+def callback_name(func: Callable) -> str:
+    """Readable name of a callback: the qualified name, or the source line of a lambda"""
+    func = getattr(func, '__func__', func)
+    name = getattr(func, '__qualname__', None) or repr(func)
+    code = getattr(func, '__code__', None)
+    if code is not None and '<lambda>' in name:
+        return f"lambda ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return name
+
+
+def after_target(func: Callable) -> Callable:
+    """The function an ``after`` job runs; tkinter registers a ``callit`` closure around it"""
+    code = getattr(func, '__code__', None)
+    if code is None or code.co_name != 'callit' or not func.__closure__:
+        return func
+    cells = dict(zip(code.co_freevars, func.__closure__))
+    return cells['func'].cell_contents if 'func' in cells else func
+
+
+class LatencyHistogram:
+    """Call count, total, worst case and bucketed distribution of one handler's latency"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_EDGES) + 1)
+
+    def add(self, ms: float):
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+        self.buckets[bisect.bisect_left(BUCKET_EDGES, ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper edge of the bucket holding the given fraction of calls (the max for the last one)"""
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted and count:
+                return BUCKET_EDGES[index] if index < len(BUCKET_EDGES) else self.max
+        return 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [f"<={edge}" for edge in BUCKET_EDGES] + [f">{BUCKET_EDGES[-1]}"]
+        return {
+            'count': self.count,
+            'total_ms': round(self.total, 3),
+            'mean_ms': round(self.total / self.count, 3) if self.count else 0.0,
+            'max_ms': round(self.max, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets_ms': {label: count for label, count in zip(labels, self.buckets) if count},
+        }
+
+
+class TkProfiler:
+    """Handler latency histograms and main-loop stall detection for one Tk root
+
+    Create it before the widgets so their callbacks get timed: it replaces
+    ``tkinter.CallWrapper``, through which Tk calls every Python callback
+    registered from then on. ``uninstall`` puts everything back. Recording
+    is thread-safe, so wrapped disk writes on worker threads are counted too.
+    """
+
+    def __init__(self, root: tk.Misc, heartbeat_ms: int = HEARTBEAT_MS, stall_ms: float = STALL_MS):
+        self.root = root
+        self.heartbeat_ms = heartbeat_ms
+        self.stall_ms = stall_ms
+        self.started = time.perf_counter()
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.lag = LatencyHistogram()
+        self.stalls: Deque[Dict[str, Any]] = deque(maxlen=MAX_STALLS)
+        self.stall_count = 0
+        self._lock = threading.Lock()
+        self._main_thread = threading.get_ident()
+        self._slowest: Tuple[float, Optional[str]] = (0.0, None)
+        self._wrapped: List[Tuple[Any, str, Optional[Callable]]] = []
+        self._panel = None
+        self._original_call_wrapper = tk.CallWrapper
+        self._install()
+        self._expected = time.perf_counter() + heartbeat_ms / 1000
+        self._heartbeat_job = root.after(heartbeat_ms, self._heartbeat)
+        root.bind('<F12>', self._panel_key, add='+')
+
+    def _install(self):
+        profiler = self
+
+        class TimedCallWrapper(self._original_call_wrapper):
+            def __init__(self, func, subst, widget):
+                super().__init__(func, subst, widget)
+                target = after_target(func)
+                # The profiler's own heartbeat and panel refreshes are not timed
+                self.name = None if getattr(target, '__self__', None) is profiler else callback_name(target)
+
+            def __call__(self, *args):
+                if self.name is None:
+                    return super().__call__(*args)
+                start = time.perf_counter()
+                try:
+                    return super().__call__(*args)
+                finally:
+                    profiler.record(self.name, time.perf_counter() - start)
+
+        tk.CallWrapper = TimedCallWrapper
+
+    def record(self, name: str, seconds: float):
+        ms = seconds * 1000
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.add(ms)
+        if threading.get_ident() == self._main_thread and ms > self._slowest[0]:
+            self._slowest = (ms, name)
+
+    def wrap(self, owner: Any, *names: str, prefix: str = ''):
+        """Time calls to ``owner.<name>`` (an object's method or a module function)
+
+        Use it for work that Tk does not call directly, like a handler's
+        helpers or a storage backend's writes. Names are recorded as
+        ``prefix`` followed by the callback name.
+        """
+        for name in names:
+            original = getattr(owner, name)
+            label = prefix + callback_name(original)
+
+            def timed(*args, _original=original, _label=label, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return _original(*args, **kwargs)
+                finally:
+                    self.record(_label, time.perf_counter() - start)
+
+            # Methods found on the class are shadowed, so undoing means deleting
+            self._wrapped.append((owner, name, original if name in vars(owner) else None))
+            setattr(owner, name, timed)
+
+    def _heartbeat(self):
+        now = time.perf_counter()
+        late = (now - self._expected) * 1000
+        self.lag.add(max(late, 0.0))
+        if late >= self.stall_ms:
+            self.stall_count += 1
+            self.stalls.append({
+                'at_s': round(now - self.started, 3),
+                'late_ms': round(late, 1),
+                'slowest_handler': self._slowest[1],
+                'slowest_handler_ms': round(self._slowest[0], 1),
+            })
+        self._slowest = (0.0, None)
+        self._expected = now + self.heartbeat_ms / 1000
+        self._heartbeat_job = self.root.after(self.heartbeat_ms, self._heartbeat)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Everything recorded so far, as JSON-ready data"""
+        with self._lock:
+            handlers = {name: histogram.to_dict() for name, histogram in self.histograms.items()}
+        return {
+            'duration_s': round(time.perf_counter() - self.started, 3),
+            'handlers': dict(sorted(handlers.items(), key=lambda item: -item[1]['total_ms'])),
+            'main_loop': {
+                'heartbeat_ms': self.heartbeat_ms,
+                'stall_threshold_ms': self.stall_ms,
+                'lag': self.lag.to_dict(),
+                'stall_count': self.stall_count,
+                'stalls': list(self.stalls),
+            },
+        }
+
+    def report(self, limit: int = 30) -> str:
+        """Text table of the handlers that took the most time, then the latest stalls"""
+        data = self.snapshot()
+        lines = [f"{'handler':48} {'calls':>7} {'total ms':>10} {'mean':>8} {'p95':>8} {'max':>9}"]
+        for name, stats in list(data['handlers'].items())[:limit]:
+            lines.append(f"{name[:48]:48} {stats['count']:>7} {stats['total_ms']:>10.1f} "
+                         f"{stats['mean_ms']:>8.2f} {stats['p95_ms']:>8} {stats['max_ms']:>9.1f}")
+        loop = data['main_loop']
+        lines.append("")
+        lines.append(f"Main-loop stalls over {self.stall_ms:.0f} ms: {loop['stall_count']}  |  "
+                     f"worst heartbeat delay: {loop['lag']['max_ms']:.1f} ms")
+        for stall in list(self.stalls)[-10:]:
+            lines.append(f"  at {stall['at_s']:.1f}s: {stall['late_ms']:.0f} ms late, "
+                         f"slowest handler {stall['slowest_handler']} ({stall['slowest_handler_ms']} ms)")
+        return '\n'.join(lines)
+
+    def dump(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def show_panel(self):
+        """Open a window with the live report, refreshed every second"""
+        if self._panel is not None and self._panel.winfo_exists():
+            self._panel.lift()
+            return
+        self._panel = tk.Toplevel(self.root)
+        self._panel.title("Handler latency")
+        self._panel.geometry("860x420")
+        text = scrolledtext.ScrolledText(self._panel, font=('Courier', 9), wrap=tk.NONE)
+        text.pack(fill=tk.BOTH, expand=True)
+        self._panel_text = text
+        self._refresh_panel()
+
+    def _panel_key(self, event):
+        self.show_panel()
+
+    def _refresh_panel(self):
+        if self._panel is None or not self._panel.winfo_exists():
+            self._panel = None
+            return
+        self._panel_text.delete('1.0', tk.END)
+        self._panel_text.insert('1.0', self.report())
+        self._panel.after(PANEL_REFRESH_MS, self._refresh_panel)
+
+    def uninstall(self):
+        """Stop the heartbeat and undo every patch"""
+        try:
+            self.root.after_cancel(self._heartbeat_job)
+        except tk.TclError:
+            pass
+        tk.CallWrapper = self._original_call_wrapper
+        for owner, name, original in reversed(self._wrapped):
+            if original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._wrapped = []
@@ -1,36 +1,145 @@
 # todo_gui.py
+import argparse
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-import json
-import os
-from datetime import datetime
-from typing import List, Dict, Any
+import todo_storage
+from tk_profiler import TkProfiler
+from todo_core import DEFAULT_FILENAME, add_task, complete_task, edit_task, open_store
+from todo_sqlite import SqliteTodoStore, import_json
+from todo_view import TodoListView
+from todo_stats import format_duration
+
+# Helpers timed with --profile on top of the Tk callbacks themselves
+PROFILED_METHODS = ('refresh_list', 'update_status', 'save_todos', 'get_selected_todo')
+# How often to look for changes other instances saved to the same file
+SYNC_INTERVAL_MS = 1000
 
 class TodoAppGUI:
-    def __init__(self, root):
+    def __init__(self, root, db=None):
         self.root = root
         self.root.title("Todo List Manager")
         self.root.geometry("800x600")
-        self.filename = "todos_gui.json"
-        self.todos = self.load_todos()
+        self.filename = db or DEFAULT_FILENAME
+        self.loading = False
+        self.load_todos(db)
+        self.stats = self.store.stats()
         
         self.setup_ui()
         self.refresh_list()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        if db:
+            self.build_search_index()
+        else:
+            self.start_loading()
+        self.root.after(SYNC_INTERVAL_MS, self.watch_file)
+    
+    def load_todos(self, db=None):
+        """Open the todo store: SQLite with ``db``, else the JSON snapshot plus change log
+
+        The JSON file is not read here; ``start_loading`` streams it in once
+        the window is up.
+        """
+        self.store = open_store(filename=self.filename, db=db, write_behind=True,
+                                on_error=self.report_save_error, load=bool(db))
     
-    def load_todos(self) -> List[Dict[str, Any]]:
-        """Load todos from JSON file"""
-        if os.path.exists(self.filename):
+    def start_loading(self):
+        """Parse the JSON file on a worker thread and insert it in slices"""
+        self.loading = True
+        self.set_editing_enabled(False)
+        self._loaded_batches = queue.Queue()
+        batches = self.store.start_load()
+        
+        def read():
             try:
-                with open(self.filename, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, FileNotFoundError):
-                return []
-        return []
+                for batch in batches:
+                    self._loaded_batches.put(batch)
+            except Exception as e:
+                self._loaded_batches.put(e)
+            else:
+                self._loaded_batches.put(None)
+        
+        threading.Thread(target=read, name='todo-loader', daemon=True).start()
+        self.root.after(1, self.drain_loaded_batches)
+    
+    def drain_loaded_batches(self):
+        """Insert parsed batches for up to 50 ms, then yield to the event loop"""
+        deadline = time.monotonic() + 0.05
+        while time.monotonic() < deadline:
+            try:
+                batch = self._loaded_batches.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                self.finish_loading()
+                return
+            if isinstance(batch, Exception):
+                messagebox.showerror("Error", f"Failed to load todos: {batch}")
+                self.on_close()
+                return
+            self.store.load_batch(batch)
+            if self.list_view.total < self.list_view.page_size:
+                # Paint rows until the first page is full; after that only
+                # the counters move until loading is done
+                self.refresh_list()
+        self.update_status()
+        self.root.after(1, self.drain_loaded_batches)
+    
+    def finish_loading(self):
+        """Repair the loaded list, unlock editing and show the full list"""
+        self.store.finish_load()
+        self.loading = False
+        self.set_editing_enabled(True)
+        self.refresh_list()
+        self.build_search_index()
+        backup = self.store.storage.corrupt_backup
+        if backup:
+            messagebox.showwarning(
+                "Warning",
+                f"{self.filename} was damaged. {len(self.store)} todos were recovered; "
+                f"the original file was saved as {backup}.")
+    
+    def set_editing_enabled(self, enabled):
+        """Lock the widgets that change todos while the list is still loading"""
+        for widget in self.editing_widgets:
+            widget.state(['!disabled'] if enabled else ['disabled'])
     
     def save_todos(self):
-        """Save todos to JSON file"""
-        with open(self.filename, 'w') as f:
-            json.dump(self.todos, f, indent=2)
+        """Persist the changes logged since the last save"""
+        self.store.commit()
+    
+    def watch_file(self):
+        """Merge in what other instances saved since the last look
+
+        Only the new part of the change log is read; the whole file is
+        loaded again only if another instance rewrote it in a way that
+        cannot be followed.
+        """
+        if not self.loading:
+            try:
+                changed = self.store.sync()
+            except OSError:
+                # The file may be mid-rotation or briefly unreadable; try again next time
+                changed = 0
+            if changed is None:
+                self.start_loading()
+            elif changed:
+                self.refresh_list()
+        self.root.after(SYNC_INTERVAL_MS, self.watch_file)
+    
+    def report_save_error(self, error):
+        """Show a background save failure on the Tk thread"""
+        self.root.after(0, lambda: messagebox.showerror("Error", f"Failed to save todos: {error}"))
+    
+    def on_close(self):
+        """Flush storage and close the window"""
+        try:
+            self.store.close()
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save todos: {e}")
+        self.root.destroy()
     
     def setup_ui(self):
         """Setup the user interface"""
@@ -79,6 +188,7 @@ class TodoAppGUI:
         # Add button
         add_btn = ttk.Button(input_frame, text="Add Todo", command=self.add_todo)
         add_btn.grid(row=3, column=0, pady=(5, 10))
+        self.editing_widgets = [self.task_entry, add_btn]
         
         # Filter frame
         filter_frame = ttk.Frame(main_frame)
@@ -89,15 +199,22 @@ class TodoAppGUI:
         filter_combo = ttk.Combobox(filter_frame, textvariable=self.filter_var,
                                    values=["all", "pending", "completed"], state="readonly", width=10)
         filter_combo.grid(row=0, column=1, padx=(0, 20))
-        filter_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh_list())
+        filter_combo.bind('<<ComboboxSelected>>', lambda e: self.on_filter_changed())
         
         ttk.Label(filter_frame, text="Category:").grid(row=0, column=2, padx=(0, 10))
         self.category_filter_var = tk.StringVar(value="all")
         category_filter_combo = ttk.Combobox(filter_frame, textvariable=self.category_filter_var,
                                            values=["all", "general", "work", "personal", "shopping", "health"], 
                                            state="readonly", width=10)
-        category_filter_combo.grid(row=0, column=3)
-        category_filter_combo.bind('<<ComboboxSelected>>', lambda e: self.refresh_list())
+        category_filter_combo.grid(row=0, column=3, padx=(0, 20))
+        category_filter_combo.bind('<<ComboboxSelected>>', lambda e: self.on_filter_changed())
+        
+        ttk.Label(filter_frame, text="Search:").grid(row=0, column=4, padx=(0, 10))
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(filter_frame, textvariable=self.search_var, width=25)
+        search_entry.grid(row=0, column=5)
+        search_entry.bind('<KeyRelease>', lambda e: self.schedule_search())
+        self._search_job = None
         
         # Treeview for todos
         columns = ('id', 'task', 'priority', 'category', 'status', 'created')
@@ -125,36 +242,51 @@ class TodoAppGUI:
         scrollbar = ttk.Scrollbar(main_frame, orient=tk.VERTICAL, command=self.tree.yview)
         scrollbar.grid(row=3, column=3, sticky=(tk.N, tk.S))
         self.tree.configure(yscrollcommand=scrollbar.set)
+        self.list_view = TodoListView(self.tree)
         
         # Button frame
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=4, column=0, columnspan=3, pady=10)
         
-        ttk.Button(button_frame, text="Mark Complete", command=self.complete_todo).grid(row=0, column=0, padx=5)
-        ttk.Button(button_frame, text="Delete", command=self.delete_todo).grid(row=0, column=1, padx=5)
-        ttk.Button(button_frame, text="Edit", command=self.edit_todo).grid(row=0, column=2, padx=5)
+        for column, (text, command) in enumerate([("Mark Complete", self.complete_todo),
+                                                  ("Delete", self.delete_todo),
+                                                  ("Edit", self.edit_todo)]):
+            button = ttk.Button(button_frame, text=text, command=command)
+            button.grid(row=0, column=column, padx=5)
+            self.editing_widgets.append(button)
         ttk.Button(button_frame, text="Statistics", command=self.show_stats).grid(row=0, column=3, padx=5)
         ttk.Button(button_frame, text="Refresh", command=self.refresh_list).grid(row=0, column=4, padx=5)
-        ttk.Button(button_frame, text="Clear All", command=self.clear_all).grid(row=0, column=5, padx=5)
+        clear_btn = ttk.Button(button_frame, text="Clear All", command=self.clear_all)
+        clear_btn.grid(row=0, column=5, padx=5)
+        self.editing_widgets.append(clear_btn)
+        
+        # Pager frame
+        pager_frame = ttk.Frame(main_frame)
+        pager_frame.grid(row=5, column=0, columnspan=3)
+        
+        ttk.Button(pager_frame, text="◀ Prev", command=self.previous_page).grid(row=0, column=0, padx=5)
+        self.page_label = ttk.Label(pager_frame, text="")
+        self.page_label.grid(row=0, column=1, padx=10)
+        ttk.Button(pager_frame, text="Next ▶", command=self.next_page).grid(row=0, column=2, padx=5)
+        
+        # Status bar
+        self.status_label = ttk.Label(main_frame, text="", anchor=tk.W)
+        self.status_label.grid(row=6, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=(10, 0))
     
     def add_todo(self):
         """Add a new todo"""
+        if self.loading:
+            return
         task = self.task_entry.get().strip()
         if not task:
             messagebox.showwarning("Warning", "Please enter a task!")
             return
         
-        todo = {
-            'id': len(self.todos) + 1,
-            'task': task,
-            'priority': self.priority_var.get(),
-            'category': self.category_var.get(),
-            'created_at': datetime.now().isoformat(),
-            'completed': False,
-            'completed_at': None
-        }
-        
-        self.todos.append(todo)
+        try:
+            add_task(self.store, task, self.priority_var.get(), self.category_var.get())
+        except ValueError as e:
+            messagebox.showerror("Error", f"Could not add the todo: {e}")
+            return
         self.save_todos()
         self.refresh_list()
         self.task_entry.delete(0, tk.END)
@@ -162,36 +294,60 @@ class TodoAppGUI:
     
     def refresh_list(self):
         """Refresh the todo list display"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Filter todos
-        filtered_todos = self.todos
-        
-        # Status filter
-        if self.filter_var.get() == "pending":
-            filtered_todos = [todo for todo in filtered_todos if not todo['completed']]
-        elif self.filter_var.get() == "completed":
-            filtered_todos = [todo for todo in filtered_todos if todo['completed']]
-        
-        # Category filter
-        if self.category_filter_var.get() != "all":
-            filtered_todos = [todo for todo in filtered_todos if todo['category'] == self.category_filter_var.get()]
-        
-        # Add to treeview
-        for todo in filtered_todos:
-            status = "Completed" if todo['completed'] else "Pending"
-            created_date = datetime.fromisoformat(todo['created_at']).strftime("%Y-%m-%d")
-            
-            self.tree.insert('', tk.END, values=(
-                todo['id'],
-                todo['task'],
-                todo['priority'].title(),
-                todo['category'].title(),
-                status,
-                created_date
-            ))
+        # Filter todos through the store indexes
+        completed = {"pending": False, "completed": True}.get(self.filter_var.get())
+        category = self.category_filter_var.get()
+        filtered_todos = self.store.filter(
+            completed=completed,
+            category=None if category == "all" else category,
+            text=self.search_var.get()
+        )
+        
+        # Apply only the rows of the current page that changed
+        self.list_view.render(filtered_todos)
+        self.page_label.config(text=self.list_view.describe())
+        self.update_status()
+    
+    def update_status(self):
+        """Show live totals from the statistics aggregator"""
+        stats = self.stats
+        loading = "Loading…  " if self.loading else ""
+        self.status_label.config(
+            text=f"{loading}Total: {stats.total}  |  Completed: {stats.completed}  |  "
+                 f"Pending: {stats.pending}  |  "
+                 f"Avg. completion time: {format_duration(stats.average_completion_seconds)}"
+        )
+    
+    def on_filter_changed(self):
+        """Jump back to the first page when a filter changes"""
+        self.list_view.page = 0
+        self.refresh_list()
+    
+    def schedule_search(self):
+        """Debounce type-ahead so fast typing runs a single search"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(150, self.run_search)
+    
+    def run_search(self):
+        self._search_job = None
+        self.on_filter_changed()
+    
+    def build_search_index(self):
+        """Build the in-memory search index in slices between UI events"""
+        index = self.store.search_index
+        if index is not None and not index.build_step():
+            self.root.after(1, self.build_search_index)
+    
+    def next_page(self):
+        """Show the next page of todos"""
+        if self.list_view.next_page():
+            self.refresh_list()
+    
+    def previous_page(self):
+        """Show the previous page of todos"""
+        if self.list_view.previous_page():
+            self.refresh_list()
     
     def get_selected_todo(self):
         """Get the currently selected todo"""
@@ -201,22 +357,19 @@ class TodoAppGUI:
             return None
         
         item = selection[0]
-        todo_id = int(self.tree.item(item)['values'][0])
-        
-        for todo in self.todos:
-            if todo['id'] == todo_id:
-                return todo, item
+        todo_id = int(item)
         
-        return None
+        todo = self.store.get(todo_id)
+        if todo is None:
+            return None
+        return todo, item
     
     def complete_todo(self):
         """Mark selected todo as completed"""
         result = self.get_selected_todo()
         if result:
             todo, item = result
-            if not todo['completed']:
-                todo['completed'] = True
-                todo['completed_at'] = datetime.now().isoformat()
+            if complete_task(self.store, todo['id']) is not None:
                 self.save_todos()
                 self.refresh_list()
                 messagebox.showinfo("Success", f"Completed: {todo['task']}")
@@ -229,7 +382,7 @@ class TodoAppGUI:
         if result:
             todo, item = result
             if messagebox.askyesno("Confirm", f"Delete: {todo['task']}?"):
-                self.todos = [t for t in self.todos if t['id'] != todo['id']]
+                self.store.delete(todo['id'])
                 self.save_todos()
                 self.refresh_list()
     
@@ -268,13 +421,11 @@ class TodoAppGUI:
             status_check.grid(row=3, column=0, columnspan=2, pady=10)
             
             def save_changes():
-                todo['task'] = task_var.get()
-                todo['priority'] = priority_var.get()
-                todo['category'] = category_var.get()
-                todo['completed'] = status_var.get()
-                if todo['completed'] and not todo.get('completed_at'):
-                    todo['completed_at'] = datetime.now().isoformat()
-                
+                edit_task(self.store, todo['id'],
+                          task=task_var.get(),
+                          priority=priority_var.get(),
+                          category=category_var.get(),
+                          completed=status_var.get())
                 self.save_todos()
                 self.refresh_list()
                 edit_window.destroy()
@@ -286,52 +437,82 @@ class TodoAppGUI:
     
     def show_stats(self):
         """Show statistics dialog"""
-        total = len(self.todos)
-        completed = sum(1 for todo in self.todos if todo['completed'])
-        pending = total - completed
-        
-        if total > 0:
-            completion_rate = (completed / total) * 100
-        else:
-            completion_rate = 0
+        stats = self.stats
         
         stats_text = f"""
 📊 Statistics:
 
-Total todos: {total}
-Completed: {completed}
-Pending: {pending}
-Completion rate: {completion_rate:.1f}%
+Total todos: {stats.total}
+Completed: {stats.completed}
+Pending: {stats.pending}
+Completion rate: {stats.completion_rate:.1f}%
+Avg. completion time: {format_duration(stats.average_completion_seconds)}
 
 Categories:
 """
         # Category breakdown
-        categories = {}
-        for todo in self.todos:
-            cat = todo['category']
-            categories[cat] = categories.get(cat, 0) + 1
-        
-        for cat, count in categories.items():
+        for cat, count in stats.categories.items():
             stats_text += f"  {cat.title()}: {count}\n"
         
+        stats_text += "\nPriorities:\n"
+        for priority, count in stats.priorities.items():
+            stats_text += f"  {priority.title()}: {count}\n"
+        
         messagebox.showinfo("Statistics", stats_text)
     
     def clear_all(self):
         """Clear all todos"""
-        if not self.todos:
+        if not self.store:
             messagebox.showinfo("Info", "No todos to clear!")
             return
         
         if messagebox.askyesno("Confirm", "Clear ALL todos? This cannot be undone!"):
-            self.todos = []
+            self.store.clear()
             self.save_todos()
             self.refresh_list()
             messagebox.showinfo("Success", "All todos cleared!")
 
+def instrument(app, profiler):
+    """Time the list helpers and every write to disk, wherever it happens"""
+    profiler.wrap(app, *PROFILED_METHODS)
+    # SQLite stores write in commit(); JSON stores in their journal backend,
+    # which the write-behind wrapper calls from its worker thread
+    storage = getattr(app.store, 'storage', app.store)
+    storage = getattr(storage, 'storage', storage)
+    profiler.wrap(storage, 'commit', prefix='disk: ')
+    profiler.wrap(todo_storage, 'write_snapshot', prefix='disk: ')
+
 def main():
+    parser = argparse.ArgumentParser(description="Todo List Manager")
+    parser.add_argument('--db', nargs='?', const='todos.db', metavar='FILE',
+                        help="keep todos in a SQLite database (default: todos.db)")
+    parser.add_argument('--import-json', metavar='FILE',
+                        help="import todos from a JSON file into the --db database first")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="time every handler and main-loop stall and save the results to FILE on exit")
+    parser.add_argument('--debug-panel', action='store_true',
+                        help="show handler timings in a live window (F12 reopens it)")
+    args = parser.parse_args()
+    
+    if args.import_json:
+        if not args.db:
+            parser.error("--import-json requires --db")
+        store = SqliteTodoStore(args.db)
+        count = import_json(store, args.import_json)
+        store.close()
+        print(f"Imported {count} todos into {args.db}")
+    
     root = tk.Tk()
-    app = TodoAppGUI(root)
+    profiler = TkProfiler(root) if args.profile or args.debug_panel else None
+    app = TodoAppGUI(root, db=args.db)
+    if profiler is not None:
+        instrument(app, profiler)
+        if args.debug_panel:
+            profiler.show_panel()
     root.mainloop()
+    if args.profile:
+        profiler.dump(args.profile)
+        print(f"Handler timings saved to {args.profile}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
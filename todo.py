@@ -0,0 +1,197 @@
+# todo.py
+"""Command-line interface to the todo list used by to_do_list.py
+
+Examples:
+    python todo.py add "Buy milk" --category shopping
+    python todo.py add --from tasks.csv
+    cat ids.txt | python todo.py complete --from -
+    python todo.py export --status pending --format jsonl -o pending.jsonl
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from typing import Dict, Any, Iterator, TextIO
+
+from todo_core import CATEGORIES, DEFAULT_FILENAME, PRIORITIES, complete_task, new_todo, open_store
+
+EXPORT_FIELDS = ['id', 'task', 'priority', 'category', 'created_at', 'completed', 'completed_at']
+
+
+def detect_format(path: str, default: str = 'text') -> str:
+    extension = os.path.splitext(path)[1].lower()
+    return {'.csv': 'csv', '.jsonl': 'jsonl', '.ndjson': 'jsonl'}.get(extension, default)
+
+
+def read_rows(f: TextIO, fmt: str) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per input row; plain text rows only carry ``task``"""
+    if fmt == 'csv':
+        yield from csv.DictReader(f)
+    elif fmt == 'jsonl':
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield {'task': line}
+
+
+def open_input(path: str) -> TextIO:
+    return sys.stdin if path == '-' else open(path, newline='')
+
+
+def iter_ids(args) -> Iterator[int]:
+    yield from args.ids
+    if args.source:
+        fmt = args.format or detect_format(args.source)
+        with open_input(args.source) as f:
+            for row in read_rows(f, fmt):
+                yield int(row.get('id', row.get('task')))
+
+
+def iter_new_todos(store, args) -> Iterator[Dict[str, Any]]:
+    for task in args.tasks:
+        yield new_todo(store, task, args.priority, args.category)
+    if args.source:
+        fmt = args.format or detect_format(args.source)
+        with open_input(args.source) as f:
+            for row in read_rows(f, fmt):
+                task = (row.get('task') or '').strip()
+                if not task:
+                    raise ValueError(f"Row without a task: {row}")
+                yield new_todo(store, task,
+                               row.get('priority') or args.priority,
+                               row.get('category') or args.category)
+
+
+def cmd_add(store, args) -> int:
+    return store.add_many(iter_new_todos(store, args))
+
+
+def cmd_complete(store, args) -> int:
+    count = 0
+    for todo_id in iter_ids(args):
+        if complete_task(store, todo_id) is not None:
+            count += 1
+    return count
+
+
+def cmd_delete(store, args) -> int:
+    count = 0
+    for todo_id in iter_ids(args):
+        store.delete(todo_id)
+        count += 1
+    return count
+
+
+def write_todos(todos, f: TextIO, fmt: str):
+    """Stream todos to ``f`` one row at a time"""
+    if fmt == 'csv':
+        writer = csv.DictWriter(f, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for todo in todos:
+            writer.writerow(todo)
+    elif fmt == 'jsonl':
+        for todo in todos:
+            f.write(json.dumps(todo) + '\n')
+    else:
+        for todo in todos:
+            mark = 'x' if todo['completed'] else ' '
+            f.write(f"{todo['id']:>6}. [{mark}] {todo['task']} ({todo['priority']}, {todo['category']})\n")
+
+
+def cmd_export(store, args):
+    completed = {"pending": False, "completed": True}.get(args.status)
+    todos = store.filter(completed=completed, category=args.category, text=args.search)
+    fmt = args.format or (detect_format(args.output) if args.output else 'text')
+    if args.output and args.output != '-':
+        with open(args.output, 'w', newline='') as f:
+            write_todos(todos, f, fmt)
+    else:
+        write_todos(todos, sys.stdout, fmt)
+
+
+def cmd_stats(store, args):
+    stats = store.stats()
+    print(f"Total todos: {stats.total}")
+    print(f"Completed: {stats.completed}")
+    print(f"Pending: {stats.pending}")
+    print(f"Completion rate: {stats.completion_rate:.1f}%")
+    for cat, count in stats.categories.items():
+        print(f"  {cat}: {count}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='todo', description="Manage the todo list from the command line")
+    parser.add_argument('--file', default=DEFAULT_FILENAME, help=f"JSON todo file (default: {DEFAULT_FILENAME})")
+    parser.add_argument('--db', metavar='FILE', help="use a SQLite database instead of the JSON file")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help="add todos")
+    add.add_argument('tasks', nargs='*', help="task descriptions")
+    add.add_argument('--priority', choices=PRIORITIES, default='medium')
+    add.add_argument('--category', default='general', help=f"e.g. {', '.join(CATEGORIES)}")
+
+    complete = commands.add_parser('complete', help="mark todos completed")
+    delete = commands.add_parser('delete', help="delete todos")
+    for sub in (complete, delete):
+        sub.add_argument('ids', nargs='*', type=int, help="todo ids")
+
+    for sub in (add, complete, delete):
+        sub.add_argument('--from', dest='source', metavar='FILE',
+                         help="read rows from a text, CSV or JSONL file ('-' for stdin)")
+        sub.add_argument('--format', choices=['text', 'csv', 'jsonl'],
+                         help="input format (default: from the file extension, else text)")
+
+    for name in ('list', 'export'):
+        export = commands.add_parser(name, help="print or export todos")
+        export.add_argument('--status', choices=['all', 'pending', 'completed'], default='all')
+        export.add_argument('--category')
+        export.add_argument('--search', help="only tasks with words starting with these")
+        export.add_argument('--format', choices=['text', 'csv', 'jsonl'])
+        export.add_argument('-o', '--output', metavar='FILE')
+
+    commands.add_parser('stats', help="show statistics")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    store = open_store(filename=args.file, db=args.db)
+    if not args.db and store.storage.corrupt_backup:
+        print(f"⚠️ {args.file} was damaged: recovered {len(store)} todos, "
+              f"the original was saved as {store.storage.corrupt_backup}", file=sys.stderr)
+    try:
+        if args.command in ('list', 'export', 'stats'):
+            handler = cmd_stats if args.command == 'stats' else cmd_export
+            try:
+                handler(store, args)
+                sys.stdout.flush()
+            except BrokenPipeError:
+                # Output was piped into something like `head` that stopped reading
+                os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        else:
+            handler = {'add': cmd_add, 'complete': cmd_complete, 'delete': cmd_delete}[args.command]
+            # All changes of one invocation are saved together, or not at all
+            try:
+                count = handler(store, args)
+            except KeyError as e:
+                store.rollback()
+                print(f"❌ Error: no todo with id {e.args[0]}, nothing was saved", file=sys.stderr)
+                return 1
+            except ValueError as e:
+                store.rollback()
+                print(f"❌ Error: {e}, nothing was saved", file=sys.stderr)
+                return 1
+            store.commit()
+            print(f"✅ {args.command.title()}: {count} todo(s)")
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# todo_core.py
+from datetime import datetime
+from typing import Callable, Dict, Any, Optional
+
+from todo_sqlite import SqliteTodoStore
+from todo_storage import JournalStorage, WriteBehind
+from todo_store import TodoStore
+
+DEFAULT_FILENAME = "todos_gui.json"
+PRIORITIES = ["high", "medium", "low"]
+CATEGORIES = ["general", "work", "personal", "shopping", "health"]
+
+
+def open_store(filename: Optional[str] = None, db: Optional[str] = None,
+               write_behind: bool = False,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               load: bool = True):
+    """Open and load a todo store
+
+    With ``db`` the todos live in SQLite, otherwise in ``filename`` (a JSON
+    snapshot plus change log). ``write_behind`` moves file commits to a
+    background thread, reporting failures to ``on_error``. With
+    ``load=False`` a JSON store is returned empty, for the caller to load
+    with ``start_load``.
+    """
+    if db:
+        store = SqliteTodoStore(db)
+    else:
+        storage = JournalStorage(filename or DEFAULT_FILENAME, source=lambda: store.records())
+        if write_behind:
+            storage = WriteBehind(storage, on_error=on_error)
+        store = TodoStore(storage)
+        if not load:
+            return store
+    store.load()
+    return store
+
+
+def new_todo(store, task: str, priority: str = "medium", category: str = "general",
+             **extra) -> Dict[str, Any]:
+    """Build a todo record with the next free id of ``store``"""
+    todo = {
+        'id': store.allocate_id(),
+        'task': task,
+        'priority': priority,
+        'category': category,
+        'created_at': datetime.now().isoformat(),
+        'completed': False,
+        'completed_at': None
+    }
+    todo.update(extra)
+    return todo
+
+
+def add_task(store, task: str, priority: str = "medium", category: str = "general",
+             **extra) -> Dict[str, Any]:
+    """Create a todo with the next free id and add it to ``store``"""
+    return store.add(new_todo(store, task, priority, category, **extra))
+
+
+def complete_task(store, todo_id: int) -> Optional[Dict[str, Any]]:
+    """Mark a todo completed; returns None if it already was"""
+    todo = store.get(todo_id)
+    if todo is None:
+        raise KeyError(todo_id)
+    if todo['completed']:
+        return None
+    return store.update(todo_id, completed=True, completed_at=datetime.now().isoformat())
+
+
+def edit_task(store, todo_id: int, **changes) -> Dict[str, Any]:
+    """Apply edits, stamping completed_at the first time a todo is completed"""
+    todo = store.get(todo_id)
+    if todo is None:
+        raise KeyError(todo_id)
+    if changes.get('completed') and not todo.get('completed_at'):
+        changes['completed_at'] = datetime.now().isoformat()
+    return store.update(todo_id, **changes)
@@ -0,0 +1,131 @@
+# todo_search.py
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def task_matches(task: str, tokens: List[str]) -> bool:
+    """Whether ``task`` has a word starting with each of ``tokens``"""
+    words = tokenize(task)
+    return all(any(word.startswith(token) for word in words) for token in tokens)
+
+
+class SearchIndex:
+    """Inverted index from task tokens to todo ids with prefix matching
+
+    The vocabulary is kept sorted so every token starting with a prefix is
+    one contiguous slice found by bisection. The index follows the store
+    through its change notifications once it has been started; the initial
+    build can be done in small steps with ``build_step`` so it never blocks
+    the event loop. Until then changes are ignored, so headless bulk loads
+    that never search do not pay for tokenizing. During the build the
+    vocabulary is left unsorted and sorted once at the end; only later
+    changes insert their new tokens one by one.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._postings: Dict[str, Set[int]] = {}
+        self._vocabulary: List[str] = []
+        self._doc_tokens: Dict[int, Tuple[str, ...]] = {}
+        self._pending: List[int] = []
+        self._building = False
+        self.active = False
+        store.add_listener(self.record_changed)
+
+    def reset(self):
+        """Forget everything and queue every record in the store for indexing"""
+        self.active = True
+        self._postings.clear()
+        self._vocabulary.clear()
+        self._doc_tokens.clear()
+        self._pending = [todo['id'] for todo in self.store]
+        self._building = True
+
+    @property
+    def ready(self) -> bool:
+        return self.active and not self._pending
+
+    def build_step(self, limit: int = 5000) -> bool:
+        """Index up to ``limit`` queued records; returns True once done"""
+        if not self.active:
+            self.reset()
+        batch, self._pending = self._pending[-limit:], self._pending[:-limit]
+        for todo_id in batch:
+            todo = self.store.get(todo_id)
+            if todo is not None and todo_id not in self._doc_tokens:
+                self._add(todo)
+        if self._building and not self._pending:
+            self._vocabulary = sorted(self._postings)
+            self._building = False
+        return self.ready
+
+    def _add(self, todo: Dict[str, Any]):
+        tokens = tuple(set(tokenize(todo.get('task', ''))))
+        self._doc_tokens[todo['id']] = tokens
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                ids = self._postings[token] = set()
+                if not self._building:
+                    insort(self._vocabulary, token)
+            ids.add(todo['id'])
+
+    def _remove(self, todo_id: int):
+        for token in self._doc_tokens.pop(todo_id, ()):
+            ids = self._postings[token]
+            ids.discard(todo_id)
+            if not ids:
+                del self._postings[token]
+                if not self._building:
+                    del self._vocabulary[bisect_left(self._vocabulary, token)]
+
+    def record_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """Store listener; only task text changes touch the index"""
+        if not self.active:
+            return
+        if old is None and new is None:
+            self._postings.clear()
+            self._vocabulary.clear()
+            self._doc_tokens.clear()
+            self._pending = []
+            self._building = False
+            return
+        if old is not None and new is not None and old.get('task') == new.get('task'):
+            return
+        if old is not None:
+            self._remove(old['id'])
+        if new is not None:
+            self._add(new)
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        start = bisect_left(self._vocabulary, prefix)
+        end = bisect_left(self._vocabulary, prefix + '\uffff', start)
+        if end - start == 1:
+            return self._postings[self._vocabulary[start]]
+        return set().union(*(self._postings[token] for token in self._vocabulary[start:end]))
+
+    def search(self, text: str) -> Optional[Set[int]]:
+        """Ids of todos whose task has a token starting with every query token
+
+        Returns None for a query without tokens, and also while the index is
+        still being built, so a search never waits for the build; callers
+        then match the text themselves.
+        """
+        tokens = tokenize(text)
+        if not tokens or not self.ready:
+            return None
+
+        matches = sorted((self._prefix_ids(token) for token in set(tokens)), key=len)
+        result = set(matches[0])
+        for ids in matches[1:]:
+            if not result:
+                break
+            result &= ids
+        return result
@@ -0,0 +1,404 @@
+# todo_sqlite.py
+import sqlite3
+from collections import Counter
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from todo_search import tokenize
+from todo_storage import read_journal
+from todo_store import TodoStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    category TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    completed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_todos_completed ON todos (completed);
+CREATE INDEX IF NOT EXISTS idx_todos_category ON todos (category);
+CREATE INDEX IF NOT EXISTS idx_todos_priority ON todos (priority);
+CREATE INDEX IF NOT EXISTS idx_todos_created_at ON todos (created_at);
+"""
+
+FTS_INSERT_TRIGGER = """
+CREATE TRIGGER todos_fts_insert AFTER INSERT ON todos BEGIN
+    INSERT INTO todos_fts (rowid, task) VALUES (new.id, new.task);
+END;
+"""
+
+# External-content FTS5 index over the task text, kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE todos_fts USING fts5(task, content='todos', content_rowid='id');
+""" + FTS_INSERT_TRIGGER + """
+CREATE TRIGGER todos_fts_delete AFTER DELETE ON todos BEGIN
+    INSERT INTO todos_fts (todos_fts, rowid, task) VALUES ('delete', old.id, old.task);
+END;
+CREATE TRIGGER todos_fts_update AFTER UPDATE OF task ON todos BEGIN
+    INSERT INTO todos_fts (todos_fts, rowid, task) VALUES ('delete', old.id, old.task);
+    INSERT INTO todos_fts (rowid, task) VALUES (new.id, new.task);
+END;
+INSERT INTO todos_fts (todos_fts) VALUES ('rebuild');
+"""
+
+# Seconds a write waits for another connection to commit before giving up
+BUSY_TIMEOUT = 5.0
+
+COLUMNS = ('id', 'task', 'priority', 'category', 'created_at', 'completed', 'completed_at')
+SELECT_COLUMNS = ', '.join(COLUMNS)
+
+
+def _row_to_todo(row: Tuple) -> Dict[str, Any]:
+    todo = dict(zip(COLUMNS, row))
+    todo['completed'] = bool(todo['completed'])
+    return todo
+
+
+def _todo_to_row(todo: Dict[str, Any]) -> Tuple:
+    return tuple(todo.get(column) for column in COLUMNS)
+
+
+def _insert_error(error: sqlite3.IntegrityError, todo_id: Optional[int]) -> ValueError:
+    """ValueError describing which constraint an insert broke"""
+    if 'todos.id' in str(error):
+        return ValueError("Duplicate todo id" if todo_id is None else f"Duplicate todo id: {todo_id}")
+    return ValueError(f"Invalid todo: {error}")
+
+
+def _like_prefix(token: str) -> str:
+    """LIKE pattern body matching ``token`` literally, for use with ESCAPE '\\'"""
+    return token.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class SqlQuery:
+    """Lazy, sliceable result of a filter over the todos table
+
+    ``len()`` runs a COUNT and slicing runs LIMIT/OFFSET, so a paged view
+    only ever fetches the rows it shows.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, where: str, params: Tuple):
+        self.conn = conn
+        self.where = where
+        self.params = params
+        self._count: Optional[int] = None
+
+    def __len__(self) -> int:
+        if self._count is None:
+            sql = f"SELECT COUNT(*) FROM todos {self.where}"
+            self._count = self.conn.execute(sql, self.params).fetchone()[0]
+        return self._count
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            raise TypeError("SqlQuery only supports slicing")
+        start, stop, step = key.indices(len(self))
+        if step != 1:
+            raise ValueError("SqlQuery does not support slice steps")
+        sql = f"SELECT {SELECT_COLUMNS} FROM todos {self.where} ORDER BY id LIMIT ? OFFSET ?"
+        rows = self.conn.execute(sql, self.params + (max(0, stop - start), start))
+        return [_row_to_todo(row) for row in rows]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        sql = f"SELECT {SELECT_COLUMNS} FROM todos {self.where} ORDER BY id"
+        for row in self.conn.execute(sql, self.params):
+            yield _row_to_todo(row)
+
+
+class SqlTodoStats:
+    """Same attributes as ``TodoStats``, answered by indexed SQL aggregates"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def _scalar(self, sql: str):
+        return self.conn.execute(sql).fetchone()[0]
+
+    @property
+    def total(self) -> int:
+        return self._scalar("SELECT COUNT(*) FROM todos")
+
+    @property
+    def completed(self) -> int:
+        return self._scalar("SELECT COUNT(*) FROM todos WHERE completed = 1")
+
+    @property
+    def pending(self) -> int:
+        return self._scalar("SELECT COUNT(*) FROM todos WHERE completed = 0")
+
+    @property
+    def completion_rate(self) -> float:
+        total = self.total
+        return (self.completed / total) * 100 if total else 0
+
+    @property
+    def categories(self) -> Counter:
+        return Counter(dict(self.conn.execute("SELECT category, COUNT(*) FROM todos GROUP BY category")))
+
+    @property
+    def priorities(self) -> Counter:
+        return Counter(dict(self.conn.execute("SELECT priority, COUNT(*) FROM todos GROUP BY priority")))
+
+    @property
+    def average_completion_seconds(self) -> Optional[float]:
+        days = self._scalar(
+            "SELECT AVG(julianday(completed_at) - julianday(created_at)) FROM todos "
+            "WHERE completed = 1 AND completed_at IS NOT NULL"
+        )
+        return None if days is None else days * 86400
+
+
+class SqliteTodoStore:
+    """Todo store kept in a SQLite database instead of in memory
+
+    Offers the same interface as ``TodoStore``; filters and statistics are
+    answered by indexed SQL queries, so nothing is loaded up front.
+    """
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.conn = sqlite3.connect(filename, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.has_fts = self._setup_fts()
+        # Text search is answered by FTS5, there is no in-memory index to build
+        self.search_index = None
+        self._next_id = 1
+        self._data_version = None
+        self._listeners: List[Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]] = []
+
+    def _setup_fts(self) -> bool:
+        """Create the full-text index if this SQLite build has FTS5"""
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'todos_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            with self.conn:
+                self.conn.executescript("BEGIN;" + FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            return False
+        return True
+
+    def add_listener(self, listener):
+        """Call ``listener(old, new)`` after every mutation, like ``TodoStore``"""
+        self._listeners.append(listener)
+
+    def _notify(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        for listener in self._listeners:
+            listener(old, new)
+
+    def stats(self) -> SqlTodoStats:
+        return SqlTodoStats(self.conn)
+
+    def load(self) -> int:
+        """Read the id high-water mark; records stay on disk"""
+        self._data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'todos'").fetchone()
+        self._next_id = (row[0] if row else 0) + 1
+        return 0
+
+    def sync(self) -> int:
+        """1 if another connection committed since the last call, else 0
+
+        Queries read the database directly, so there is nothing to merge;
+        only the id high-water mark is re-read.
+        """
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return 0
+        next_id = self._next_id
+        self.load()
+        self._next_id = max(self._next_id, next_id)
+        return 1
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM todos").fetchone()[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(SqlQuery(self.conn, '', ()))
+
+    def __contains__(self, todo_id: int) -> bool:
+        return self.get(todo_id) is not None
+
+    def records(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def get(self, todo_id: int) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(f"SELECT {SELECT_COLUMNS} FROM todos WHERE id = ?", (todo_id,)).fetchone()
+        return _row_to_todo(row) if row else None
+
+    def allocate_id(self) -> int:
+        """Hand out the next id; AUTOINCREMENT keeps the mark across deletes
+
+        The id is reserved inside a write transaction, which stays open
+        until the next commit or rollback, so another connection to the
+        same database waits instead of handing out the same id, for up to
+        ``BUSY_TIMEOUT`` seconds.
+        """
+        if not self.conn.in_transaction:
+            try:
+                self.conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                raise ValueError("The database is busy saving changes from another window; try again")
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'todos'").fetchone()
+        self._next_id = max(self._next_id, (row[0] if row else 0) + 1)
+        todo_id = self._next_id
+        self._next_id += 1
+        return todo_id
+
+    def add(self, todo: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a new record"""
+        placeholders = ', '.join('?' * len(COLUMNS))
+        try:
+            self.conn.execute(f"INSERT INTO todos ({SELECT_COLUMNS}) VALUES ({placeholders})",
+                              _todo_to_row(todo))
+        except sqlite3.IntegrityError as e:
+            raise _insert_error(e, todo.get('id'))
+        self._notify(None, todo)
+        return todo
+
+    def add_many(self, todos: Iterable[Dict[str, Any]]) -> int:
+        """Insert many records with a single statement
+
+        Large batches of new ids skip the per-row FTS trigger and index the
+        whole batch with one INSERT ... SELECT, which is several times
+        faster. The trigger is dropped and recreated inside the same
+        transaction, so a rollback restores it.
+        """
+        placeholders = ', '.join('?' * len(COLUMNS))
+        todos = list(todos)
+        rows = [_todo_to_row(todo) for todo in todos]
+        max_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM todos").fetchone()[0]
+        bulk_fts = self.has_fts and len(rows) >= 1000 and min(row[0] for row in rows) > max_id
+        try:
+            if bulk_fts:
+                if not self.conn.in_transaction:
+                    self.conn.execute("BEGIN")
+                self.conn.execute("DROP TRIGGER todos_fts_insert")
+            cursor = self.conn.executemany(f"INSERT INTO todos ({SELECT_COLUMNS}) VALUES ({placeholders})", rows)
+            if bulk_fts:
+                self.conn.execute("INSERT INTO todos_fts (rowid, task) SELECT id, task FROM todos WHERE id > ?",
+                                  (max_id,))
+                self.conn.execute(FTS_INSERT_TRIGGER)
+        except sqlite3.IntegrityError as e:
+            raise _insert_error(e, None)
+        if self._listeners:
+            for todo in todos:
+                self._notify(None, todo)
+        return cursor.rowcount
+
+    def update(self, todo_id: int, **changes) -> Dict[str, Any]:
+        """Apply ``changes`` to a record"""
+        unknown = set(changes) - set(COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"Unknown todo fields: {', '.join(sorted(unknown))}")
+        old = self.get(todo_id)
+        if old is None:
+            raise KeyError(todo_id)
+        if changes:
+            assignments = ', '.join(f"{field} = ?" for field in changes)
+            self.conn.execute(f"UPDATE todos SET {assignments} WHERE id = ?",
+                              tuple(changes.values()) + (todo_id,))
+        todo = dict(old, **changes)
+        todo['completed'] = bool(todo['completed'])
+        self._notify(old, todo)
+        return todo
+
+    def delete(self, todo_id: int):
+        """Delete a record"""
+        old = self.get(todo_id)
+        if old is None:
+            raise KeyError(todo_id)
+        self.conn.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+        self._notify(old, None)
+
+    def clear(self):
+        """Delete every record"""
+        self.conn.execute("DELETE FROM todos")
+        self._notify(None, None)
+
+    def count(self, field: str, value: Any) -> int:
+        """Number of records whose ``field`` equals ``value``"""
+        self._check_field(field)
+        sql = f"SELECT COUNT(*) FROM todos WHERE {field} = ?"
+        return self.conn.execute(sql, (value,)).fetchone()[0]
+
+    def counts(self, field: str) -> Dict[Any, int]:
+        """Number of records per distinct value of ``field``"""
+        self._check_field(field)
+        sql = f"SELECT {field}, COUNT(*) FROM todos GROUP BY {field}"
+        counts = dict(self.conn.execute(sql).fetchall())
+        if field == 'completed':
+            counts = {bool(value): count for value, count in counts.items()}
+        return counts
+
+    @staticmethod
+    def _check_field(field: str):
+        if field not in TodoStore.INDEXED_FIELDS:
+            raise ValueError(f"Field is not indexed: {field}")
+
+    def filter(self, completed: Optional[bool] = None,
+               category: Optional[str] = None,
+               text: Optional[str] = None) -> SqlQuery:
+        """Return a lazy query over the matching records in id order"""
+        clauses, params = [], []
+        tokens = tokenize(text) if text else []
+        if tokens and self.has_fts:
+            clauses.append("id IN (SELECT rowid FROM todos_fts WHERE todos_fts MATCH ?)")
+            params.append(' '.join(f'"{token}"*' for token in tokens))
+        else:
+            # Without FTS5 fall back to a scan matching word prefixes
+            for token in tokens:
+                clauses.append("(lower(task) LIKE ? ESCAPE '\\' OR lower(task) LIKE ? ESCAPE '\\')")
+                token = _like_prefix(token)
+                params.extend([f"{token}%", f"% {token}%"])
+        if completed is not None:
+            clauses.append("completed = ?")
+            params.append(int(completed))
+        if category is not None:
+            clauses.append("category = ?")
+            params.append(category)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return SqlQuery(self.conn, where, tuple(params))
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def import_json(store: SqliteTodoStore, filename: str) -> int:
+    """Copy every todo from a JSON snapshot (and its change log) into ``store``
+
+    The source files are only read. Records sharing a legacy id get fresh
+    ids after the highest one in the file. Returns the number of imported
+    records.
+    """
+    todos, next_id = read_journal(filename)
+    store.load()
+    if len(store):
+        # Keep existing rows; imported ones get fresh ids after them
+        todos = [dict(todo, id=store.allocate_id()) for todo in todos]
+    else:
+        seen = set()
+        for i, todo in enumerate(todos):
+            if todo['id'] in seen:
+                todos[i] = dict(todo, id=next_id)
+                next_id += 1
+            seen.add(todos[i]['id'])
+    store.add_many(todos)
+    store.commit()
+    store.load()
+    return len(todos)
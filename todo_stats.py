@@ -0,0 +1,88 @@
+# todo_stats.py
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+
+def completion_seconds(todo: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Seconds between creation and completion, or None if not completed"""
+    if not todo or not todo.get('completed') or not todo.get('completed_at'):
+        return None
+    try:
+        created = datetime.fromisoformat(todo['created_at'])
+        completed = datetime.fromisoformat(todo['completed_at'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (completed - created).total_seconds()
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "n/a"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 86400:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} days"
+
+
+class TodoStats:
+    """Statistics kept current from the store's change notifications
+
+    Counts per status, category and priority plus a running average of the
+    completion time are adjusted by the delta of every change, so reading
+    them never walks the todo list.
+    """
+
+    def __init__(self, store):
+        self._reset()
+        for todo in store:
+            self._apply(todo, 1)
+        store.add_listener(self.record_changed)
+
+    def _reset(self):
+        self.total = 0
+        self.completed = 0
+        self.categories: Counter = Counter()
+        self.priorities: Counter = Counter()
+        self._completion_total = 0.0
+        self._completion_count = 0
+
+    @property
+    def pending(self) -> int:
+        return self.total - self.completed
+
+    @property
+    def completion_rate(self) -> float:
+        return (self.completed / self.total) * 100 if self.total else 0
+
+    @property
+    def average_completion_seconds(self) -> Optional[float]:
+        if not self._completion_count:
+            return None
+        return self._completion_total / self._completion_count
+
+    def _apply(self, todo: Dict[str, Any], sign: int):
+        self.total += sign
+        if todo.get('completed'):
+            self.completed += sign
+        for counter, key in ((self.categories, todo.get('category')),
+                             (self.priorities, todo.get('priority'))):
+            counter[key] += sign
+            if not counter[key]:
+                del counter[key]
+
+        seconds = completion_seconds(todo)
+        if seconds is not None:
+            self._completion_total += sign * seconds
+            self._completion_count += sign
+
+    def record_changed(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        """Store listener; ``(None, None)`` means every record was removed"""
+        if old is None and new is None:
+            self._reset()
+            return
+        if old is not None:
+            self._apply(old, -1)
+        if new is not None:
+            self._apply(new, 1)
@@ -0,0 +1,984 @@
+# todo_storage.py
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+SNAPSHOT_VERSION = 2
+# Most ids one process reserves at a time during bulk adds
+MAX_ID_BLOCK = 1024
+
+
+class SnapshotReader:
+    """Stream the todos out of a snapshot file one record at a time
+
+    The file is read in ``chunk_size`` blocks and every record is decoded on
+    its own with ``JSONDecoder.raw_decode``, so memory use and the time to the
+    first record do not depend on the file size. Text that does not decode
+    to a todo is skipped up to the next ``{`` and counted in
+    ``corrupt_regions``, which recovers every intact record of a damaged
+    file. ``next_id`` is final once iteration has finished.
+
+    Version 1 files are a bare list of todos; version 2 wraps the list in an
+    object that also carries the id high-water mark so deleted ids are never
+    handed out again.
+    """
+
+    HEADER_RE = re.compile(r'\{\s*(?:"\w+"\s*:\s*\d+\s*,\s*)*"todos"\s*:\s*\[')
+    NEXT_ID_RE = re.compile(r'"next_id"\s*:\s*(\d+)')
+    SEPARATORS_RE = re.compile(r'[\s,\[\]}]*')
+    MAX_RECORD_SIZE = 1 << 20
+
+    def __init__(self, filename: str, chunk_size: int = 1 << 20):
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.next_id = 1
+        self.corrupt_regions = 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.exists(self.filename):
+            return
+        decoder = json.JSONDecoder()
+        with open(self.filename, 'r', encoding='utf-8', errors='replace') as f:
+            buf, pos, eof = '', 0, False
+
+            def fill() -> bool:
+                nonlocal buf, pos, eof
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    eof = True
+                    return False
+                buf, pos = buf[pos:] + chunk, 0
+                return True
+
+            fill()
+            header = self.HEADER_RE.match(buf, len(buf) - len(buf.lstrip()))
+            if header:
+                next_id = self.NEXT_ID_RE.search(header.group())
+                if next_id:
+                    self.next_id = int(next_id.group(1))
+                pos = header.end()
+
+            skipping = False
+            while True:
+                pos = self.SEPARATORS_RE.match(buf, pos).end()
+                if pos >= len(buf):
+                    if fill():
+                        continue
+                    break
+                if buf[pos] == '{':
+                    try:
+                        todo, end = decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        # A record cut by the end of the buffer is completed
+                        # by the next read; anything else is damage
+                        if not eof and len(buf) - pos < self.MAX_RECORD_SIZE and fill():
+                            continue
+                    else:
+                        if isinstance(todo, dict) and isinstance(todo.get('id'), int) and 'task' in todo:
+                            skipping = False
+                            self.next_id = max(self.next_id, todo['id'] + 1)
+                            pos = end
+                            yield todo
+                            continue
+
+                if not skipping:
+                    skipping = True
+                    self.corrupt_regions += 1
+                pos = buf.find('{', pos + 1)
+                while pos < 0:
+                    pos = len(buf)
+                    if not fill():
+                        return
+                    pos = buf.find('{')
+
+
+def read_snapshot(filename: str) -> Tuple[List[Dict[str, Any]], int]:
+    """Read a whole snapshot file and return its todos and next free id"""
+    reader = SnapshotReader(filename)
+    todos = list(reader)
+    return todos, reader.next_id
+
+
+def batched(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Split ``items`` into lists of at most ``size`` records"""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+def backup_corrupt(filename: str) -> str:
+    """Copy a damaged file aside before it is rewritten; returns the copy's name"""
+    backup = f"{filename}.corrupt-{time.strftime('%Y%m%d-%H%M%S')}"
+    shutil.copy2(filename, backup)
+    return backup
+
+
+def write_snapshot(filename: str, todos: List[Dict[str, Any]], next_id: int):
+    """Atomically replace a snapshot file (temp file + fsync + rename)
+
+    Each todo goes on its own line, encoded with ``json.dumps`` so the C
+    encoder is used; ``json.dump`` with indentation runs the pure-Python
+    encoder and is several times slower on large lists.
+    """
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'w') as f:
+        f.write(f'{{"version": {SNAPSHOT_VERSION}, "next_id": {next_id}, "todos": [\n')
+        for start in range(0, len(todos), 10000):
+            if start:
+                f.write(',\n')
+            f.write(',\n'.join(map(json.dumps, todos[start:start + 10000])))
+        f.write('\n]}\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+class JsonStorage:
+    """Storage backend that rewrites the whole JSON file on every commit"""
+
+    def __init__(self, filename: str, source: Callable[[], List[Dict[str, Any]]]):
+        self.filename = filename
+        self.source = source
+        self.next_id = 1
+        self.corrupt_backup: Optional[str] = None
+        self._dirty = False
+        self._file_state = None
+
+    def iter_load(self, batch_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the todos in the JSON file in batches
+
+        Only reads files, so it can run on a worker thread. A damaged file is
+        copied to ``corrupt_backup`` and rewritten by ``finish_load``.
+        """
+        self.corrupt_backup = None
+        reader = SnapshotReader(self.filename)
+        yield from batched(reader, batch_size)
+        self.next_id = reader.next_id
+        if reader.corrupt_regions:
+            self.corrupt_backup = backup_corrupt(self.filename)
+        self._file_state = self._stat()
+
+    def finish_load(self):
+        """Rewrite a repaired file once the store holds every loaded record"""
+        if self.corrupt_backup:
+            self.compact()
+
+    def log_add(self, todo: Dict[str, Any]):
+        self.next_id = max(self.next_id, todo['id'] + 1)
+        self._dirty = True
+
+    def log_add_many(self, todos: List[Dict[str, Any]]):
+        for todo in todos:
+            self.next_id = max(self.next_id, todo['id'] + 1)
+        self._dirty = True
+
+    def reserve_id(self, floor: int) -> int:
+        self.next_id = max(self.next_id, floor) + 1
+        return self.next_id - 1
+
+    def log_update(self, todo: Dict[str, Any], fields: Optional[List[str]] = None):
+        self._dirty = True
+
+    def log_delete(self, todo_id: int):
+        self._dirty = True
+
+    def log_clear(self):
+        self._dirty = True
+
+    def commit(self):
+        """Write the full todo list back to disk"""
+        if not self._dirty:
+            return
+        self._dirty = False
+        try:
+            write_snapshot(self.filename, self.source(), self.next_id)
+        except OSError:
+            self._dirty = True
+            raise
+        self._file_state = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def read_changes(self) -> Optional[List[Dict[str, Any]]]:
+        """Nothing while the file is as we left it, else None: it has to be reloaded"""
+        return [] if self._stat() == self._file_state else None
+
+    def rollback(self):
+        """Forget changes logged since the last commit"""
+        self._dirty = False
+
+    def compact(self):
+        """Rewrite the file even if nothing was logged"""
+        self._dirty = True
+        self.commit()
+
+    def close(self):
+        self.commit()
+
+
+class FileLock:
+    """Advisory lock shared by every process that opens the same todo list
+
+    Uses ``flock`` on POSIX and ``msvcrt.locking`` on Windows. The OS lock
+    belongs to the open file rather than to a thread, so a thread lock is
+    taken first to keep the threads of one process apart as well; either
+    can be released from another thread than the one that acquired it.
+    The file also holds a counter (see ``read_counter``) that is only read
+    and written while the lock is held.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._fd: Optional[int] = None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking):
+            return False
+        try:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            if self._lock_file(blocking):
+                return True
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        self._thread_lock.release()
+        return False
+
+    def _lock_file(self, blocking: bool) -> bool:
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                return False
+            return True
+        if msvcrt is not None:
+            while True:
+                # msvcrt locks bytes from the current position
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                try:
+                    msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+                    return True
+                except OSError:
+                    if not blocking:
+                        return False
+                    time.sleep(0.01)
+        # No OS locking available: only the threads of this process are kept apart
+        return True
+
+    def release(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            self._thread_lock.release()
+
+    def read_counter(self) -> int:
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        try:
+            return int(os.read(self._fd, 32).strip() or 0)
+        except ValueError:
+            return 0
+
+    def write_counter(self, value: int):
+        # Fixed width, so the file never needs truncating
+        os.lseek(self._fd, 0, os.SEEK_SET)
+        os.write(self._fd, b'%020d\n' % value)
+
+    def close(self):
+        with self._thread_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def file_identity(st: os.stat_result) -> Tuple[int, int]:
+    """Tells a log file apart from the one that replaced it after a rotation"""
+    return st.st_dev, st.st_ino
+
+
+def parse_log(data: bytes) -> List[Dict[str, Any]]:
+    """Decode the complete lines of a piece of log, skipping damaged ones"""
+    entries = []
+    for line in data[:data.rfind(b'\n') + 1].splitlines():
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return entries
+
+
+def updated_record(old: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply an add or update log entry to the current version of its record
+
+    Updates that list their ``fields`` only overwrite those, so concurrent
+    edits of different fields of one todo are all kept; anything else
+    replaces the whole record.
+    """
+    todo = entry['todo']
+    fields = entry.get('fields')
+    if fields is None:
+        return todo
+    return dict(old, **{field: todo[field] for field in fields if field in todo})
+
+
+class LogReplay:
+    """Fold operation log entries into the final state they describe
+
+    The log is small compared to the snapshot, so it is folded into a map
+    of final states first and applied to each snapshot record as it streams
+    past; records the log added come last. Field updates to records that
+    only exist in the snapshot are collected as patches. Replaying entries
+    that are already part of the snapshot is harmless, because every
+    operation sets values rather than changing them.
+    """
+
+    def __init__(self):
+        # id -> latest record, or None once deleted
+        self.final: Dict[int, Optional[Dict[str, Any]]] = {}
+        self.patches: Dict[int, Dict[str, Any]] = {}
+        self.cleared = False
+        self.next_id = 1
+        self.ops = 0
+
+    def add(self, entries: Iterable[Dict[str, Any]]):
+        final, patches = self.final, self.patches
+        for entry in entries:
+            op = entry.get('op')
+            if op in ('add', 'update'):
+                todo = entry['todo']
+                todo_id = todo['id']
+                self.next_id = max(self.next_id, todo_id + 1)
+                if 'fields' not in entry:
+                    final[todo_id] = todo
+                    patches.pop(todo_id, None)
+                elif todo_id in final:
+                    if final[todo_id] is not None:
+                        final[todo_id] = updated_record(final[todo_id], entry)
+                elif not self.cleared:
+                    patches[todo_id] = updated_record(patches.get(todo_id, {}), entry)
+            elif op == 'delete':
+                final[entry['id']] = None
+                patches.pop(entry['id'], None)
+            elif op == 'clear':
+                final.clear()
+                patches.clear()
+                self.cleared = True
+            self.ops += 1
+
+    def records(self, snapshot: Iterable[Dict[str, Any]], keep_duplicates: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield the snapshot records with the log applied, then the records it added
+
+        Later records with an already seen id are yielded unchanged with
+        ``keep_duplicates`` (so the store can give them fresh ids) and
+        dropped otherwise.
+        """
+        final, patches = self.final, self.patches
+        seen = set()
+        for todo in snapshot:
+            if self.cleared:
+                # Still read to the end for the id high-water mark
+                continue
+            todo_id = todo['id']
+            if todo_id in seen:
+                if keep_duplicates and final.get(todo_id, todo) is not None:
+                    yield todo
+                continue
+            seen.add(todo_id)
+            if todo_id in final:
+                todo = final[todo_id]
+                if todo is None:
+                    continue
+            elif todo_id in patches:
+                todo = dict(todo, **patches[todo_id])
+            yield todo
+        for todo_id, todo in final.items():
+            if todo is not None and todo_id not in seen:
+                yield todo
+
+
+def read_journal(filename: str) -> Tuple[List[Dict[str, Any]], int]:
+    """Read a snapshot with its change logs applied, without writing to any file
+
+    Records with a duplicate legacy id are kept as they are, for the caller
+    to re-key. Returns the todos and the next free id.
+    """
+    replay = LogReplay()
+    for path in (filename + '.log.old', filename + '.log'):
+        try:
+            with open(path, 'rb') as f:
+                replay.add(parse_log(f.read()))
+        except FileNotFoundError:
+            continue
+    reader = SnapshotReader(filename)
+    todos = list(replay.records(reader))
+    return todos, max(reader.next_id, replay.next_id)
+
+
+class JournalStorage:
+    """Storage backend built on a snapshot file plus an append-only operation log
+
+    Every change is appended to ``<filename>.log`` as one JSON line, so a commit
+    costs O(1) regardless of list size. Once the log grows past
+    ``compact_every`` operations it is rotated and folded into the snapshot
+    on a background thread.
+
+    Several processes can share one file. Appends and log rotation happen
+    under an advisory lock on ``<filename>.lock``, which also hands out todo
+    ids so two processes never create the same one. Each process remembers
+    how far into the log its records are current; ``read_changes`` returns
+    what others appended since, so they can be merged without reading the
+    whole file again. Compaction rebuilds the snapshot from the files
+    rather than from memory, so it never drops operations this process has
+    not read yet, and a second lock keeps it to one process at a time.
+    """
+
+    def __init__(self, filename: str, source: Callable[[], List[Dict[str, Any]]],
+                 compact_every: int = 1000):
+        self.filename = filename
+        self.source = source
+        self.compact_every = compact_every
+        self.log_filename = filename + '.log'
+        self.old_log_filename = filename + '.log.old'
+        self.lock = FileLock(filename + '.lock')
+        self.compact_lock = FileLock(filename + '.compact.lock')
+        self.next_id = 1
+        # Encoded log lines, or lists of records from a large bulk insert
+        self._pending: List[Any] = []
+        self._bulk_due = False
+        self._log_ops = 0
+        # Guards the pending buffer and the read position, never held during I/O
+        self._lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._log = None
+        # The log file this process's records follow, and how far into it
+        self._log_id: Optional[Tuple[int, int]] = None
+        self._log_offset = 0
+        self._reserved = range(0)
+        self._reserve_size = 1
+        self._reserved_at = 0.0
+        self.corrupt_backup: Optional[str] = None
+
+    def iter_load(self, batch_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """Yield the snapshot with the operation log applied, in batches
+
+        The logs are read under the file lock, so no other process can
+        rotate them half way through. Only reads files (after flushing
+        anything still pending), so it can run on a worker thread;
+        compaction is left to ``finish_load``.
+        """
+        self.corrupt_backup = None
+        replay = LogReplay()
+        with self.lock:
+            self._write_pending()
+            # A previous compaction may have been interrupted before its
+            # rotated log was removed; replaying it again is harmless
+            for path in (self.old_log_filename, self.log_filename):
+                replay.add(self._read_log(path))
+            log = self._open_log()
+            with self._lock:
+                self._log_id = file_identity(os.fstat(log.fileno()))
+                self._log_offset = os.fstat(log.fileno()).st_size
+        self._log_ops = replay.ops
+        self.next_id = max(self.next_id, replay.next_id)
+
+        reader = SnapshotReader(self.filename)
+        yield from batched(replay.records(reader), batch_size)
+
+        self.next_id = max(self.next_id, reader.next_id)
+        if reader.corrupt_regions:
+            self.corrupt_backup = backup_corrupt(self.filename)
+
+    def finish_load(self):
+        """Compact after loading if the log is long, left over or the snapshot was damaged"""
+        if (self._log_ops >= self.compact_every or self.corrupt_backup
+                or os.path.exists(self.old_log_filename)):
+            self.compact()
+
+    def _read_log(self, path: str, repair: bool = True) -> Iterator[Dict[str, Any]]:
+        """Yield the entries of a log file, cutting off a torn last line
+
+        Only cut with ``repair`` while holding the lock; otherwise the last
+        line may be another process's append in progress.
+        """
+        if not os.path.exists(path):
+            return
+
+        good_offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Torn write from a crash in the middle of an append
+                    break
+                good_offset += len(line)
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+        if repair and good_offset < os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(good_offset)
+
+    def _open_log(self):
+        """The append handle of the current log file; the caller holds ``self.lock``
+
+        Another process may have rotated the log since it was opened, in
+        which case the new one is opened (or created).
+        """
+        try:
+            current = file_identity(os.stat(self.log_filename))
+        except FileNotFoundError:
+            current = None
+        if self._log is not None:
+            if file_identity(os.fstat(self._log.fileno())) == current:
+                return self._log
+            self._log.close()
+        self._log = open(self.log_filename, 'a+b')
+        return self._log
+
+    def _append(self, entry: Dict[str, Any]):
+        line = json.dumps(entry) + '\n'
+        with self._lock:
+            self._pending.append(line)
+
+    def reserve_id(self, floor: int) -> int:
+        """A todo id of at least ``floor`` that no other process can hand out
+
+        Ids come from the counter in the lock file, in blocks that double
+        while ids are requested in quick succession (bulk imports) and are
+        single ids otherwise. ``close`` hands back what is left of the last
+        block, so short-lived processes do not leave gaps in the ids.
+        """
+        if self._reserved and self._reserved[0] < floor:
+            self._reserved = self._reserved[floor - self._reserved[0]:]
+        if not self._reserved:
+            now = time.monotonic()
+            self._reserve_size = min(self._reserve_size * 2, MAX_ID_BLOCK) if now - self._reserved_at < 1 else 1
+            self._reserved_at = now
+            with self.lock:
+                start = max(self.lock.read_counter(), self.next_id, floor)
+                self.lock.write_counter(start + self._reserve_size)
+            self._reserved = range(start, start + self._reserve_size)
+        todo_id, self._reserved = self._reserved[0], self._reserved[1:]
+        return todo_id
+
+    def log_add(self, todo: Dict[str, Any]):
+        self.next_id = max(self.next_id, todo['id'] + 1)
+        self._append({'op': 'add', 'todo': todo})
+
+    def log_add_many(self, todos: List[Dict[str, Any]]):
+        """Log a bulk insert; large ones are saved as a fresh snapshot at commit"""
+        if len(todos) < self.compact_every:
+            for todo in todos:
+                self.log_add(todo)
+            return
+        for todo in todos:
+            self.next_id = max(self.next_id, todo['id'] + 1)
+        with self._lock:
+            self._pending.append(todos)
+            self._bulk_due = True
+
+    def log_update(self, todo: Dict[str, Any], fields: Optional[List[str]] = None):
+        entry = {'op': 'update', 'todo': todo}
+        if fields is not None:
+            entry['fields'] = fields
+        self._append(entry)
+
+    def log_delete(self, todo_id: int):
+        self._append({'op': 'delete', 'id': todo_id})
+
+    def log_clear(self):
+        self._append({'op': 'clear'})
+
+    def rollback(self):
+        """Drop operations logged since the last commit"""
+        with self._lock:
+            self._pending = []
+            self._bulk_due = False
+
+    def commit(self):
+        """Append pending operations to the log and fsync it"""
+        if self._bulk_due:
+            self._commit_bulk()
+            return
+        if not self._pending:
+            return
+        with self.lock:
+            self._write_pending()
+        if self._log_ops >= self.compact_every:
+            self.compact(wait=False)
+
+    def _write_pending(self):
+        """Append the buffered operations to the log; the caller holds ``self.lock``"""
+        with self._lock:
+            # Swap the buffer first so operations logged from another thread
+            # while we write end up in the next commit
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        try:
+            log = self._open_log()
+            start = os.fstat(log.fileno()).st_size
+            data = ''.join(map(self._encode, pending)).encode('utf-8')
+            if start:
+                log.seek(start - 1)
+                if log.read(1) != b'\n':
+                    # Another process died half way through a line; start a fresh one
+                    data = b'\n' + data
+            log.write(data)
+            log.flush()
+            os.fsync(log.fileno())
+        except OSError:
+            with self._lock:
+                self._pending[:0] = pending
+            raise
+        with self._lock:
+            if self._log_id == file_identity(os.fstat(log.fileno())) and self._log_offset == start:
+                # Nobody else wrote since we last read, so our records are
+                # current up to the end of what we just wrote
+                self._log_offset = start + len(data)
+        self._log_ops += sum(1 if isinstance(item, str) else len(item) for item in pending)
+
+    @staticmethod
+    def _encode(item) -> str:
+        if isinstance(item, str):
+            return item
+        return ''.join(json.dumps({'op': 'add', 'todo': todo}) + '\n' for todo in item)
+
+    @staticmethod
+    def _decode(pending: List[Any]) -> List[Dict[str, Any]]:
+        entries = []
+        for item in pending:
+            if isinstance(item, str):
+                entries.append(json.loads(item))
+            else:
+                entries.extend({'op': 'add', 'todo': todo} for todo in item)
+        return entries
+
+    def _commit_bulk(self):
+        """Save a large insert as a fresh snapshot taken from memory
+
+        The in-memory list only matches the files when this process has
+        read everything others logged; otherwise the records are logged
+        one by one like any other change.
+        """
+        with self.compact_lock, self.lock:
+            with self._lock:
+                self._bulk_due = False
+            if not self._caught_up():
+                self._write_pending()
+                return
+            # The snapshot is taken from the live list after the buffer is
+            # emptied, so it holds every operation dropped from the buffer;
+            # ones logged meanwhile are in both, which replays harmlessly
+            with self._lock:
+                self._pending = []
+            self._rotate()
+            write_snapshot(self.filename, self.source(), self.next_id)
+            self._remove_rotated_log()
+
+    def _caught_up(self) -> bool:
+        """Whether this process has read the whole current log; the caller holds ``self.lock``"""
+        try:
+            st = os.stat(self.log_filename)
+        except FileNotFoundError:
+            return False
+        with self._lock:
+            return file_identity(st) == self._log_id and st.st_size == self._log_offset
+
+    def _rotate(self):
+        """Move the log aside and start an empty one; the caller holds ``self.lock``"""
+        caught_up = self._caught_up()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if os.path.exists(self.log_filename):
+            if os.path.exists(self.old_log_filename):
+                # Fold the log into the leftover rotated one so no
+                # operation is lost before the snapshot is rewritten
+                with open(self.log_filename, 'rb') as src, open(self.old_log_filename, 'ab') as dst:
+                    dst.write(src.read())
+                os.remove(self.log_filename)
+            else:
+                os.replace(self.log_filename, self.old_log_filename)
+        log = self._open_log()
+        self._log_ops = 0
+        if caught_up:
+            with self._lock:
+                self._log_id, self._log_offset = file_identity(os.fstat(log.fileno())), 0
+
+    def read_changes(self) -> Optional[List[Dict[str, Any]]]:
+        """Log entries appended since this process last read, to be applied in order
+
+        Costs one ``stat`` when nothing changed. The entries are followed by
+        this process's uncommitted ones, so local edits end up on top of
+        what others saved. When the log was rotated, the rest of the old
+        one is read from the rotated file; None means that is gone too (or
+        the log shrank) and the records must be reloaded.
+        """
+        with self._lock:
+            log_id, offset = self._log_id, self._log_offset
+            pending = list(self._pending)
+        try:
+            st = os.stat(self.log_filename)
+        except FileNotFoundError:
+            # Being rotated right now; look again next time
+            return []
+        if file_identity(st) != log_id:
+            entries = self._read_rotated(log_id, offset)
+        elif st.st_size < offset:
+            return None
+        elif st.st_size == offset:
+            return []
+        else:
+            entries, end = self._read_tail(self.log_filename, log_id, offset)
+            if entries is None:
+                # Rotated between the stat and the open; caught next time
+                return []
+            with self._lock:
+                if self._log_id == log_id:
+                    self._log_offset = max(self._log_offset, end)
+        if entries:
+            entries.extend(self._decode(pending))
+        return entries
+
+    def _read_tail(self, path: str, log_id, offset: int):
+        """Complete lines of ``path`` after ``offset`` and the offset after them
+
+        Returns (None, None) if the file is gone and (None, offset) if it
+        is no longer the file ``log_id`` names.
+        """
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return None, None
+        with f:
+            if file_identity(os.fstat(f.fileno())) != log_id:
+                return None, offset
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1
+        return parse_log(data[:end]), offset + end
+
+    def _read_rotated(self, log_id, offset: int) -> Optional[List[Dict[str, Any]]]:
+        """Catch up across a rotation: the rest of the old log, then follow the new one
+
+        Runs under the lock, so the logs cannot move again meanwhile. Only
+        works while the rotated file is the log we were reading; if it was
+        already folded into the snapshot, None asks for a reload.
+        """
+        with self.lock:
+            entries, end = self._read_tail(self.old_log_filename, log_id, offset)
+            if entries is None:
+                return None
+            log = self._open_log()
+            new_entries, new_end = self._read_tail(self.log_filename, file_identity(os.fstat(log.fileno())), 0)
+            with self._lock:
+                self._log_id, self._log_offset = file_identity(os.fstat(log.fileno())), new_end
+        return entries + new_entries
+
+    def compact(self, wait: bool = True):
+        """Rotate the log and fold it into the snapshot in the background
+
+        If a compaction is already running, in this process or another, this
+        waits for it first, or with ``wait=False`` leaves the log alone for
+        the next attempt.
+        """
+        if self._compactor is not None and self._compactor.is_alive():
+            if not wait:
+                return
+            self._compactor.join()
+        if not self.compact_lock.acquire(wait):
+            return
+        try:
+            with self.lock:
+                self._write_pending()
+                self._rotate()
+        except BaseException:
+            self.compact_lock.release()
+            raise
+        self._compactor = threading.Thread(target=self._write_snapshot, name='todo-compactor')
+        self._compactor.start()
+
+    def wait_for_compaction(self):
+        """Block until a compaction started by this instance has finished"""
+        if self._compactor is not None:
+            self._compactor.join()
+
+    def _write_snapshot(self):
+        """Rebuild the snapshot from the files; runs holding ``compact_lock``"""
+        try:
+            # Another process may fold its log in while we read, so stop at
+            # the size seen now and never cut a line off
+            try:
+                with open(self.old_log_filename, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                data = b''
+            replay = LogReplay()
+            replay.add(parse_log(data))
+            reader = SnapshotReader(self.filename)
+            todos = list(replay.records(reader, keep_duplicates=False))
+            write_snapshot(self.filename, todos, max(reader.next_id, replay.next_id, self.next_id))
+            with self.lock:
+                # Anything folded in after we read it stays for the next
+                # compaction; replaying it on the new snapshot is harmless
+                if os.path.exists(self.old_log_filename) and os.path.getsize(self.old_log_filename) == len(data):
+                    self._remove_rotated_log()
+        finally:
+            self.compact_lock.release()
+
+    def _remove_rotated_log(self):
+        try:
+            os.remove(self.old_log_filename)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # Still open in another process (Windows); the next compaction removes it
+            pass
+
+    def close(self):
+        """Flush pending operations and wait for a running compaction"""
+        self.commit()
+        self.wait_for_compaction()
+        with self.lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+            # Only if no other process reserved ids after ours
+            if self._reserved and self.lock.read_counter() == self._reserved.stop:
+                self.lock.write_counter(self._reserved.start)
+            self._reserved = range(0)
+        self.lock.close()
+        self.compact_lock.close()
+
+
+class WriteBehind:
+    """Wrap a storage backend so commits happen on a background thread
+
+    ``commit()`` only marks the backend dirty; a worker thread flushes it
+    ``delay`` seconds after the first unsaved change, so a burst of edits is
+    written once. Errors from the worker are passed to ``on_error``.
+    ``close()`` flushes synchronously.
+    """
+
+    def __init__(self, storage, delay: float = 0.5,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self.storage = storage
+        self.delay = delay
+        self.on_error = on_error
+        self._cond = threading.Condition()
+        self._due: Optional[float] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='todo-write-behind', daemon=True)
+        self._thread.start()
+
+    @property
+    def next_id(self) -> int:
+        return self.storage.next_id
+
+    @property
+    def corrupt_backup(self) -> Optional[str]:
+        return self.storage.corrupt_backup
+
+    def iter_load(self, batch_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        return self.storage.iter_load(batch_size)
+
+    def finish_load(self):
+        self.storage.finish_load()
+
+    def log_add(self, todo: Dict[str, Any]):
+        self.storage.log_add(todo)
+
+    def log_add_many(self, todos: List[Dict[str, Any]]):
+        self.storage.log_add_many(todos)
+
+    def reserve_id(self, floor: int) -> int:
+        return self.storage.reserve_id(floor)
+
+    def read_changes(self) -> Optional[List[Dict[str, Any]]]:
+        return self.storage.read_changes()
+
+    def log_update(self, todo: Dict[str, Any], fields: Optional[List[str]] = None):
+        self.storage.log_update(todo, fields)
+
+    def log_delete(self, todo_id: int):
+        self.storage.log_delete(todo_id)
+
+    def log_clear(self):
+        self.storage.log_clear()
+
+    def compact(self):
+        self.storage.compact()
+
+    def rollback(self):
+        with self._cond:
+            self._due = None
+        self.storage.rollback()
+
+    def commit(self):
+        """Schedule a flush of everything logged so far"""
+        with self._cond:
+            if self._due is None:
+                self._due = time.monotonic() + self.delay
+                self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._due is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                remaining = self._due - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                self._due = None
+            try:
+                self.storage.commit()
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+
+    def close(self):
+        """Stop the worker and flush pending changes on the calling thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.storage.close()
@@ -0,0 +1,324 @@
+# todo_store.py
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional
+
+from todo_search import SearchIndex, task_matches, tokenize
+from todo_storage import updated_record
+from todo_stats import TodoStats
+
+
+class TodoStore:
+    """In-memory todo records with an id index and secondary indexes
+
+    Records are treated as immutable: ``update`` replaces a record with a new
+    dict, so readers (and the storage compactor) never see a half-edited one.
+    Every mutation keeps the indexes current, is logged to ``storage`` and is
+    reported to listeners as ``listener(old, new)``, where ``old`` is None
+    for an add, ``new`` is None for a delete and both are None for a clear.
+    """
+
+    INDEXED_FIELDS = ('completed', 'category', 'priority')
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        # field -> value -> ids; dicts are used as insertion-ordered sets
+        self._indexes: Dict[str, Dict[Any, Dict[int, None]]] = {
+            field: {} for field in self.INDEXED_FIELDS
+        }
+        self._next_id = 1
+        self._duplicates: List[Dict[str, Any]] = []
+        self._listeners: List[Callable[[Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]] = []
+        self.search_index = SearchIndex(self)
+
+    def add_listener(self, listener):
+        """Call ``listener(old, new)`` after every mutation"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """Stop calling a listener added with ``add_listener``"""
+        self._listeners.remove(listener)
+
+    def _notify(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]):
+        for listener in self._listeners:
+            listener(old, new)
+
+    def stats(self) -> TodoStats:
+        """Create statistics that follow this store from now on"""
+        return TodoStats(self)
+
+    def load(self) -> int:
+        """Load all records from storage and build the indexes
+
+        Returns the number of records re-keyed by ``finish_load``.
+        """
+        for batch in self.start_load():
+            self.load_batch(batch)
+        return self.finish_load()
+
+    def start_load(self, batch_size: int = 5000) -> Iterator[List[Dict[str, Any]]]:
+        """Empty the store and return the storage's batches of stored records
+
+        The batches only read files, so they can be produced on a worker
+        thread while ``load_batch`` inserts them on the thread that owns the
+        store. ``finish_load`` must be called once they are exhausted.
+        """
+        self._by_id.clear()
+        for index in self._indexes.values():
+            index.clear()
+        self._duplicates = []
+        self._notify(None, None)
+        return self.storage.iter_load(batch_size)
+
+    def load_batch(self, todos: List[Dict[str, Any]]):
+        """Insert loaded records, notifying listeners as if they were added"""
+        for todo in todos:
+            if todo['id'] in self._by_id:
+                self._duplicates.append(todo)
+            else:
+                self._insert(todo)
+                self._notify(None, todo)
+
+    def finish_load(self) -> int:
+        """Repair duplicate ids once every record is loaded
+
+        Files written before ids were allocated from a persistent sequence
+        can contain duplicate ids. Every record after the first one with a
+        given id is re-keyed with a fresh id and the storage is compacted so
+        the repair only ever happens once. Returns the number of re-keyed
+        records.
+        """
+        self._next_id = max(self._next_id, self.storage.next_id)
+        duplicates, self._duplicates = self._duplicates, []
+        for todo in duplicates:
+            todo = dict(todo, id=self.allocate_id())
+            self._insert(todo)
+            self.storage.log_add(todo)
+            self._notify(None, todo)
+        if duplicates:
+            self.storage.compact()
+        else:
+            self.storage.finish_load()
+        self.search_index.active = False
+        return len(duplicates)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, todo_id: int) -> bool:
+        return todo_id in self._by_id
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Return every record that should be persisted
+
+        Safe to call from the storage threads: copying the dict values runs
+        entirely in C, so it never observes a mutation half way through.
+        """
+        return list(self._by_id.values())
+
+    def get(self, todo_id: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(todo_id)
+
+    def allocate_id(self) -> int:
+        """Hand out the next id; ids are never reused, even after deletes
+
+        The storage reserves it, so processes sharing the file never hand
+        out the same id.
+        """
+        todo_id = self.storage.reserve_id(self._next_id)
+        self._next_id = max(self._next_id, todo_id + 1)
+        return todo_id
+
+    def _insert(self, todo: Dict[str, Any]):
+        todo_id = todo['id']
+        self._by_id[todo_id] = todo
+        for field, index in self._indexes.items():
+            index.setdefault(todo.get(field), {})[todo_id] = None
+        if todo_id >= self._next_id:
+            self._next_id = todo_id + 1
+
+    def _remove(self, todo: Dict[str, Any]):
+        todo_id = todo['id']
+        del self._by_id[todo_id]
+        for field, index in self._indexes.items():
+            bucket = index[todo.get(field)]
+            del bucket[todo_id]
+            if not bucket:
+                del index[todo.get(field)]
+
+    def add(self, todo: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a new record"""
+        if todo['id'] in self._by_id:
+            raise ValueError(f"Duplicate todo id: {todo['id']}")
+        self._insert(todo)
+        self.storage.log_add(todo)
+        self._notify(None, todo)
+        return todo
+
+    def add_many(self, todos: Iterable[Dict[str, Any]]) -> int:
+        """Add many new records, logging them to storage as one bulk insert"""
+        added = []
+        for todo in todos:
+            if todo['id'] in self._by_id:
+                raise ValueError(f"Duplicate todo id: {todo['id']}")
+            self._insert(todo)
+            added.append(todo)
+        self.storage.log_add_many(added)
+        if self._listeners:
+            for todo in added:
+                self._notify(None, todo)
+        return len(added)
+
+    def _replace(self, old: Dict[str, Any], new: Dict[str, Any]):
+        todo_id = old['id']
+        for field in self.INDEXED_FIELDS:
+            old_value, new_value = old.get(field), new.get(field)
+            if old_value != new_value:
+                index = self._indexes[field]
+                bucket = index[old_value]
+                del bucket[todo_id]
+                if not bucket:
+                    del index[old_value]
+                index.setdefault(new_value, {})[todo_id] = None
+        self._by_id[todo_id] = new
+
+    def update(self, todo_id: int, **changes) -> Dict[str, Any]:
+        """Replace a record with a copy that has ``changes`` applied
+
+        Only the fields whose value changed are logged as changed, so
+        another process editing other fields of the same todo keeps its
+        edits.
+        """
+        old = self._by_id[todo_id]
+        new = dict(old, **changes)
+        self._replace(old, new)
+        self.storage.log_update(new, [field for field in changes if old.get(field) != new[field]])
+        self._notify(old, new)
+        return new
+
+    def delete(self, todo_id: int):
+        """Delete a record"""
+        old = self._by_id[todo_id]
+        self._remove(old)
+        self.storage.log_delete(todo_id)
+        self._notify(old, None)
+
+    def clear(self):
+        """Delete every record"""
+        self._by_id.clear()
+        for index in self._indexes.values():
+            index.clear()
+        self.storage.log_clear()
+        self._notify(None, None)
+
+    def apply_changes(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Replay storage log entries written by another process, without logging them
+
+        Entries that leave a record as it is are skipped, so replaying
+        this process's own entries changes nothing. Returns the number of
+        entries that changed a record.
+        """
+        changed = 0
+        for entry in entries:
+            op = entry.get('op')
+            if op == 'clear':
+                if self._by_id:
+                    self._by_id.clear()
+                    for index in self._indexes.values():
+                        index.clear()
+                    self._notify(None, None)
+                    changed += 1
+            elif op == 'delete':
+                old = self._by_id.get(entry.get('id'))
+                if old is not None:
+                    self._remove(old)
+                    self._notify(old, None)
+                    changed += 1
+            elif op in ('add', 'update'):
+                old = self._by_id.get(entry['todo']['id'])
+                if old is None:
+                    if 'fields' in entry:
+                        # A field update of a record deleted here
+                        continue
+                    new = entry['todo']
+                    self._insert(new)
+                else:
+                    new = updated_record(old, entry)
+                    if new == old:
+                        continue
+                    self._replace(old, new)
+                self._notify(old, new)
+                changed += 1
+        return changed
+
+    def sync(self) -> Optional[int]:
+        """Merge in what other processes saved since the last call
+
+        Returns the number of changes applied, or None when the storage
+        cannot tell and everything has to be loaded again.
+        """
+        entries = self.storage.read_changes()
+        if entries is None:
+            return None
+        return self.apply_changes(entries)
+
+    def commit(self):
+        """Persist the changes made since the last commit"""
+        self.storage.commit()
+
+    def rollback(self):
+        """Drop uncommitted changes from storage
+
+        The in-memory records are not restored; reload the store to get back
+        to what is on disk.
+        """
+        self.storage.rollback()
+
+    def close(self):
+        self.storage.close()
+
+    def count(self, field: str, value: Any) -> int:
+        """Number of records whose ``field`` equals ``value``"""
+        return len(self._indexes[field].get(value, ()))
+
+    def counts(self, field: str) -> Dict[Any, int]:
+        """Number of records per distinct value of ``field``"""
+        return {value: len(ids) for value, ids in self._indexes[field].items()}
+
+    def filter(self, completed: Optional[bool] = None,
+               category: Optional[str] = None,
+               text: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return matching records in id order, touching only the index buckets
+
+        ``text`` restricts the result to tasks with a word starting with
+        each of its words. Until the search index is built that is checked
+        by scanning the other matches.
+        """
+        buckets = []
+        tokens = tokenize(text) if text else []
+        if tokens:
+            matches = self.search_index.search(text)
+            if matches is not None:
+                buckets.append(matches)
+                tokens = []
+        if completed is not None:
+            buckets.append(self._indexes['completed'].get(completed, {}))
+        if category is not None:
+            buckets.append(self._indexes['category'].get(category, {}))
+
+        if not buckets:
+            todos = list(self._by_id.values())
+        else:
+            buckets.sort(key=len)
+            smallest, others = buckets[0], buckets[1:]
+            ids = [todo_id for todo_id in smallest
+                   if all(todo_id in other for other in others)]
+            # Buckets are almost sorted already (updates append at the end), so
+            # this is close to linear
+            ids.sort()
+            todos = [self._by_id[todo_id] for todo_id in ids]
+        if tokens:
+            todos = [todo for todo in todos if task_matches(todo.get('task', ''), tokens)]
+        return todos
@@ -0,0 +1,96 @@
+# todo_view.py
+import tkinter as tk
+from datetime import datetime
+from typing import Dict, Any, List, Sequence, Tuple
+
+
+class TodoListView:
+    """Render one page of todos into a Treeview, applying only the rows that changed
+
+    Rows use the todo id as their Treeview iid, so a refresh can update,
+    insert, move or delete individual rows instead of rebuilding the widget.
+    Display tuples are cached per record; since the store replaces a record
+    on every update, an identity check is enough to tell if it is stale.
+    """
+
+    def __init__(self, tree, page_size: int = 200):
+        self.tree = tree
+        self.page_size = page_size
+        self.page = 0
+        self.total = 0
+        self._rendered: Dict[str, Tuple] = {}
+        self._row_cache: Dict[int, Tuple[Dict[str, Any], Tuple]] = {}
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.total // self.page_size))
+
+    def row_values(self, todo: Dict[str, Any]) -> Tuple:
+        """Return the cached display tuple for a todo"""
+        cached = self._row_cache.get(todo['id'])
+        if cached is not None and cached[0] is todo:
+            return cached[1]
+
+        status = "Completed" if todo['completed'] else "Pending"
+        created_date = datetime.fromisoformat(todo['created_at']).strftime("%Y-%m-%d")
+        values = (
+            todo['id'],
+            todo['task'],
+            todo['priority'].title(),
+            todo['category'].title(),
+            status,
+            created_date
+        )
+        if len(self._row_cache) >= self.page_size * 10:
+            self._row_cache.clear()
+        self._row_cache[todo['id']] = (todo, values)
+        return values
+
+    def render(self, todos: Sequence[Dict[str, Any]]):
+        """Show the current page of ``todos``, diffing against what is displayed"""
+        self.total = len(todos)
+        self.page = min(self.page, self.page_count - 1)
+        start = self.page * self.page_size
+        window = todos[start:start + self.page_size]
+
+        rows: List[Tuple[str, Tuple]] = [(str(todo['id']), self.row_values(todo)) for todo in window]
+        wanted = {iid for iid, _ in rows}
+
+        stale = [iid for iid in self._rendered if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self._rendered[iid]
+
+        for iid, values in rows:
+            current = self._rendered.get(iid)
+            if current is None:
+                self.tree.insert('', tk.END, iid=iid, values=values)
+            elif current != values:
+                self.tree.item(iid, values=values)
+            self._rendered[iid] = values
+
+        order = [iid for iid, _ in rows]
+        if list(self.tree.get_children()) != order:
+            for index, iid in enumerate(order):
+                self.tree.move(iid, '', index)
+
+    def next_page(self) -> bool:
+        if self.page + 1 < self.page_count:
+            self.page += 1
+            return True
+        return False
+
+    def previous_page(self) -> bool:
+        if self.page > 0:
+            self.page -= 1
+            return True
+        return False
+
+    def describe(self) -> str:
+        """Summary of the visible range, e.g. for a pager label"""
+        if not self.total:
+            return "No todos"
+        start = self.page * self.page_size
+        end = min(start + self.page_size, self.total)
+        return f"Showing {start + 1}-{end} of {self.total} (page {self.page + 1}/{self.page_count})"